@@ -17,3 +17,12 @@ admin.site.register(Attendance)
 admin.site.register(MonthlyCompanyReport)
 admin.site.register(MonthlyEmployeeReport)
 admin.site.register(InterviewedCandidate)
+admin.site.register(BackgroundJob)
+admin.site.register(DashboardStats)
+admin.site.register(MaintenanceTask)
+admin.site.register(PunchEvent)
+admin.site.register(Watermark)
+admin.site.register(MonthlyEmployeeStats)
+admin.site.register(PayrollDirtyMark)
+admin.site.register(PayrollRun)
+admin.site.register(PayrollRunLock)
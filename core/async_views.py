@@ -0,0 +1,89 @@
+# Async variants of the read-only endpoints, served under /api/async/. Same
+# responses as their sync counterparts in core.views, but read through Django's
+# async ORM, so under an ASGI server (uvicorn) a request waiting on the database
+# does not hold a worker thread. DRF's api_view is sync-only, so these are plain
+# Django views.
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from . import serializers
+from .decorators import hr_required
+from .models import Department, Employee, LeaveApplication
+from .stats import aget_dashboard_stats, serialize_dashboard
+
+
+@require_GET
+@hr_required
+async def dashboard_view(request):
+    try:
+        return JsonResponse(serialize_dashboard(await aget_dashboard_stats()), status=200)
+    except Exception as e:
+        return JsonResponse({'message': f"{e}"})
+
+
+@require_GET
+@hr_required
+async def employee_list_view(request):
+    try:
+        return await serializers.EMPLOYEE_LIST.apage(request, 'employees')
+    except Exception as e:
+        return JsonResponse({'message': f"{e}"})
+
+
+@require_GET
+@hr_required
+async def employee_detail_view(request):
+    try:
+        employee_id = request.GET.get('employee_id')
+        if not employee_id:
+            return JsonResponse({'message': 'No employee ID provided.'}, status=400)
+        employee = await serializers.EMPLOYEE_DETAIL.queryset().filter(id=employee_id).afirst()
+        if not employee:
+            return JsonResponse({'message': 'Employee not found.'}, status=404)
+        return JsonResponse(serializers.EMPLOYEE_DETAIL.serialize(employee))
+    except Exception as e:
+        return JsonResponse({'message': f"{e}"})
+
+
+@require_GET
+async def department_view(request):
+    try:
+        department_name = request.GET.get('department_name')
+        if not department_name:
+            return JsonResponse({'message': 'No department name provided.'}, status=400)
+        department = await Department.objects.filter(department_name=department_name).afirst()
+        if not department:
+            return JsonResponse({'message': 'Department not found.'}, status=404)
+        return await serializers.DEPARTMENT_EMPLOYEES.apage(
+            request,
+            'employees',
+            Employee.objects.filter(department=department, employment_status='active'),
+            department_name=department.department_name,
+            total_employees=await Employee.objects.filter(department=department).acount(),
+        )
+    except Exception as e:
+        return JsonResponse({'message': f"{e}"})
+
+
+@require_GET
+@hr_required
+async def view_attendance_view(request):
+    return await serializers.ATTENDANCE.apage(request, 'attendances')
+
+
+@require_GET
+async def all_complaints_view(request):
+    return await serializers.COMPLAINTS.apage(request, 'complaints')
+
+
+@require_GET
+@hr_required
+async def leave_list_view(request):
+    return await serializers.LEAVE_TYPES.apage(request, 'leave_types')
+
+
+@require_GET
+@hr_required
+async def employee_leave(request):
+    leave_applications = LeaveApplication.objects.filter(employee__employment_status="active")
+    return await serializers.LEAVE_APPLICATIONS.apage(request, 'leave_applications', leave_applications)
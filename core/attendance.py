@@ -0,0 +1,199 @@
+import csv
+import json
+from datetime import date, datetime
+
+from django.db import connection, transaction
+
+from .models import Attendance, Employee
+from .monthly_stats import refresh_employee_days
+from .payroll_marks import mark_employee_days
+from .signals import refresh_dashboard_on_commit
+
+BATCH_SIZE = 5000
+EMPLOYEE_CHUNK = 1000
+STATUSES = {choice for choice, _ in Attendance.STATUS_CHOICES}
+
+
+class RowError(ValueError):
+    pass
+
+
+def parse_ndjson(lines):
+    """Yield (row number, dict or RowError) for each non-blank NDJSON line."""
+    for number, line in enumerate(lines, start=1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield number, RowError("Invalid JSON")
+            continue
+        yield number, row if isinstance(row, dict) else RowError("Each line must be a JSON object")
+
+
+def parse_csv(lines):
+    """Yield (row number, dict) for each CSV record; the first line is the header."""
+    lines = (line.decode('utf-8') if isinstance(line, bytes) else line for line in lines)
+    for number, row in enumerate(csv.DictReader(lines), start=2):
+        yield number, {key: value for key, value in row.items() if value not in ('', None)}
+
+
+def _parse_time(value, name):
+    if value in (None, ''):
+        return None
+    try:
+        return datetime.strptime(value, "%H:%M:%S").time()
+    except (TypeError, ValueError):
+        raise RowError(f"Invalid {name}, use HH:MM:SS")
+
+
+def validate_row(row, active_ids, today):
+    """The (employee_id, date, check_in, check_out, status) of one punch row, or RowError."""
+    try:
+        employee_id = int(row.get('employee_id'))
+    except (TypeError, ValueError):
+        raise RowError("employee_id is required")
+    if employee_id not in active_ids:
+        raise RowError("Employee not found")
+
+    try:
+        att_date = datetime.strptime(row.get('attendance_date') or '', "%Y-%m-%d").date()
+    except ValueError:
+        raise RowError("Invalid date format, use YYYY-MM-DD")
+    if att_date > today:
+        raise RowError("Attendance date cannot be in the future")
+
+    check_in = _parse_time(row.get('check_in_time'), 'check_in_time')
+    check_out = _parse_time(row.get('check_out_time'), 'check_out_time')
+    status = row.get('status') or ('absent' if not check_in and not check_out else 'present')
+    if status not in STATUSES:
+        raise RowError(f"Invalid status, use one of {sorted(STATUSES)}")
+    if status == 'absent':
+        check_in = check_out = None
+    elif not check_in and not check_out:
+        raise RowError("check_in_time or check_out_time is required")
+    if check_in and check_out and check_out < check_in:
+        raise RowError("check_out_time is before check_in_time")
+    return employee_id, att_date, check_in, check_out, status
+
+
+def _merge(batch):
+    """Collapse several punches of one employee and day: first check-in, last check-out."""
+    merged = {}
+    for employee_id, att_date, check_in, check_out, status in batch:
+        key = (employee_id, att_date)
+        if key not in merged:
+            merged[key] = [check_in, check_out, status]
+            continue
+        current = merged[key]
+        if check_in and (not current[0] or check_in < current[0]):
+            current[0] = check_in
+        if check_out and (not current[1] or check_out > current[1]):
+            current[1] = check_out
+        current[2] = status
+    return merged
+
+
+def _stored(merged):
+    """{(employee_id, day): [check_in, check_out, status]} of the rows already recorded for ``merged``, locked."""
+    employee_ids = sorted({employee_id for employee_id, _ in merged})
+    days = [day for _, day in merged]
+    stored = {}
+    for i in range(0, len(employee_ids), EMPLOYEE_CHUNK):
+        rows = Attendance.objects.select_for_update().filter(
+            employee_id__in=employee_ids[i:i + EMPLOYEE_CHUNK], attendance_date__range=(min(days), max(days)),
+        ).values_list('employee_id', 'attendance_date', 'check_in_time', 'check_out_time', 'status')
+        for employee_id, att_date, check_in, check_out, status in rows:
+            if (employee_id, att_date) in merged:
+                stored[employee_id, att_date] = [check_in, check_out, status]
+    return stored
+
+
+def _combine(stored, incoming):
+    """
+    Earliest check-in and latest check-out of a stored row and incoming punches.
+
+    The status goes with the check-in: a recorded one keeps its status, so a
+    resent or check-out-only punch does not change it, while punches for a
+    day recorded as absent bring their own. A day left without punches is absent.
+    """
+    check_in = min(filter(None, (stored[0], incoming[0])), default=None)
+    check_out = max(filter(None, (stored[1], incoming[1])), default=None)
+    if not check_in and not check_out:
+        status = 'absent'
+    elif check_in == stored[0] and stored[2] != 'absent':
+        status = stored[2]
+    else:
+        status = incoming[2]
+    return [check_in, check_out, status]
+
+
+def _write(batch):
+    """
+    Upsert one batch of validated punches.
+
+    The (employee, day) rows the batch touches are read FOR UPDATE and merged
+    with it (see _combine), then every row is written in one upsert, so
+    resent or out-of-order punches never lose a recorded check-in or
+    check-out. bulk_create sends no signals, so the touched employee-months
+    of MonthlyEmployeeStats are refreshed, and their payrolls marked stale, here.
+    """
+    merged = _merge(batch)
+    for key, stored in _stored(merged).items():
+        merged[key] = _combine(stored, merged[key])
+    rows = [
+        Attendance(
+            employee_id=employee_id, attendance_date=att_date,
+            check_in_time=check_in, check_out_time=check_out, status=status,
+        )
+        for (employee_id, att_date), (check_in, check_out, status) in merged.items()
+    ]
+
+    # MySQL infers the conflict target from the unique index and rejects an explicit one.
+    target = {}
+    if connection.features.supports_update_conflicts_with_target:
+        target['unique_fields'] = ['employee', 'attendance_date']
+    Attendance.objects.bulk_create(
+        rows, update_conflicts=True, update_fields=['check_in_time', 'check_out_time', 'status'], **target
+    )
+    refresh_employee_days(merged)
+    mark_employee_days(merged)
+    return len(rows)
+
+
+def ingest_attendance(rows, batch_size=BATCH_SIZE, today=None):
+    """
+    Validate and upsert (row number, dict) punches, ``batch_size`` at a time.
+
+    Invalid rows are reported and skipped; the rest of the batch is written.
+    Returns {'rows', 'accepted', 'written', 'errors'}.
+    """
+    today = today or date.today()
+    active_ids = set(Employee.objects.filter(employment_status='active').values_list('id', flat=True))
+    result = {'rows': 0, 'accepted': 0, 'written': 0, 'errors': []}
+    batch = []
+
+    def flush():
+        with transaction.atomic():
+            result['written'] += _write(batch)
+        batch.clear()
+
+    for number, row in rows:
+        result['rows'] += 1
+        try:
+            if isinstance(row, RowError):
+                raise row
+            batch.append(validate_row(row, active_ids, today))
+        except RowError as e:
+            result['errors'].append({'row': number, 'error': str(e)})
+            continue
+        result['accepted'] += 1
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    if result['written']:
+        refresh_dashboard_on_commit('attendance')
+    return result
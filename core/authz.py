@@ -0,0 +1,136 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.db.models import F
+
+from .models import Employee
+
+AuthContext = namedtuple('AuthContext', 'employee_id status department designation version')
+
+
+class AuthzCache:
+    """
+    Per-process LRU cache of employee_id -> AuthContext, each entry kept for ``ttl`` seconds.
+
+    Changes made in this process invalidate the entry at once; other worker
+    processes see them when their entry expires, so a terminated employee
+    loses access everywhere within one TTL.
+    """
+
+    def __init__(self, size=None, ttl=None):
+        self.lock = threading.Lock()
+        self.size = size
+        self.ttl = ttl
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.entries = OrderedDict()
+            self.hits = 0
+            self.misses = 0
+
+    def _limits(self):
+        size = self.size if self.size is not None else getattr(settings, 'AUTHZ_CACHE_SIZE', 4096)
+        ttl = self.ttl if self.ttl is not None else getattr(settings, 'AUTHZ_CACHE_TTL', 60)
+        return size, ttl
+
+    def get(self, employee_id):
+        with self.lock:
+            entry = self.entries.get(employee_id)
+            if entry is not None and entry[1] > time.monotonic():
+                self.entries.move_to_end(employee_id)
+                self.hits += 1
+                return entry[0]
+            self.entries.pop(employee_id, None)
+            self.misses += 1
+            return None
+
+    def put(self, context):
+        size, ttl = self._limits()
+        with self.lock:
+            self.entries[context.employee_id] = (context, time.monotonic() + ttl)
+            self.entries.move_to_end(context.employee_id)
+            while len(self.entries) > size:
+                self.entries.popitem(last=False)
+
+    def discard(self, employee_ids):
+        with self.lock:
+            for employee_id in employee_ids:
+                self.entries.pop(employee_id, None)
+
+
+authz_cache = AuthzCache()
+
+
+def context_for(employee):
+    return AuthContext(
+        employee.id,
+        employee.employment_status,
+        employee.department.department_name if employee.department else None,
+        employee.designation.designation_name if employee.designation else None,
+        employee.authz_version,
+    )
+
+
+def _context_row(employee_id):
+    return Employee.objects.filter(id=employee_id).values_list(
+        'employment_status', 'department__department_name', 'designation__designation_name', 'authz_version',
+    )
+
+
+def _remember(employee_id, row):
+    if row is None:
+        return None
+    context = AuthContext(employee_id, *row)
+    authz_cache.put(context)
+    return context
+
+
+def authorization_context(employee_id):
+    """The employee's current status, department and designation; one query on a cache miss, None if deleted."""
+    context = authz_cache.get(employee_id)
+    if context is None:
+        context = _remember(employee_id, _context_row(employee_id).first())
+    return context
+
+
+async def aauthorization_context(employee_id):
+    context = authz_cache.get(employee_id)
+    if context is None:
+        context = _remember(employee_id, await _context_row(employee_id).afirst())
+    return context
+
+
+def bump_authz_version(employee_ids):
+    """Invalidate the sessions of employees whose status, department or designation changed."""
+    employee_ids = list(employee_ids)
+    Employee.objects.filter(id__in=employee_ids).update(authz_version=F('authz_version') + 1)
+    authz_cache.discard(employee_ids)
+
+
+def remember_login(request, employee):
+    """Snapshot the authorization context into a fresh session and warm the cache."""
+    context = context_for(employee)
+    authz_cache.put(context)
+    _store(request.session, context)
+
+
+def refresh_session(session, context):
+    """Bring a session's snapshot up to date when the employee's version moved on since login."""
+    if session.get('authz_version') != context.version:
+        _store(session, context)
+
+
+async def arefresh_session(session, context):
+    if await session.aget('authz_version') != context.version:
+        await session.aupdate(_snapshot(context))
+
+
+def _store(session, context):
+    session.update(_snapshot(context))
+
+
+def _snapshot(context):
+    return {'department': context.department, 'designation': context.designation, 'authz_version': context.version}
@@ -0,0 +1,344 @@
+import json
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from http.client import HTTPException
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import close_old_connections, connection
+from django.db.backends.signals import connection_created
+from django.test import Client, override_settings
+from django.utils import timezone
+
+from .jobs import claim_next_job, enqueue_report_job, run_job
+from .middleware import QueryObserver
+from .models import Employee, Payroll
+from .payroll import generate_payrolls
+from .synthetic import seed_synthetic
+
+DEFAULT_SIZES = (100, 1000, 10000)
+
+BENCHMARKS = {}
+
+
+def benchmark(name, setup=None):
+    """
+    Register a benchmark. The function receives the context dict built by
+    ``prepare_context``; ``setup`` runs untimed before every repetition.
+    """
+    def register(func):
+        BENCHMARKS[name] = (func, setup)
+        return func
+    return register
+
+
+def hr_client():
+    """Test client with the session of an active HR employee."""
+    hr = Employee.objects.filter(department__department_name='HR', employment_status='active').first()
+    client = Client()
+    session = client.session
+    session['employee_id'] = hr.id
+    session['department'] = 'HR'
+    session['authz_version'] = hr.authz_version
+    session.save()
+    # A signed-cookie session's key is its content, so it changes on every save.
+    client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+    return client
+
+
+def prepare_context(today=None):
+    today = today or date.today()
+    return {'client': hr_client(), 'month': today.month, 'year': today.year}
+
+
+def _get(context, url, **params):
+    response = context['client'].get(url, params)
+    assert response.status_code == 200, f"{url} returned {response.status_code}"
+    return response
+
+
+@benchmark('dashboard')
+def bench_dashboard(context):
+    _get(context, '/api/dashboard/')
+
+
+@benchmark('attendance_list')
+def bench_attendance_list(context):
+    _get(context, '/api/attendance/view/', limit=100)
+
+
+@benchmark('insured_employees')
+def bench_insured_employees(context):
+    _get(context, '/api/insurance/employees/')
+
+
+def _clear_current_payrolls(context):
+    Payroll.objects.filter(month=context['month'], year=context['year']).delete()
+
+
+@benchmark('payroll_generation', setup=_clear_current_payrolls)
+def bench_payroll_generation(context):
+    generate_payrolls(context['month'], context['year'])
+
+
+@benchmark('payroll_simulation')
+def bench_payroll_simulation(context):
+    response = context['client'].post('/api/payroll/simulate/', {
+        'month': context['month'], 'year': context['year'],
+        'rules': {'tenure_cap': 15, 'overtime_rate': 1}, 'salaries': {},
+    }, content_type='application/json')
+    assert response.status_code == 200, f"simulation returned {response.status_code}"
+
+
+SESSION_REQUESTS = 50
+
+
+def session_benchmark(backend):
+    """
+    SESSION_REQUESTS authenticated requests that only read the session, with
+    SESSION_ENGINE switched to ``backend`` (a key of settings.SESSION_ENGINES).
+    """
+    engine = settings.SESSION_ENGINES[backend]
+
+    def login(context):
+        clients = context.setdefault('session_clients', {})
+        if backend not in clients:
+            with override_settings(SESSION_ENGINE=engine):
+                clients[backend] = hr_client()
+
+    @benchmark(f'session_{backend}', setup=login)
+    def bench_session(context):
+        client = context['session_clients'][backend]
+        with override_settings(SESSION_ENGINE=engine):
+            for _ in range(SESSION_REQUESTS):
+                response = client.get('/api/check-session/')
+                assert response.json()['authenticated'], f"{backend} session was lost"
+
+
+for _backend in settings.SESSION_ENGINES:
+    session_benchmark(_backend)
+
+
+REUSE_REQUESTS = 50
+
+
+def connection_benchmark(name, max_age):
+    """
+    REUSE_REQUESTS requests with CONN_MAX_AGE set to ``max_age``, calling
+    close_old_connections around each one as Django's request_started and
+    request_finished handlers do (the test client skips them). Reports how
+    many connections were set up and the per-request latency percentiles.
+    An in-memory SQLite database ignores close(), so compare these on MySQL
+    or a SQLite file; with core.dbpool, ``0`` measures pool checkouts.
+    """
+    @benchmark(f'connection_{name}')
+    def bench_connection(context):
+        opened = []
+
+        def count(sender, **kwargs):
+            opened.append(sender)
+
+        old_max_age = connection.settings_dict['CONN_MAX_AGE']
+        connection.settings_dict['CONN_MAX_AGE'] = max_age
+        connection_created.connect(count)
+        latencies = []
+        try:
+            connection.close()
+            for _ in range(REUSE_REQUESTS):
+                started = time.perf_counter()
+                close_old_connections()
+                response = context['client'].get('/api/check-session/')
+                close_old_connections()
+                latencies.append(time.perf_counter() - started)
+                assert response.json()['authenticated'], "session was lost"
+        finally:
+            connection_created.disconnect(count)
+            connection.settings_dict['CONN_MAX_AGE'] = old_max_age
+        percentiles = statistics.quantiles(latencies, n=100)
+        return {
+            'connections_opened': len(opened),
+            'latency_p50': round(percentiles[49], 6),
+            'latency_p99': round(percentiles[98], 6),
+        }
+
+
+connection_benchmark('per_request', 0)
+connection_benchmark('persistent', None)
+
+
+LOGIN_THREADS = 8
+LOGIN_ROUNDS = 2
+LOGIN_PASSWORD = 'benchmark-password'
+
+
+def _set_login_password(context):
+    if 'login_email' not in context:
+        hr = Employee.objects.filter(department__department_name='HR', employment_status='active').first()
+        hr.set_password(LOGIN_PASSWORD)
+        hr.save()
+        context['login_email'] = hr.email
+
+
+@benchmark('login_concurrent', setup=_set_login_password)
+def bench_login_concurrent(context):
+    """
+    LOGIN_THREADS clients logging in LOGIN_ROUNDS times each, all at once.
+    Only queries of the benchmark thread are counted; latency percentiles
+    cover every login.
+    """
+    body = json.dumps({'email': context['login_email'], 'password': LOGIN_PASSWORD})
+
+    def logins():
+        client, latencies = Client(), []
+        try:
+            for _ in range(LOGIN_ROUNDS):
+                started = time.perf_counter()
+                response = client.post('/api/login/', body, content_type='application/json')
+                latencies.append(time.perf_counter() - started)
+                assert response.status_code == 200, f"login returned {response.status_code}"
+        finally:
+            connection.close()
+        return latencies
+
+    with ThreadPoolExecutor(max_workers=LOGIN_THREADS) as pool:
+        futures = [pool.submit(logins) for _ in range(LOGIN_THREADS)]
+        latencies = sorted(latency for future in futures for latency in future.result())
+    percentiles = statistics.quantiles(latencies, n=100)
+    return {'logins': len(latencies), 'latency_p50': round(percentiles[49], 6), 'latency_p99': round(percentiles[98], 6)}
+
+
+@benchmark('report_generation')
+def bench_report_generation(context):
+    enqueue_report_job('employee', context['month'], context['year'])
+    job = run_job(claim_next_job())
+    assert job.status == 'completed', job.errors
+
+
+def measure(func, setup, context, repeat):
+    """
+    Run one benchmark ``repeat`` times; wall times and the query count of the
+    last run, plus whatever dict the benchmark itself returned last.
+    """
+    timings = []
+    observer = None
+    extra = None
+    for _ in range(repeat):
+        if setup:
+            setup(context)
+        observer = QueryObserver()
+        with connection.execute_wrapper(observer):
+            started = time.perf_counter()
+            extra = func(context)
+            timings.append(time.perf_counter() - started)
+    return {
+        **(extra or {}),
+        'seconds': {
+            'min': round(min(timings), 6),
+            'median': round(statistics.median(timings), 6),
+            'max': round(max(timings), 6),
+        },
+        'queries': observer.queries,
+        'db_seconds': round(observer.seconds, 6),
+    }
+
+
+def run_suite(sizes=DEFAULT_SIZES, months=3, names=None, repeat=3, flush=True, log=None):
+    """
+    Seed each dataset size and run the selected benchmarks against it.
+
+    The current database is wiped between sizes when ``flush`` is set, so
+    only run this against a scratch/test database (``run_benchmarks`` does).
+    """
+    names = names or list(BENCHMARKS)
+    results = []
+    with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+        for size in sizes:
+            if flush:
+                call_command('flush', interactive=False, verbosity=0)
+            started = time.perf_counter()
+            counts = seed_synthetic(size, months)
+            seed_seconds = time.perf_counter() - started
+            if log:
+                log(f"seeded {size} employees in {seed_seconds:.1f}s: {counts}")
+            context = prepare_context()
+            for name in names:
+                func, setup = BENCHMARKS[name]
+                result = measure(func, setup, context, repeat)
+                results.append({'benchmark': name, 'employees': size, 'months': months, 'repeat': repeat, **result})
+                if log:
+                    line = f"{name} @ {size}: {result['seconds']['median']:.4f}s, {result['queries']} queries"
+                    if 'latency_p99' in result:
+                        line += f", p50 {result['latency_p50']:.4f}s, p99 {result['latency_p99']:.4f}s"
+                    log(line)
+    return results
+
+
+def load_test(url, headers, requests, concurrency):
+    """
+    ``requests`` GETs of ``url`` from ``concurrency`` threads at once; throughput
+    and latency percentiles. Used against a real server by ``benchmark_servers``.
+    """
+    def fetch(_):
+        started = time.perf_counter()
+        try:
+            with urlopen(Request(url, headers=headers), timeout=60) as response:
+                response.read()
+                ok = response.status == 200
+        except (OSError, HTTPException):
+            ok = False
+        return time.perf_counter() - started, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(fetch, range(requests)))
+    elapsed = time.perf_counter() - started
+    latencies = sorted(latency for latency, _ in results)
+    percentiles = statistics.quantiles(latencies, n=100)
+    return {
+        'requests': requests,
+        'errors': sum(1 for _, ok in results if not ok),
+        'requests_per_second': round(requests / elapsed, 1),
+        'latency_p50': round(percentiles[49], 6),
+        'latency_p99': round(percentiles[98], 6),
+    }
+
+
+def process_tree_rss(pid):
+    """Resident memory in bytes of a process and all its descendants (Linux /proc)."""
+    total = 0
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    total += int(line.split()[1]) * 1024
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            children = [int(child) for child in f.read().split()]
+    except OSError:
+        return total
+    return total + sum(process_tree_rss(child) for child in children)
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report(results):
+    """The JSON document written by ``run_benchmarks``."""
+    return {
+        'revision': git_revision(),
+        'created_at': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'database': connection.vendor,
+        'results': results,
+    }
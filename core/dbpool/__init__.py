@@ -0,0 +1,215 @@
+# Database backends that keep a small per-process pool of connections. Set
+# DATABASES[...]['ENGINE'] to 'core.dbpool.mysql' (or 'core.dbpool.sqlite3')
+# with CONN_MAX_AGE = 0: Django then hands each request's connection back to
+# the pool when the request ends, and the next request reuses it whichever
+# thread it runs on. Plain persistent connections (CONN_MAX_AGE > 0) stay with
+# the thread that opened them, which suits sync workers but not ASGI, where
+# every request may run on a different thread.
+import threading
+import time
+from collections import deque
+
+from django.db import DatabaseError
+
+
+class PoolTimeout(DatabaseError):
+    pass
+
+
+class ConnectionPool:
+    """
+    At most ``size`` open DB-API connections of one alias, shared by the threads of a process.
+
+    When all of them are checked out, callers wait up to ``timeout`` seconds
+    and then get PoolTimeout. Connections idle for ``max_idle`` seconds are
+    closed rather than reused, ahead of the server's own idle timeout.
+    ``target`` is the database the connections point at (see pool_for).
+    """
+
+    def __init__(self, size=10, timeout=30, max_idle=300, target=None):
+        self.size = size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.target = target
+        self.retired = False
+        self.cond = threading.Condition()
+        self.idle = deque()
+        self.open = 0
+        self.created = 0
+        self.reused = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.timeouts = 0
+
+    def acquire(self, connect, usable=None):
+        """An idle connection that passes ``usable(conn)``, or a new one from ``connect()``."""
+        started = time.monotonic()
+        while True:
+            conn = self._checkout(started)
+            if conn is None:
+                break
+            if usable is None or usable(conn):
+                with self.cond:
+                    self.reused += 1
+                return conn
+            self.discard(conn)
+        try:
+            conn = connect()
+        except BaseException:
+            with self.cond:
+                self.open -= 1
+                self.cond.notify()
+            raise
+        with self.cond:
+            self.created += 1
+        return conn
+
+    def _checkout(self, started):
+        """An idle connection, or None once a slot for a new one is reserved."""
+        waited = False
+        with self.cond:
+            try:
+                while True:
+                    self._prune()
+                    if self.idle:
+                        return self.idle.pop()[0]
+                    if self.open < self.size:
+                        self.open += 1
+                        return None
+                    remaining = started + self.timeout - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeout(f"No database connection free within {self.timeout}s")
+                    waited = True
+                    self.cond.wait(remaining)
+            finally:
+                if waited:
+                    self.waits += 1
+                    self.wait_seconds += time.monotonic() - started
+
+    def release(self, conn):
+        if self.retired:
+            self.discard(conn)
+            return
+        with self.cond:
+            self.idle.append((conn, time.monotonic()))
+            self._prune()
+            self.cond.notify()
+
+    def discard(self, conn):
+        """Close a checked-out connection that must not be reused."""
+        with self.cond:
+            self.open -= 1
+            self.cond.notify()
+        _close(conn)
+
+    def _prune(self):
+        # The most recently released connections are reused first, so stale ones collect on the left.
+        while self.idle and time.monotonic() - self.idle[0][1] >= self.max_idle:
+            _close(self.idle.popleft()[0])
+            self.open -= 1
+
+    def close_idle(self):
+        with self.cond:
+            while self.idle:
+                _close(self.idle.popleft()[0])
+                self.open -= 1
+
+    def retire(self):
+        """Close the idle connections now and the checked-out ones when they come back."""
+        self.retired = True
+        self.close_idle()
+
+    def stats(self):
+        with self.cond:
+            return {
+                'size': self.size,
+                'open': self.open,
+                'idle': len(self.idle),
+                'in_use': self.open - len(self.idle),
+                'created': self.created,
+                'reused': self.reused,
+                'waits': self.waits,
+                'wait_seconds': self.wait_seconds,
+                'timeouts': self.timeouts,
+            }
+
+
+def _close(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+pools = {}
+_pools_lock = threading.Lock()
+
+
+def pool_for(alias, settings_dict):
+    """
+    The pool of ``alias``, sized from DATABASES[alias]['POOL'] on first use.
+
+    When the alias now points at another database (create_test_db changes
+    NAME, for one), its pool is retired and a new one started, so no
+    connection to the old database is handed out again.
+    """
+    target = tuple(settings_dict.get(key) for key in ('NAME', 'HOST', 'PORT', 'USER'))
+    with _pools_lock:
+        pool = pools.get(alias)
+        if pool is None or pool.target != target:
+            if pool is not None:
+                pool.retire()
+            options = settings_dict.get('POOL') or {}
+            pool = pools[alias] = ConnectionPool(
+                options.get('SIZE', 10), options.get('TIMEOUT', 30), options.get('MAX_IDLE', 300), target,
+            )
+        return pool
+
+
+def pool_stats():
+    """{alias: ConnectionPool.stats()} for the pools opened in this process."""
+    with _pools_lock:
+        current = list(pools.items())
+    return {alias: pool.stats() for alias, pool in current}
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    Check DB-API connections out of the alias's pool and hand them back on close.
+
+    With CONN_HEALTH_CHECKS, an idle connection is checked before reuse.
+    Connections closed inside a transaction or after a database error are
+    discarded instead of returned. A connection goes back to the pool it came
+    from, even if the alias has moved on to another database since.
+    """
+
+    def get_new_connection(self, conn_params):
+        connect = super().get_new_connection
+        usable = self._usable if self.settings_dict['CONN_HEALTH_CHECKS'] else None
+        self.pool = pool_for(self.alias, self.settings_dict)
+        return self.pool.acquire(lambda: connect(conn_params), usable)
+
+    def _usable(self, conn):
+        try:
+            cursor = conn.cursor()
+            cursor.execute('SELECT 1')
+            cursor.close()
+        except Exception:
+            return False
+        return True
+
+    def _close(self):
+        if self.connection is None:
+            return
+        conn = self.connection
+        if self.in_atomic_block or self.errors_occurred:
+            self.pool.discard(conn)
+            return
+        if not self.autocommit:
+            try:
+                conn.rollback()
+            except Exception:
+                self.pool.discard(conn)
+                return
+        self.pool.release(conn)
@@ -0,0 +1,12 @@
+from django.db.backends.mysql import base
+
+from .. import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    def _usable(self, conn):
+        try:
+            conn.ping()
+        except Exception:
+            return False
+        return True
@@ -1,36 +1,87 @@
 from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
 from django.http import JsonResponse
-from .models import Employee
+from .authz import aauthorization_context, arefresh_session, authorization_context, refresh_session
 
 
 def hr_required(view_func):
     """
     Decorator to check if the logged-in employee belongs to the HR department.
-    
+
     Checks:
     1. Employee ID exists in session
-    2. Employee belongs to HR department
-    
+    2. Employee is still active (deleted or terminated employees are logged out)
+    3. Employee belongs to HR department
+
+    Status and department come from core.authz, not from the login-time
+    session values, so they follow transfers and terminations; the session
+    snapshot is refreshed when the employee's authz_version changed.
+    Works on sync and async views alike.
+
     Returns:
     - 404 if employee not found in session
-    - 403 if employee is not from HR department
+    - 403 if employee is no longer active or not from HR department
     - Proceeds with view execution if all checks pass
     """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            employee_id = await request.session.aget('employee_id')
+            if not employee_id:
+                return _missing()
+
+            context = await aauthorization_context(employee_id)
+            if _inactive(context):
+                await request.session.aflush()
+                return _invalid()
+            await arefresh_session(request.session, context)
+
+            if not context.department == 'HR':
+                return _not_hr()
+
+            return await view_func(request, *args, **kwargs)
+
+        return async_wrapper
+
     @wraps(view_func)
     def wrapper(request, *args, **kwargs):
         employee_id = request.session.get('employee_id')
-        
+
         if not employee_id:
-            return JsonResponse({
-                'message': 'Employee not found in session'
-            }, status=404)
-        
-        if not request.session['department'] == 'HR':
-            return JsonResponse({
-                'message': 'Access denied. Only HR Employees can view employee list.'
-            }, status=403)
-        
+            return _missing()
+
+        context = authorization_context(employee_id)
+        if _inactive(context):
+            request.session.flush()
+            return _invalid()
+        refresh_session(request.session, context)
+
+        if not context.department == 'HR':
+            return _not_hr()
+
         return view_func(request, *args, **kwargs)
-    
+
     return wrapper
 
+
+def _inactive(context):
+    return context is None or context.status != 'active'
+
+
+def _missing():
+    return JsonResponse({
+        'message': 'Employee not found in session'
+    }, status=404)
+
+
+def _invalid():
+    return JsonResponse({
+        'message': 'Session is no longer valid'
+    }, status=403)
+
+
+def _not_hr():
+    return JsonResponse({
+        'message': 'Access denied. Only HR Employees can view employee list.'
+    }, status=403)
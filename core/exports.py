@@ -0,0 +1,191 @@
+import csv
+import json
+from datetime import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+from .models import Attendance, Complaint, EmployeeInsurance, LeaveApplication, Payroll
+
+CHUNK_SIZE = 2000
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+EXPORTS = {
+    'attendance': {
+        'model': Attendance,
+        'date_field': 'attendance_date',
+        'fields': {
+            'id': 'id',
+            'employee_id': 'employee_id',
+            'employee_name': 'employee__full_name',
+            'department': 'employee__department__department_name',
+            'date': 'attendance_date',
+            'check_in_time': 'check_in_time',
+            'check_out_time': 'check_out_time',
+            'status': 'status',
+        },
+    },
+    'payroll': {
+        'model': Payroll,
+        'date_field': None,  # filtered on (year, month)
+        'fields': {
+            'id': 'id',
+            'employee_id': 'employee_id',
+            'employee_name': 'employee__full_name',
+            'department': 'employee__department__department_name',
+            'month': 'month',
+            'year': 'year',
+            'bonuses': 'bonuses',
+            'deductions': 'deductions',
+            'net_salary': 'net_salary',
+            'status': 'status',
+            'payment_date': 'payment_date',
+        },
+    },
+    'leaves': {
+        'model': LeaveApplication,
+        'date_field': 'start_date',
+        'fields': {
+            'id': 'id',
+            'employee_id': 'employee_id',
+            'employee_name': 'employee__full_name',
+            'department': 'employee__department__department_name',
+            'leave_type_name': 'leave_type__leave_type_name',
+            'start_date': 'start_date',
+            'end_date': 'end_date',
+            'total_days': 'total_days',
+            'status': 'status',
+            'applied_date': 'applied_date',
+        },
+    },
+    'complaints': {
+        'model': Complaint,
+        'date_field': 'filed_date',
+        'fields': {
+            'id': 'id',
+            'employee_id': 'employee_id',
+            'employee_name': 'employee__full_name',
+            'department': 'employee__department__department_name',
+            'title': 'subject',
+            'status': 'status',
+            'filed_date': 'filed_date',
+            'resolved_date': 'resolved_date',
+        },
+    },
+    'insurances': {
+        'model': EmployeeInsurance,
+        'date_field': 'start_date',
+        'fields': {
+            'id': 'id',
+            'employee_id': 'employee_id',
+            'employee_name': 'employee__full_name',
+            'department': 'employee__department__department_name',
+            'insurance_name': 'insurance_plan__plan_name',
+            'start_date': 'start_date',
+            'end_date': 'end_date',
+            'status': 'status',
+            'monthly_deduction': 'monthly_deduction',
+        },
+    },
+}
+
+
+class ExportError(ValueError):
+    pass
+
+
+def _parse_date(value, name):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise ExportError(f"Invalid {name} date format. Use YYYY-MM-DD")
+
+
+def export_queryset(dataset, params):
+    """Filtered queryset for ``dataset`` from the request's from/to/department parameters."""
+    spec = EXPORTS.get(dataset)
+    if spec is None:
+        raise ExportError(f"Unknown dataset. Available datasets are {list(EXPORTS)}")
+
+    queryset = spec['model'].objects.all()
+    date_from = params.get('from')
+    date_to = params.get('to')
+    if date_from:
+        date_from = _parse_date(date_from, 'from')
+        if spec['date_field']:
+            queryset = queryset.filter(**{f"{spec['date_field']}__gte": date_from})
+        else:
+            queryset = queryset.filter(
+                Q(year__gt=date_from.year) | Q(year=date_from.year, month__gte=date_from.month)
+            )
+    if date_to:
+        date_to = _parse_date(date_to, 'to')
+        if spec['date_field']:
+            queryset = queryset.filter(**{f"{spec['date_field']}__lte": date_to})
+        else:
+            queryset = queryset.filter(
+                Q(year__lt=date_to.year) | Q(year=date_to.year, month__lte=date_to.month)
+            )
+
+    department = params.get('department')
+    if department:
+        queryset = queryset.filter(employee__department__department_name=department)
+    department_id = params.get('department_id')
+    if department_id:
+        queryset = queryset.filter(employee__department_id=department_id)
+    return queryset
+
+
+def iter_rows(queryset, fields, chunk_size=CHUNK_SIZE):
+    """
+    Yield row tuples in primary-key order, ``chunk_size`` rows per query.
+
+    Batches are located with ``id > last_id`` rather than a single cursor
+    because mysqlclient buffers a whole result set client side; this keeps the
+    memory of one export bounded by the chunk size on every backend.
+    """
+    paths = ['id'] + list(fields.values())
+    last_id = None
+    while True:
+        batch = queryset.order_by('id')
+        if last_id is not None:
+            batch = batch.filter(id__gt=last_id)
+        rows = list(batch.values_list(*paths)[:chunk_size])
+        if not rows:
+            return
+        for row in rows:
+            yield row[1:]
+        last_id = rows[-1][0]
+        if len(rows) < chunk_size:
+            return
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def stream_ndjson(keys, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(keys, row)), cls=DjangoJSONEncoder) + "\n"
+
+
+def stream_csv(keys, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(keys)
+    for row in rows:
+        yield writer.writerow(['' if value is None else value for value in row])
+
+
+def stream_export(dataset, params, export_format):
+    """(content type, line generator) for one export request."""
+    if export_format not in FORMATS:
+        raise ExportError(f"Unknown format. Available formats are {list(FORMATS)}")
+    queryset = export_queryset(dataset, params)
+    fields = EXPORTS[dataset]['fields']
+    rows = iter_rows(queryset, fields)
+    stream = stream_ndjson if export_format == 'ndjson' else stream_csv
+    return FORMATS[export_format], stream(list(fields), rows)
@@ -0,0 +1,73 @@
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import timedelta
+
+from .models import LeaveApplication
+
+ONE_DAY = timedelta(days=1)
+COVERAGE_MAX_EMPLOYEES = 1000
+
+
+class IntervalIndex:
+    """
+    Inclusive date ranges per key, merged on load into sorted non-overlapping
+    runs so point and overlap queries are a bisect instead of a database query.
+    """
+
+    def __init__(self, ranges=()):
+        by_key = defaultdict(list)
+        for key, start, end in ranges:
+            by_key[key].append((start, end))
+        self._starts, self._ends = {}, {}
+        for key, spans in by_key.items():
+            merged = []
+            for start, end in sorted(spans):
+                # Days are discrete: a range starting the day after the previous one ends extends it.
+                if merged and start <= merged[-1][1] + ONE_DAY:
+                    merged[-1][1] = max(merged[-1][1], end)
+                else:
+                    merged.append([start, end])
+            self._starts[key] = [start for start, _ in merged]
+            self._ends[key] = [end for _, end in merged]
+
+    def ranges(self, key):
+        return list(zip(self._starts.get(key, []), self._ends.get(key, [])))
+
+    def covers(self, key, day):
+        """True when ``day`` falls inside one of ``key``'s ranges."""
+        starts = self._starts.get(key)
+        if not starts:
+            return False
+        i = bisect_right(starts, day) - 1
+        return i >= 0 and self._ends[key][i] >= day
+
+    def overlaps(self, key, start, end):
+        """True when any of ``key``'s ranges shares a day with [start, end]."""
+        starts = self._starts.get(key)
+        if not starts:
+            return False
+        i = bisect_right(starts, end) - 1
+        return i >= 0 and self._ends[key][i] >= start
+
+    def covered(self, key, start, end):
+        """``key``'s ranges clipped to [start, end]."""
+        starts, ends = self._starts.get(key, []), self._ends.get(key, [])
+        spans = []
+        i = bisect_left(ends, start)
+        while i < len(starts) and starts[i] <= end:
+            spans.append((max(starts[i], start), min(ends[i], end)))
+            i += 1
+        return spans
+
+    def covered_days(self, key, start, end):
+        return sum((last - first).days + 1 for first, last in self.covered(key, start, end))
+
+
+def leave_index(employee_ids, start, end, statuses=('approved',), paid=None):
+    """IntervalIndex of the employees' leaves overlapping [start, end], in one query."""
+    leaves = LeaveApplication.objects.filter(
+        employee_id__in=employee_ids, status__in=statuses, start_date__lte=end, end_date__gte=start,
+    )
+    if paid is not None:
+        leaves = leaves.filter(leave_type__is_paid=paid)
+    return IntervalIndex(leaves.order_by().values_list('employee_id', 'start_date', 'end_date'))
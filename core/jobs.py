@@ -0,0 +1,208 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import BackgroundJob, Employee
+from .monthly_stats import ensure_monthly_stats
+from .reports import employee_reports_folder, generate_company_report, generate_employee_report
+from .workers import init_django_worker
+
+CHUNK_SIZE = 50
+ACTIVE_STATUSES = ['queued', 'running']
+
+logger = logging.getLogger('core.jobs')
+
+
+def enqueue_report_job(report_type, month, year):
+    """
+    Queue a report job, reusing an identical queued/running job if there is one.
+
+    A running job whose worker died is failed first (see fail_expired_jobs),
+    so it does not block the report forever. Returns (job, created).
+    """
+    kind = 'employee_reports' if report_type == 'employee' else 'company_report'
+    params = {'month': month, 'year': year}
+    with transaction.atomic():
+        fail_expired_jobs()
+        for job in BackgroundJob.objects.select_for_update().filter(kind=kind, status__in=ACTIVE_STATUSES):
+            if job.params == params:
+                return job, False
+        return BackgroundJob.objects.create(kind=kind, params=params), True
+
+
+def cancel_job(job):
+    """Cancel a queued job right away, or ask the worker to stop a running one."""
+    if job.status == 'queued':
+        updated = BackgroundJob.objects.filter(id=job.id, status='queued').update(
+            status='cancelled', cancel_requested=True, finished_at=timezone.now()
+        )
+        if updated:
+            job.refresh_from_db()
+            return True
+    if job.status == 'running':
+        BackgroundJob.objects.filter(id=job.id).update(cancel_requested=True)
+        job.refresh_from_db()
+        return True
+    return False
+
+
+def fail_expired_jobs():
+    """
+    Fail running jobs whose worker sent no heartbeat for REPORT_JOB_LEASE seconds.
+
+    Workers refresh heartbeat_at after every chunk, so the lease must be
+    longer than one chunk or one company report takes. Call inside a transaction.
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=getattr(settings, 'REPORT_JOB_LEASE', 300))
+    expired = BackgroundJob.objects.select_for_update(skip_locked=True).filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff), status='running',
+    )
+    for job in expired:
+        job.status = 'failed'
+        job.errors.append({'error': 'Worker stopped sending heartbeats; the job was abandoned.'})
+        job.finished_at = now
+        job.save(update_fields=['status', 'errors', 'finished_at'])
+
+
+def claim_next_job():
+    """Atomically move the oldest queued job to running; None if the queue is empty."""
+    with transaction.atomic():
+        fail_expired_jobs()
+        job = (
+            BackgroundJob.objects.select_for_update(skip_locked=True)
+            .filter(status='queued')
+            .order_by('created_at', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = 'running'
+        job.started_at = job.heartbeat_at = timezone.now()
+        job.save(update_fields=['status', 'started_at', 'heartbeat_at'])
+        return job
+
+
+def _employee_report_chunk(employee_ids, month, year):
+    base_folder = employee_reports_folder()
+    created = 0
+    errors = []
+    for emp in Employee.objects.filter(id__in=employee_ids):
+        try:
+            generate_employee_report(emp, month, year, base_folder)
+            created += 1
+        except Exception as e:
+            errors.append({'employee_id': emp.id, 'error': str(e)})
+    return len(employee_ids), created, errors
+
+
+def _cancel_requested(job):
+    return BackgroundJob.objects.filter(id=job.id, cancel_requested=True).exists()
+
+
+def _run_employee_reports(job, workers):
+    month, year = job.params['month'], job.params['year']
+    ensure_monthly_stats(month, year)
+    employee_ids = list(
+        Employee.objects.filter(employment_status='active').order_by('id').values_list('id', flat=True)
+    )
+    chunks = [employee_ids[i:i + CHUNK_SIZE] for i in range(0, len(employee_ids), CHUNK_SIZE)]
+
+    BackgroundJob.objects.filter(id=job.id).update(total=len(employee_ids))
+    job.total = len(employee_ids)
+    created = 0
+
+    def record(chunk_result):
+        """Save the chunk's progress; False once the job expired (see fail_expired_jobs)."""
+        nonlocal created
+        processed, chunk_created, chunk_errors = chunk_result
+        created += chunk_created
+        job.done += processed
+        job.errors.extend(chunk_errors)
+        job.heartbeat_at = timezone.now()
+        return BackgroundJob.objects.filter(id=job.id, status='running').update(
+            done=job.done, errors=job.errors, heartbeat_at=job.heartbeat_at
+        ) > 0
+
+    if workers <= 0:
+        for chunk in chunks:
+            if _cancel_requested(job):
+                return 'cancelled', {'created': created}
+            if not record(_employee_report_chunk(chunk, month, year)):
+                return 'failed', {'created': created}
+        return 'completed', {'created': created}
+
+    # Forked children must not share the parent's database connection.
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_django_worker) as pool:
+        futures = [pool.submit(_employee_report_chunk, chunk, month, year) for chunk in chunks]
+        for future in as_completed(futures):
+            running = record(future.result())
+            if not running or _cancel_requested(job):
+                for pending in futures:
+                    pending.cancel()
+                return 'cancelled' if running else 'failed', {'created': created}
+    return 'completed', {'created': created}
+
+
+def _run_company_report(job):
+    BackgroundJob.objects.filter(id=job.id).update(total=1)
+    result = generate_company_report(job.params['month'], job.params['year'])
+    job.total = job.done = 1
+    return 'completed', {'status': result['status'], 'file_path': result['file_path']}
+
+
+def run_job(job, workers=0):
+    """
+    Execute a claimed job and record its outcome.
+
+    The outcome is only written while the job is still running: a job that
+    fail_expired_jobs gave up on stays failed, and is returned as stored.
+    """
+    try:
+        if job.kind == 'employee_reports':
+            final_status, result = _run_employee_reports(job, workers)
+        else:
+            final_status, result = _run_company_report(job)
+    except Exception as e:
+        final_status, result = 'failed', None
+        job.errors.append({'error': str(e)})
+
+    job.status = final_status
+    job.result = result
+    job.finished_at = timezone.now()
+    updated = BackgroundJob.objects.filter(id=job.id, status='running').update(
+        status=job.status, result=job.result, done=job.done, total=job.total, errors=job.errors,
+        finished_at=job.finished_at,
+    )
+    if not updated:
+        logger.warning("Job %s expired before it finished; its %s outcome was dropped", job.id, final_status)
+        job.refresh_from_db()
+    return job
+
+
+def job_progress(job):
+    eta_seconds = None
+    if job.status == 'running' and job.started_at and job.done:
+        elapsed = (timezone.now() - job.started_at).total_seconds()
+        eta_seconds = round(elapsed / job.done * (job.total - job.done), 1)
+    return {
+        'job_id': job.id,
+        'kind': job.kind,
+        'params': job.params,
+        'status': job.status,
+        'cancel_requested': job.cancel_requested,
+        'done': job.done,
+        'total': job.total,
+        'errors': job.errors,
+        'eta_seconds': eta_seconds,
+        'result': job.result,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at,
+    }
@@ -0,0 +1,126 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+
+class LoginBusy(RuntimeError):
+    pass
+
+
+class LoginThrottle:
+    """
+    Per-process failed-login counters, keyed by ('email', address) and ('ip', address).
+
+    A key with ``limit`` failures inside ``window`` seconds is refused until
+    the window runs out, before any password is hashed. At most ``size`` keys
+    are kept; the least recently failed ones are forgotten first.
+    """
+
+    def __init__(self, size=10000):
+        self.lock = threading.Lock()
+        self.size = size
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.failures = OrderedDict()
+
+    def _window(self):
+        return getattr(settings, 'LOGIN_FAILURE_WINDOW', 300)
+
+    def retry_after(self, key, limit):
+        """Seconds until ``key`` may try again, or 0 if it is not blocked."""
+        with self.lock:
+            entry = self.failures.get(key)
+            if entry is None:
+                return 0
+            count, started = entry
+            remaining = started + self._window() - time.monotonic()
+            if remaining <= 0:
+                del self.failures[key]
+                return 0
+            return int(remaining) + 1 if count >= limit else 0
+
+    def fail(self, key):
+        now = time.monotonic()
+        with self.lock:
+            count, started = self.failures.pop(key, (0, now))
+            if started + self._window() <= now:
+                count, started = 0, now
+            self.failures[key] = (count + 1, started)
+            while len(self.failures) > self.size:
+                self.failures.popitem(last=False)
+
+    def reset(self, key):
+        with self.lock:
+            self.failures.pop(key, None)
+
+
+login_throttle = LoginThrottle()
+
+
+def throttle_keys(email, ip):
+    """[(key, limit)] checked for one login attempt."""
+    return [
+        (('email', email.strip().lower()), getattr(settings, 'LOGIN_MAX_FAILURES', 5)),
+        (('ip', ip), getattr(settings, 'LOGIN_MAX_FAILURES_PER_IP', 50)),
+    ]
+
+
+def client_ip(request):
+    """REMOTE_ADDR; behind a proxy, set it from X-Forwarded-For in the proxy or a middleware first."""
+    return request.META.get('REMOTE_ADDR', '')
+
+
+class HashingPool:
+    """
+    Password hashing on at most LOGIN_HASH_WORKERS threads.
+
+    PBKDF2 releases the GIL, so the pool bounds how many cores a login storm
+    can take. Up to LOGIN_HASH_QUEUE further calls wait for a thread; beyond
+    that LoginBusy is raised at once instead of queueing without limit.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.executor = None
+        self.slots = None
+
+    def _start(self):
+        with self.lock:
+            if self.executor is None:
+                workers = getattr(settings, 'LOGIN_HASH_WORKERS', 4)
+                self.slots = threading.BoundedSemaphore(workers + getattr(settings, 'LOGIN_HASH_QUEUE', 64))
+                self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+
+    def run(self, func, *args):
+        self._start()
+        if not self.slots.acquire(blocking=False):
+            raise LoginBusy("Too many logins in progress, try again shortly")
+        try:
+            return self.executor.submit(func, *args).result()
+        finally:
+            self.slots.release()
+
+
+hashing_pool = HashingPool()
+
+
+def _verify(password, encoded):
+    upgraded = []
+    # check_password calls the setter when the hash uses an outdated hasher or iteration count.
+    valid = check_password(password, encoded, setter=lambda raw: upgraded.append(make_password(raw)))
+    return valid, upgraded[0] if upgraded else None
+
+
+def verify_password(password, encoded):
+    """(valid, new_hash); new_hash is the password rehashed with the current hasher settings, or None."""
+    return hashing_pool.run(_verify, password, encoded)
+
+
+def hash_password(password):
+    return hashing_pool.run(make_password, password)
@@ -0,0 +1,168 @@
+import os
+import socket
+import time
+import traceback
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from .models import Complaint, EmployeeInsurance, MaintenanceTask, Payroll
+from .payroll import recompute_dirty_payrolls
+from .periods import in_month
+from .punches import rollup_attendance
+from .signals import refresh_dashboard_on_commit
+
+
+def make_active_inactive():
+    """Deactivate expired insurances and insurances of employees who left."""
+    expired = EmployeeInsurance.objects.filter(
+        end_date__lt=date.today(),
+        status='active').update(status='inactive')
+    orphaned = EmployeeInsurance.objects.exclude(
+        employee__employment_status='active'
+    ).filter(status='active').update(status='inactive')
+    return {'expired': expired, 'orphaned': orphaned}
+
+
+def pay_payrolls():
+    """
+    Settle pending payrolls older than three days with set-based UPDATEs, per payroll period.
+
+    Payrolls without an open "Incorrect Payroll" complaint for their month are
+    marked paid; for the rest the latest such complaint is resolved, so the
+    payroll is paid once each of them has been.
+    """
+    today = timezone.now().date()
+    cutoff = timezone.make_aware(datetime.combine(today - timedelta(days=3), datetime.min.time()))
+    due = Payroll.objects.filter(
+        status='pending',
+        created_at__lt=cutoff,
+        employee__employment_status="active"
+    )
+    paid = resolved = 0
+    with transaction.atomic():
+        # One pass per (month, year) so complaints are matched on a filed_date range, not EXTRACT().
+        for month, year in due.order_by().values_list('month', 'year').distinct():
+            period_due = due.filter(month=month, year=year)
+            open_complaints = Complaint.objects.filter(
+                in_month('filed_date', month, year),
+                subject__iexact="Incorrect Payroll",
+                status='open'
+            )
+            paid += period_due.filter(
+                ~Exists(open_complaints.filter(employee=OuterRef('employee')))
+            ).update(status='paid', payment_date=today)
+            # One complaint per payroll, the latest filed, as each run has always resolved.
+            latest = open_complaints.filter(employee=OuterRef('employee')).order_by('-filed_date', '-id').values('id')[:1]
+            ids = list(open_complaints.filter(
+                Exists(period_due.filter(employee=OuterRef('employee'))), id=Subquery(latest)
+            ).values_list('id', flat=True))
+            # Selected first: MySQL cannot UPDATE a table that a subquery of the statement reads.
+            resolved += Complaint.objects.filter(id__in=ids).update(status='resolved', resolved_date=today)
+        if resolved:
+            refresh_dashboard_on_commit('complaints')
+    return {'paid': paid, 'complaints_resolved': resolved}
+
+
+def recompute_payrolls():
+    """Refresh pending payrolls whose attendance, leave, insurance or salary inputs changed."""
+    diff = recompute_dirty_payrolls()
+    return {'changed': len(diff)}
+
+
+TASKS = {
+    'make_active_inactive': make_active_inactive,
+    'pay_payrolls': pay_payrolls,
+    'rollup_attendance': rollup_attendance,
+    'recompute_payrolls': recompute_payrolls,
+}
+
+DEFAULT_INTERVALS = {
+    'make_active_inactive': 3600,
+    'pay_payrolls': 3600,
+    'rollup_attendance': 60,
+    'recompute_payrolls': 300,
+}
+
+
+def task_intervals():
+    intervals = dict(DEFAULT_INTERVALS)
+    intervals.update(getattr(settings, 'MAINTENANCE_INTERVALS', {}))
+    return intervals
+
+
+def default_owner():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def acquire_task(name, owner, force=False):
+    """
+    Take the lock of a task if it is due (or ``force``) and nobody else holds it.
+
+    A single conditional UPDATE does the check and the claim, so only one node
+    wins even when several schedulers tick at the same moment.
+    """
+    now = timezone.now()
+    lock_ttl = timedelta(seconds=getattr(settings, 'MAINTENANCE_LOCK_TTL', 600))
+    MaintenanceTask.objects.get_or_create(name=name)
+
+    candidates = MaintenanceTask.objects.filter(name=name).filter(
+        Q(locked_until__isnull=True) | Q(locked_until__lt=now)
+    )
+    if not force:
+        interval = timedelta(seconds=task_intervals()[name])
+        candidates = candidates.filter(Q(last_started_at__isnull=True) | Q(last_started_at__lte=now - interval))
+    return candidates.update(locked_by=owner, locked_until=now + lock_ttl, last_started_at=now) == 1
+
+
+def run_task(name, owner=None, force=False):
+    """Run one task under its lock. Returns the task row, or None if it was skipped."""
+    owner = owner or default_owner()
+    if not acquire_task(name, owner, force=force):
+        return None
+
+    started = time.monotonic()
+    values = {}
+    try:
+        values['last_result'] = TASKS[name]()
+        values['last_status'] = 'ok'
+        values['last_error'] = None
+    except Exception:
+        values['last_status'] = 'failed'
+        values['last_error'] = traceback.format_exc()
+        values['failure_count'] = F('failure_count') + 1
+
+    MaintenanceTask.objects.filter(name=name, locked_by=owner).update(
+        locked_by=None,
+        locked_until=None,
+        last_finished_at=timezone.now(),
+        last_duration_ms=int((time.monotonic() - started) * 1000),
+        run_count=F('run_count') + 1,
+        **values
+    )
+    return MaintenanceTask.objects.get(name=name)
+
+
+def run_due_tasks(names=None, owner=None, force=False):
+    owner = owner or default_owner()
+    return {name: run_task(name, owner, force=force) for name in (names or TASKS)}
+
+
+def serialize_task(task):
+    return {
+        'name': task.name,
+        'interval_seconds': task_intervals().get(task.name),
+        'locked_by': task.locked_by,
+        'locked_until': task.locked_until,
+        'last_started_at': task.last_started_at,
+        'last_finished_at': task.last_finished_at,
+        'last_status': task.last_status,
+        'last_error': task.last_error,
+        'last_duration_ms': task.last_duration_ms,
+        'last_result': task.last_result,
+        'run_count': task.run_count,
+        'failure_count': task.failure_count,
+    }
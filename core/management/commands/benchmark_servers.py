@@ -0,0 +1,134 @@
+import importlib.util
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from importlib import import_module
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from core.benchmarks import load_test, process_tree_rss, report
+from core.models import Employee
+from core.synthetic import seed_synthetic
+
+# endpoint -> (sync URL served by gunicorn, async URL served by uvicorn)
+ENDPOINTS = {
+    'dashboard': ('/api/dashboard/', '/api/async/dashboard/'),
+    'employees': ('/api/employees/all/?limit=100', '/api/async/employees/all/?limit=100'),
+    'attendance': ('/api/attendance/view/?limit=100', '/api/async/attendance/view/?limit=100'),
+    'leaves': ('/api/leaves/employees/?limit=100', '/api/async/leaves/employees/?limit=100'),
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(url, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError(f"Server exited with code {process.returncode}")
+        try:
+            with urlopen(url, timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f"Server did not answer {url} within {timeout}s")
+
+
+class Command(BaseCommand):
+    help = ('Compare sync gunicorn workers on the sync views against async uvicorn workers on the /api/async/ '
+            'views, on a seeded throwaway test database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=1000, help='Employees in the synthetic dataset.')
+        parser.add_argument('--months', type=int, default=1, help='Months of history in the dataset.')
+        parser.add_argument('--endpoint', action='append', dest='endpoints', choices=list(ENDPOINTS),
+                            help='Endpoint to load (default: all).')
+        parser.add_argument('--workers', type=int, default=2,
+                            help='Worker processes of each server, so both get about the same memory.')
+        parser.add_argument('--requests', type=int, default=1000, help='Requests per endpoint and server.')
+        parser.add_argument('--concurrency', type=int, default=32, help='Concurrent client connections.')
+        parser.add_argument('--output', default='server_benchmarks.json', help='Where to write the JSON results.')
+
+    def servers(self, workers, port):
+        return {
+            'gunicorn': (0, [
+                sys.executable, '-m', 'gunicorn', 'hrms.wsgi:application', '--workers', str(workers),
+                '--bind', f'127.0.0.1:{port}', '--log-level', 'warning',
+            ]),
+            'uvicorn': (1, [
+                sys.executable, '-m', 'uvicorn', 'hrms.asgi:application', '--workers', str(workers),
+                '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning', '--no-access-log',
+            ]),
+        }
+
+    def handle(self, *args, **options):
+        missing = [name for name in ('gunicorn', 'uvicorn') if importlib.util.find_spec(name) is None]
+        if missing:
+            raise CommandError(f"Install {' and '.join(missing)} first: pip install gunicorn uvicorn")
+        if settings.SESSION_ENGINE == 'django.contrib.sessions.backends.cache' and \
+                settings.CACHES['default']['BACKEND'].endswith('LocMemCache'):
+            raise CommandError('Cache sessions over the local-memory cache are not visible to the server processes.')
+
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        test_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+                raise CommandError("Set DATABASES['default']['TEST']['NAME'] to a file so the servers can open it.")
+            results = self.run(test_name, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            json.dump(report(results), f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(results)} results to {options['output']}"))
+
+    def run(self, test_name, options):
+        counts = seed_synthetic(options['size'], options['months'])
+        self.stdout.write(f"seeded {options['size']} employees: {counts}")
+        hr = Employee.objects.filter(department__department_name='HR', employment_status='active').first()
+        session = import_module(settings.SESSION_ENGINE).SessionStore()
+        session.update({'employee_id': hr.id, 'department': 'HR', 'authz_version': hr.authz_version})
+        session.save()
+        headers = {'Cookie': f"{settings.SESSION_COOKIE_NAME}={session.session_key}"}
+
+        # The servers load the same settings module; DB_NAME points them at the test database.
+        env = {**os.environ, 'DB_NAME': test_name}
+        endpoints = options['endpoints'] or list(ENDPOINTS)
+        port = free_port()
+        results = []
+        for server, (index, command) in self.servers(options['workers'], port).items():
+            process = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env, start_new_session=True)
+            try:
+                wait_until_up(f'http://127.0.0.1:{port}/api/health/', process)
+                for endpoint in endpoints:
+                    url = f'http://127.0.0.1:{port}{ENDPOINTS[endpoint][index]}'
+                    load_test(url, headers, options['concurrency'], options['concurrency'])  # warm up
+                    result = load_test(url, headers, options['requests'], options['concurrency'])
+                    result.update({
+                        'server': server, 'endpoint': endpoint, 'employees': options['size'],
+                        'workers': options['workers'], 'concurrency': options['concurrency'],
+                        'rss_mb': round(process_tree_rss(process.pid) / 2 ** 20, 1),
+                    })
+                    results.append(result)
+                    self.stdout.write(
+                        f"{server} {endpoint}: {result['requests_per_second']} req/s, "
+                        f"p99 {result['latency_p99']:.4f}s, {result['errors']} errors, {result['rss_mb']} MB"
+                    )
+            finally:
+                os.killpg(process.pid, signal.SIGTERM)
+                process.wait(timeout=30)
+        return results
@@ -0,0 +1,42 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.attendance import BATCH_SIZE, ingest_attendance, parse_csv, parse_ndjson
+from core.punches import ingest_punches
+
+
+class Command(BaseCommand):
+    help = 'Import attendance punches from NDJSON or CSV files (use - for stdin).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='Files to import.')
+        parser.add_argument('--format', choices=['ndjson', 'csv'],
+                            help='Input format (default: from the file extension, ndjson for stdin).')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Rows per upsert.')
+        parser.add_argument('--punches', action='store_true',
+                            help='Rows are raw punch events (employee_id, punched_at) for the rollup.')
+
+    def handle(self, *args, **options):
+        failed = False
+        for path in options['paths']:
+            input_format = options['format'] or ('csv' if path.lower().endswith('.csv') else 'ndjson')
+            parse = parse_csv if input_format == 'csv' else parse_ndjson
+            try:
+                stream = sys.stdin if path == '-' else open(path, encoding='utf-8', newline='')
+            except OSError as e:
+                raise CommandError(str(e))
+            ingest = ingest_punches if options['punches'] else ingest_attendance
+            with stream:
+                result = ingest(parse(stream), batch_size=options['batch_size'])
+
+            self.stdout.write(
+                f"{path}: {result['rows']} rows, {result['accepted']} accepted, "
+                f"{result.get('written', result['accepted'])} written, {len(result['errors'])} errors"
+            )
+            for error in result['errors']:
+                self.stderr.write(json.dumps(error))
+            failed = failed or bool(result['errors'])
+        if failed:
+            raise CommandError('Some rows were rejected.')
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.stats import rebuild_dashboard_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the materialized dashboard counters from scratch.'
+
+    def handle(self, *args, **options):
+        stats = rebuild_dashboard_stats()
+        self.stdout.write(self.style.SUCCESS(f"Dashboard counters rebuilt ({stats.total_active_employees} active employees)."))
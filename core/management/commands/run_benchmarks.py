@@ -0,0 +1,47 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from core.benchmarks import BENCHMARKS, DEFAULT_SIZES, report, run_suite
+
+
+class Command(BaseCommand):
+    help = 'Time and query-count the hot endpoints on synthetic datasets, in a throwaway test database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                            help='Comma-separated employee counts.')
+        parser.add_argument('--months', type=int, default=3, help='Months of history per dataset.')
+        parser.add_argument('--benchmark', action='append', dest='names',
+                            help=f"Only run this benchmark ({', '.join(BENCHMARKS)}).")
+        parser.add_argument('--repeat', type=int, default=3, help='Timed repetitions per benchmark.')
+        parser.add_argument('--output', default='benchmarks.json', help='Where to write the JSON results.')
+        parser.add_argument('--keepdb', action='store_true', help='Reuse the test database between invocations.')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        except ValueError:
+            raise CommandError('--sizes must be a comma-separated list of integers.')
+        for name in options['names'] or []:
+            if name not in BENCHMARKS:
+                raise CommandError(f"Unknown benchmark '{name}'. Available: {', '.join(BENCHMARKS)}")
+
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            results = run_suite(
+                sizes, months=options['months'], names=options['names'], repeat=options['repeat'],
+                log=self.stdout.write,
+            )
+            document = report(results)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(results)} results to {options['output']}"))
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.jobs import claim_next_job, run_job
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (month-end reports) using a local process pool.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Processes per job (0 runs in-process).')
+        parser.add_argument('--poll-interval', type=float, default=5.0, help='Seconds to sleep when the queue is empty.')
+        parser.add_argument('--once', action='store_true', help='Drain the queue and exit.')
+
+    def handle(self, *args, **options):
+        while True:
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+
+            self.stdout.write(f"Running {job}")
+            job = run_job(job, workers=options['workers'])
+            self.stdout.write(f"Finished {job}: {job.done}/{job.total}, {len(job.errors)} error(s)")
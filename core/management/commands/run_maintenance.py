@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.maintenance import TASKS, default_owner, run_due_tasks
+
+
+class Command(BaseCommand):
+    help = 'Run periodic maintenance tasks (insurance expiry, payroll settlement) on their configured intervals.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--task', action='append', dest='tasks', help=f"Only run this task ({', '.join(TASKS)}).")
+        parser.add_argument('--once', action='store_true', help='Run due tasks once and exit.')
+        parser.add_argument('--force', action='store_true', help='Ignore intervals (locks are still honoured).')
+        parser.add_argument('--tick', type=float, default=30.0, help='Seconds between schedule checks.')
+
+    def handle(self, *args, **options):
+        names = options['tasks']
+        for name in names or []:
+            if name not in TASKS:
+                raise CommandError(f"Unknown task '{name}'. Available: {', '.join(TASKS)}")
+
+        owner = default_owner()
+        while True:
+            for name, task in run_due_tasks(names, owner=owner, force=options['force']).items():
+                if task is not None:
+                    self.stdout.write(
+                        f"{name}: {task.last_status} in {task.last_duration_ms}ms {task.last_result or ''}"
+                    )
+            if options['once']:
+                return
+            time.sleep(options['tick'])
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.payroll import run_payroll
+from core.payroll_runs import PayrollRunBusy
+
+
+class Command(BaseCommand):
+    help = "Generate a month's payroll for every active employee using a local process pool."
+
+    def add_arguments(self, parser):
+        now = timezone.now()
+        parser.add_argument('--month', type=int, default=now.month)
+        parser.add_argument('--year', type=int, default=now.year)
+        parser.add_argument('--workers', type=int, default=4, help='Worker processes (0 computes in-process).')
+        parser.add_argument('--shard-by', choices=['department', 'range'], default='department',
+                            help='Split employees by department or by contiguous id ranges.')
+        parser.add_argument('--deterministic', action='store_true',
+                            help='Pin the decimal context and write rows in employee id order.')
+        parser.add_argument('--recompute', action='store_true', help='Also recompute payrolls that are still pending.')
+
+    def handle(self, *args, **options):
+        if not 1 <= options['month'] <= 12:
+            raise CommandError('--month must be between 1 and 12.')
+        started = time.monotonic()
+        try:
+            result = run_payroll(
+                options['month'], options['year'], workers=options['workers'], shard_by=options['shard_by'],
+                deterministic=options['deterministic'], recompute=options['recompute'],
+            )
+        except PayrollRunBusy as e:
+            raise CommandError(str(e))
+        self.stdout.write(
+            f"{result['written']} payroll(s) written for {result['employees']} employee(s) "
+            f"in {result['shards']} shard(s), {time.monotonic() - started:.1f}s"
+        )
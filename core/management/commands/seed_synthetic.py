@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.synthetic import seed_synthetic
+
+
+class Command(BaseCommand):
+    help = 'Bulk-create a synthetic HR dataset (employees, attendance, leaves, insurances, complaints, payrolls).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=1000, help='Number of employees to create.')
+        parser.add_argument('--months', type=int, default=3, help='Months of history up to the current month.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed gives the same data.')
+
+    def handle(self, *args, **options):
+        if options['employees'] < 1 or options['months'] < 1:
+            raise CommandError('--employees and --months must be positive.')
+        counts = seed_synthetic(options['employees'], options['months'], seed=options['seed'])
+        self.stdout.write(', '.join(f"{name}: {count}" for name, count in counts.items()))
@@ -0,0 +1,149 @@
+import threading
+from collections import defaultdict
+
+from .dbpool import pool_stats
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250)
+# (ConnectionPool.stats() key, metric, help) exported per pooled alias.
+POOL_COUNTERS = (
+    ('created', 'hrms_db_pool_connections_created_total', 'Connections the pool opened.'),
+    ('reused', 'hrms_db_pool_connections_reused_total', 'Checkouts served by an idle pooled connection.'),
+    ('waits', 'hrms_db_pool_waits_total', 'Checkouts that had to wait for a free connection.'),
+    ('wait_seconds', 'hrms_db_pool_wait_seconds_total', 'Time spent waiting for a free connection.'),
+    ('timeouts', 'hrms_db_pool_timeouts_total', 'Checkouts that gave up after the pool TIMEOUT.'),
+)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+
+class Registry:
+    """
+    Per-process request metrics keyed by URL name.
+
+    Every worker process keeps its own registry; Prometheus sums the scrapes
+    of each worker, so counters are only ever incremented here.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.requests = defaultdict(int)
+            self.latency = {}
+            self.queries = {}
+            self.db_queries = defaultdict(int)
+            self.db_seconds = defaultdict(float)
+            self.response_bytes = defaultdict(int)
+            self.slow_queries = defaultdict(int)
+            self.connections = defaultdict(int)
+
+    def record(self, endpoint, method, status, seconds, queries, db_seconds, response_bytes, slow_queries=0):
+        with self.lock:
+            self.requests[(endpoint, method, str(status))] += 1
+            self.latency.setdefault(endpoint, Histogram(LATENCY_BUCKETS)).observe(seconds)
+            self.queries.setdefault(endpoint, Histogram(QUERY_BUCKETS)).observe(queries)
+            self.db_queries[endpoint] += queries
+            self.db_seconds[endpoint] += db_seconds
+            self.response_bytes[endpoint] += response_bytes
+            if slow_queries:
+                self.slow_queries[endpoint] += slow_queries
+
+    def connection_opened(self, alias):
+        with self.lock:
+            self.connections[alias] += 1
+
+    def render(self):
+        """The registry in the Prometheus text exposition format."""
+        lines = []
+        with self.lock:
+            _counter(lines, 'hrms_http_requests_total', 'Requests handled per endpoint, method and status.', {
+                (('endpoint', e), ('method', m), ('status', s)): v for (e, m, s), v in self.requests.items()
+            })
+            _histogram(lines, 'hrms_http_request_duration_seconds', 'Request latency per endpoint.', self.latency)
+            _histogram(lines, 'hrms_db_queries_per_request', 'Database queries issued per request.', self.queries)
+            _counter(lines, 'hrms_db_queries_total', 'Database queries per endpoint.', _by_endpoint(self.db_queries))
+            _counter(lines, 'hrms_db_query_duration_seconds_total', 'Time spent in the database per endpoint.',
+                     _by_endpoint(self.db_seconds))
+            _counter(lines, 'hrms_http_response_bytes_total', 'Response body bytes per endpoint.',
+                     _by_endpoint(self.response_bytes))
+            _counter(lines, 'hrms_db_slow_queries_total', 'Queries slower than SLOW_QUERY_THRESHOLD_MS.',
+                     _by_endpoint(self.slow_queries))
+            _counter(lines, 'hrms_db_connections_opened_total',
+                     'Database connections set up per alias; with core.dbpool, every checkout from the pool.',
+                     {(('alias', alias),): value for alias, value in self.connections.items()})
+        pools = pool_stats()
+        if pools:
+            _gauge(lines, 'hrms_db_pool_connections', 'Pooled connections per alias and state.', {
+                (('alias', alias), ('state', state)): stats[state]
+                for alias, stats in pools.items() for state in ('open', 'idle', 'in_use')
+            })
+            for key, name, help_text in POOL_COUNTERS:
+                _counter(lines, name, help_text, {(('alias', alias),): stats[key] for alias, stats in pools.items()})
+        return "\n".join(lines) + "\n"
+
+
+def _by_endpoint(values):
+    return {(('endpoint', endpoint),): value for endpoint, value in values.items()}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(pairs):
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    if isinstance(value, float):
+        return repr(round(value, 6))
+    return str(value)
+
+
+def _counter(lines, name, help_text, values):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} counter")
+    for labels, value in sorted(values.items()):
+        lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+
+def _gauge(lines, name, help_text, values):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} gauge")
+    for labels, value in sorted(values.items()):
+        lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+
+def _histogram(lines, name, help_text, histograms):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for endpoint, hist in sorted(histograms.items()):
+        for bound, count in zip(hist.buckets, hist.counts):
+            lines.append(f"{name}_bucket{_labels([('endpoint', endpoint), ('le', bound)])} {count}")
+        lines.append(f"{name}_bucket{_labels([('endpoint', endpoint), ('le', '+Inf')])} {hist.count}")
+        lines.append(f"{name}_sum{_labels([('endpoint', endpoint)])} {_number(hist.sum)}")
+        lines.append(f"{name}_count{_labels([('endpoint', endpoint)])} {hist.count}")
+
+
+registry = Registry()
+
+
+def count_connection(sender, connection, **kwargs):
+    """``connection_created`` receiver."""
+    registry.connection_opened(connection.alias)
@@ -0,0 +1,124 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+
+from .metrics import registry
+
+slow_query_logger = logging.getLogger('core.slow_queries')
+
+
+class QueryObserver:
+    """``connection.execute_wrapper`` hook counting queries and DB time of one request."""
+
+    def __init__(self, endpoint=None):
+        self.endpoint = endpoint
+        self.queries = 0
+        self.seconds = 0.0
+        self.slow = 0
+        threshold = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', None)
+        self.threshold = threshold / 1000 if threshold is not None else None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.seconds += elapsed
+            if self.threshold is not None and elapsed >= self.threshold:
+                self.slow += 1
+                slow_query_logger.warning(
+                    "Slow query (%.1f ms) on %s: %s", elapsed * 1000, self.endpoint or '-', sql
+                )
+
+
+# Run through sync_to_async, so ``connection`` is the one of the thread the async ORM uses.
+def _install(observer):
+    connection.execute_wrappers.append(observer)
+
+
+def _uninstall(observer):
+    connection.execute_wrappers.remove(observer)
+
+
+class RequestMetricsMiddleware:
+    """
+    Record count, latency, DB queries/time and response size per URL name.
+
+    Streaming responses run their queries while the body is consumed, so for
+    those the observation is finished when the last chunk has been sent.
+
+    Works in sync and async chains. Under ASGI the async ORM runs every query
+    of a request on one thread-sensitive executor thread, so the observer is
+    installed on that thread's connection.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        observer = QueryObserver(request.path)
+        with connection.execute_wrapper(observer):
+            response = self.get_response(request)
+        return self._finish(request, response, started, observer)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        observer = QueryObserver(request.path)
+        await sync_to_async(_install)(observer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(_uninstall)(observer)
+        return self._finish(request, response, started, observer)
+
+    def _finish(self, request, response, started, observer):
+        match = getattr(request, 'resolver_match', None)
+        endpoint = match.url_name if match and match.url_name else 'unmatched'
+        observer.endpoint = endpoint
+
+        def finish(response_bytes):
+            registry.record(
+                endpoint, request.method, response.status_code, time.perf_counter() - started,
+                observer.queries, observer.seconds, response_bytes, observer.slow,
+            )
+
+        if response.streaming and response.is_async:
+            response.streaming_content = self._aobserve_stream(response.streaming_content, finish)
+        elif response.streaming:
+            response.streaming_content = self._observe_stream(response.streaming_content, observer, finish)
+        else:
+            finish(len(response.content))
+        return response
+
+    @staticmethod
+    def _observe_stream(chunks, observer, finish):
+        sent = 0
+        try:
+            with connection.execute_wrapper(observer):
+                for chunk in chunks:
+                    sent += len(chunk)
+                    yield chunk
+        finally:
+            finish(sent)
+
+    @staticmethod
+    async def _aobserve_stream(chunks, finish):
+        sent = 0
+        try:
+            async for chunk in chunks:
+                sent += len(chunk)
+                yield chunk
+        finally:
+            finish(sent)
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_backgroundjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_active_employees', models.IntegerField(default=0)),
+                ('present_count', models.IntegerField(default=0)),
+                ('absent_count', models.IntegerField(default=0)),
+                ('unresolved_complaints', models.IntegerField(default=0)),
+                ('total_insurances', models.IntegerField(default=0)),
+                ('total_departments', models.IntegerField(default=0)),
+                ('employees_per_department', models.JSONField(blank=True, default=list)),
+                ('pending_leaves', models.IntegerField(default=0)),
+                ('total_payroll', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('new_hires', models.IntegerField(default=0)),
+                ('prev_hires', models.IntegerField(default=0)),
+                ('hires_period', models.DateField(blank=True, help_text='First day of the month new_hires refers to', null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'dashboard_stats',
+            },
+        ),
+    ]
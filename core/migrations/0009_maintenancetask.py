@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_dashboardstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaintenanceTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('locked_by', models.CharField(blank=True, max_length=255, null=True)),
+                ('locked_until', models.DateTimeField(blank=True, null=True)),
+                ('last_started_at', models.DateTimeField(blank=True, null=True)),
+                ('last_finished_at', models.DateTimeField(blank=True, null=True)),
+                ('last_status', models.CharField(blank=True, choices=[('ok', 'OK'), ('failed', 'Failed')], max_length=20, null=True)),
+                ('last_error', models.TextField(blank=True, null=True)),
+                ('last_duration_ms', models.IntegerField(default=0)),
+                ('last_result', models.JSONField(blank=True, null=True)),
+                ('run_count', models.IntegerField(default=0)),
+                ('failure_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'maintenance_tasks',
+                'ordering': ['name'],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_maintenancetask'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Watermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('position', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'watermarks',
+            },
+        ),
+        migrations.CreateModel(
+            name='PunchEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('punched_at', models.DateTimeField()),
+                ('source', models.CharField(blank=True, default='', max_length=50)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='punch_events', to='core.employee')),
+            ],
+            options={
+                'db_table': 'punch_events',
+                'indexes': [models.Index(fields=['employee', 'punched_at'], name='punch_event_employe_6cff35_idx'), models.Index(fields=['received_at'], name='punch_event_receive_5be106_idx')],
+            },
+        ),
+    ]
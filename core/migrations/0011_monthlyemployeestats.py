@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:39
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_watermark_punchevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyEmployeeStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.IntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(12)])),
+                ('year', models.IntegerField()),
+                ('present_days', models.IntegerField(default=0)),
+                ('late_days', models.IntegerField(default=0)),
+                ('absent_days', models.IntegerField(default=0)),
+                ('uncovered_absences', models.IntegerField(default=0, help_text='Absent days not covered by approved paid leave')),
+                ('overtime_days', models.IntegerField(default=0, help_text='Present days longer than eight hours')),
+                ('approved_leaves', models.IntegerField(default=0, help_text='Approved leave applications starting this month')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_stats', to='core.employee')),
+            ],
+            options={
+                'db_table': 'monthly_employee_stats',
+                'indexes': [models.Index(fields=['year', 'month'], name='monthly_emp_year_de1fc5_idx')],
+                'unique_together': {('employee', 'month', 'year')},
+            },
+        ),
+    ]
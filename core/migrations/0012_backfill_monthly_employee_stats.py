@@ -0,0 +1,17 @@
+from django.db import migrations
+
+
+def backfill(apps, schema_editor):
+    from core.monthly_stats import rebuild_monthly_stats
+    rebuild_monthly_stats(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_monthlyemployeestats'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
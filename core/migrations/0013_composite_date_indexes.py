@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_backfill_monthly_employee_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['employee', 'attendance_date', 'status'], name='attendance_employe_8dc81a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaveapplication',
+            index=models.Index(fields=['employee', 'status', 'start_date', 'end_date'], name='leave_appli_employe_631dd9_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:56
+
+import django.core.validators
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_composite_date_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayrollDirtyMark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.IntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(12)])),
+                ('year', models.IntegerField()),
+                ('marked_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payroll_dirty_marks', to='core.employee')),
+            ],
+            options={
+                'db_table': 'payroll_dirty_marks',
+                'unique_together': {('employee', 'month', 'year')},
+            },
+        ),
+    ]
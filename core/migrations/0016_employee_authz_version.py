@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_payrollrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='authz_version',
+            field=models.PositiveIntegerField(default=0, help_text='Bumped when status, department or designation change; invalidates sessions'),
+        ),
+    ]
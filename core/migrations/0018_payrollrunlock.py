@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:53
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def drop_watermark_locks(apps, schema_editor):
+    # Payroll runs used to be locked through 'payroll_run:YYYY-MM' watermark rows.
+    apps.get_model('core', 'Watermark').objects.filter(name__startswith='payroll_run:').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_backgroundjob_heartbeat_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayrollRunLock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.IntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(12)])),
+                ('year', models.IntegerField()),
+                ('run', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.payrollrun')),
+            ],
+            options={
+                'db_table': 'payroll_run_locks',
+                'unique_together': {('month', 'year')},
+            },
+        ),
+        migrations.RunPython(drop_watermark_locks, migrations.RunPython.noop),
+    ]
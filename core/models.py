@@ -6,6 +6,7 @@ from django.db import models
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.auth.hashers import make_password
+from django.utils import timezone
 
 
 class Designation(models.Model):
@@ -53,6 +54,7 @@ class Employee(models.Model):
     termination_date = models.DateField(null=True, blank=True)
     employment_status = models.CharField(max_length=20, choices=EMPLOYMENT_STATUS_CHOICES, default='active')
     basic_salary = models.DecimalField(max_digits=15, decimal_places=2)
+    authz_version = models.PositiveIntegerField(default=0, help_text="Bumped when status, department or designation change; invalidates sessions")
     
     class Meta:
         db_table = 'employees'
@@ -100,6 +102,7 @@ class LeaveApplication(models.Model):
         ordering = ['-applied_date']
         indexes = [
             models.Index(fields=['employee']),
+            models.Index(fields=['employee', 'status', 'start_date', 'end_date']),
         ]
 
     def __str__(self):
@@ -223,6 +226,7 @@ class Attendance(models.Model):
         indexes = [
             models.Index(fields=['employee']),
             models.Index(fields=['attendance_date']),
+            models.Index(fields=['employee', 'attendance_date', 'status']),
         ]
 
     def __str__(self):
@@ -297,4 +301,205 @@ class InterviewedCandidate(models.Model):
         ]
 
     def __str__(self):
-        return f"{self.full_name} - {self.applied_position}"
\ No newline at end of file
+        return f"{self.full_name} - {self.applied_position}"
+
+class BackgroundJob(models.Model):
+    KIND_CHOICES = [
+        ('employee_reports', 'Employee Reports'),
+        ('company_report', 'Company Report'),
+    ]
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+        ('cancelled', 'Cancelled'),
+    ]
+
+    kind = models.CharField(max_length=50, choices=KIND_CHOICES)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    cancel_requested = models.BooleanField(default=False)
+    total = models.IntegerField(default=0)
+    done = models.IntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True, help_text="Last sign of life from the worker")
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'background_jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.id} ({self.status})"
+
+
+class DashboardStats(models.Model):
+    """Single-row summary table read by the dashboard; kept current by core.signals."""
+    total_active_employees = models.IntegerField(default=0)
+    present_count = models.IntegerField(default=0)
+    absent_count = models.IntegerField(default=0)
+    unresolved_complaints = models.IntegerField(default=0)
+    total_insurances = models.IntegerField(default=0)
+    total_departments = models.IntegerField(default=0)
+    employees_per_department = models.JSONField(default=list, blank=True)
+    pending_leaves = models.IntegerField(default=0)
+    total_payroll = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    new_hires = models.IntegerField(default=0)
+    prev_hires = models.IntegerField(default=0)
+    hires_period = models.DateField(null=True, blank=True, help_text="First day of the month new_hires refers to")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'dashboard_stats'
+
+    def __str__(self):
+        return f"Dashboard stats (updated {self.updated_at})"
+
+
+class MaintenanceTask(models.Model):
+    """Lock and last-run bookkeeping for one periodic task run by `manage.py run_maintenance`."""
+    STATUS_CHOICES = [
+        ('ok', 'OK'),
+        ('failed', 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100, unique=True)
+    locked_by = models.CharField(max_length=255, blank=True, null=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_started_at = models.DateTimeField(null=True, blank=True)
+    last_finished_at = models.DateTimeField(null=True, blank=True)
+    last_status = models.CharField(max_length=20, choices=STATUS_CHOICES, blank=True, null=True)
+    last_error = models.TextField(blank=True, null=True)
+    last_duration_ms = models.IntegerField(default=0)
+    last_result = models.JSONField(null=True, blank=True)
+    run_count = models.IntegerField(default=0)
+    failure_count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'maintenance_tasks'
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class MonthlyEmployeeStats(models.Model):
+    """Per-employee monthly attendance/leave aggregates, maintained by core.monthly_stats."""
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='monthly_stats')
+    month = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(12)])
+    year = models.IntegerField()
+    present_days = models.IntegerField(default=0)
+    late_days = models.IntegerField(default=0)
+    absent_days = models.IntegerField(default=0)
+    uncovered_absences = models.IntegerField(default=0, help_text="Absent days not covered by approved paid leave")
+    overtime_days = models.IntegerField(default=0, help_text="Present days longer than eight hours")
+    approved_leaves = models.IntegerField(default=0, help_text="Approved leave applications starting this month")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'monthly_employee_stats'
+        unique_together = ['employee', 'month', 'year']
+        indexes = [
+            models.Index(fields=['year', 'month']),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id} - {self.month}/{self.year}"
+
+
+class PunchEvent(models.Model):
+    """Append-only raw badge/turnstile punch; rolled up into Attendance by core.punches."""
+    id = models.BigAutoField(primary_key=True)
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='punch_events')
+    punched_at = models.DateTimeField()
+    source = models.CharField(max_length=50, blank=True, default='')
+    received_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'punch_events'
+        indexes = [
+            models.Index(fields=['employee', 'punched_at']),
+            models.Index(fields=['received_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id} @ {self.punched_at}"
+
+
+class Watermark(models.Model):
+    """Last processed position of an incremental stage, e.g. the punch rollup."""
+    name = models.CharField(max_length=100, unique=True)
+    position = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'watermarks'
+
+    def __str__(self):
+        return f"{self.name} @ {self.position}"
+
+
+class PayrollDirtyMark(models.Model):
+    """An employee-month whose payroll inputs changed; cleared by core.payroll.recompute_dirty_payrolls."""
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='payroll_dirty_marks')
+    month = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(12)])
+    year = models.IntegerField()
+    marked_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'payroll_dirty_marks'
+        unique_together = ['employee', 'month', 'year']
+
+    def __str__(self):
+        return f"{self.employee_id} - {self.month}/{self.year}"
+
+
+class PayrollRun(models.Model):
+    """One payroll generation for a month; concurrent triggers of the same month share it (core.payroll_runs)."""
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    month = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(12)])
+    year = models.IntegerField()
+    idempotency_key = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='running')
+    requested_by = models.ForeignKey(Employee, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    employees = models.IntegerField(default=0)
+    created = models.IntegerField(default=0, help_text="Payroll rows written by this run")
+    error = models.TextField(blank=True, default='')
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'payroll_runs'
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=['year', 'month']),
+        ]
+
+    def __str__(self):
+        return f"Payroll run {self.id} - {self.month}/{self.year} ({self.status})"
+
+
+class PayrollRunLock(models.Model):
+    """One row per month, taken FOR UPDATE to claim its payroll run; points at the month's latest run."""
+    month = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(12)])
+    year = models.IntegerField()
+    run = models.ForeignKey(PayrollRun, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    class Meta:
+        db_table = 'payroll_run_locks'
+        unique_together = ['month', 'year']
+
+    def __str__(self):
+        return f"Payroll run lock - {self.month}/{self.year}"
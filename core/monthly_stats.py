@@ -0,0 +1,201 @@
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.apps import apps as global_apps
+from django.db import transaction
+from django.db.models import Count, DurationField, Exists, ExpressionWrapper, F, OuterRef, Q
+
+from .periods import in_month
+
+OVERTIME_AFTER = timedelta(hours=8)
+
+STAT_FIELDS = [
+    'present_days', 'late_days', 'absent_days', 'uncovered_absences', 'overtime_days', 'approved_leaves',
+]
+
+
+def _worked():
+    return ExpressionWrapper(F('check_out_time') - F('check_in_time'), output_field=DurationField())
+
+
+def _models(apps):
+    apps = apps or global_apps
+    return (
+        apps.get_model('core', 'Attendance'),
+        apps.get_model('core', 'LeaveApplication'),
+        apps.get_model('core', 'MonthlyEmployeeStats'),
+    )
+
+
+def months_between(start, end):
+    """[(month, year)] of every month overlapping the inclusive date range."""
+    months = []
+    month, year = start.month, start.year
+    while (year, month) <= (end.year, end.month):
+        months.append((month, year))
+        month, year = (1, year + 1) if month == 12 else (month + 1, year)
+    return months
+
+
+def compute_monthly_stats(month, year, employee_ids=None, apps=None):
+    """
+    employee_id -> stat values for one month, in one GROUP BY over attendance and one over leaves.
+
+    uncovered_absences are absent days not inside an approved paid leave and
+    overtime_days are 'present' days longer than eight hours, exactly as the
+    payroll calculation has always counted them.
+    """
+    Attendance, LeaveApplication, _ = _models(apps)
+    paid_leave = LeaveApplication.objects.filter(
+        employee=OuterRef('employee'),
+        status='approved',
+        leave_type__is_paid=True,
+        start_date__lte=OuterRef('attendance_date'),
+        end_date__gte=OuterRef('attendance_date'),
+    )
+    attendance = Attendance.objects.filter(in_month('attendance_date', month, year))
+    leaves = LeaveApplication.objects.filter(in_month('start_date', month, year), status='approved')
+    if employee_ids is not None:
+        attendance = attendance.filter(employee_id__in=employee_ids)
+        leaves = leaves.filter(employee_id__in=employee_ids)
+
+    stats = defaultdict(lambda: dict.fromkeys(STAT_FIELDS, 0))
+    rows = (
+        attendance
+        .alias(
+            covered=Exists(paid_leave),
+            worked=_worked(),
+        )
+        .order_by()
+        .values('employee_id')
+        .annotate(
+            present_days=Count('id', filter=Q(status='present')),
+            late_days=Count('id', filter=Q(status='late')),
+            absent_days=Count('id', filter=Q(status='absent')),
+            uncovered_absences=Count('id', filter=Q(status='absent', covered=False)),
+            overtime_days=Count('id', filter=Q(status='present', worked__gt=OVERTIME_AFTER)),
+        )
+    )
+    for row in rows:
+        stats[row.pop('employee_id')].update(row)
+    for row in leaves.order_by().values('employee_id').annotate(approved_leaves=Count('id')):
+        stats[row['employee_id']]['approved_leaves'] = row['approved_leaves']
+    return dict(stats)
+
+
+def overtime_counts(month, year, after, employee_ids=None):
+    """employee_id -> 'present' days longer than ``after`` (a timedelta), for thresholds other than the stored one."""
+    Attendance, _, _ = _models(None)
+    attendance = Attendance.objects.filter(in_month('attendance_date', month, year), status='present')
+    if employee_ids is not None:
+        attendance = attendance.filter(employee_id__in=employee_ids)
+    rows = (
+        attendance.alias(worked=_worked()).filter(worked__gt=after)
+        .order_by().values_list('employee_id').annotate(days=Count('id'))
+    )
+    return dict(rows)
+
+
+def refresh_monthly_stats(month, year, employee_ids=None, apps=None):
+    """Recompute the stats rows of one month, for ``employee_ids`` or everybody."""
+    _, _, MonthlyEmployeeStats = _models(apps)
+    stats = compute_monthly_stats(month, year, employee_ids, apps)
+    with transaction.atomic():
+        existing = MonthlyEmployeeStats.objects.filter(month=month, year=year)
+        if employee_ids is not None:
+            existing = existing.filter(employee_id__in=employee_ids)
+        existing.delete()
+        MonthlyEmployeeStats.objects.bulk_create([
+            MonthlyEmployeeStats(employee_id=employee_id, month=month, year=year, **values)
+            for employee_id, values in stats.items()
+        ], batch_size=1000)
+    return len(stats)
+
+
+def refresh_employee_days(pairs, apps=None):
+    """Refresh the months touched by (employee_id, date) pairs, e.g. after a bulk attendance upsert."""
+    by_month = defaultdict(set)
+    for employee_id, day in pairs:
+        by_month[(day.month, day.year)].add(employee_id)
+    for (month, year), employee_ids in by_month.items():
+        employee_ids = sorted(employee_ids)
+        for i in range(0, len(employee_ids), 1000):
+            refresh_monthly_stats(month, year, employee_ids[i:i + 1000], apps)
+
+
+def stat_periods(apps=None):
+    """Every (month, year) that has attendance or approved leaves."""
+    Attendance, LeaveApplication, _ = _models(apps)
+    periods = set()
+    for field, queryset in (('attendance_date', Attendance.objects), ('start_date', LeaveApplication.objects)):
+        for day in queryset.dates(field, 'month'):
+            periods.add((day.month, day.year))
+    return sorted(periods, key=lambda period: (period[1], period[0]))
+
+
+def rebuild_monthly_stats(apps=None):
+    """Rebuild every month from scratch; used by the backfill migration and to repair drift."""
+    periods = stat_periods(apps)
+    for month, year in periods:
+        refresh_monthly_stats(month, year, apps=apps)
+    return periods
+
+
+def ensure_monthly_stats(month, year):
+    """
+    Build the missing stats rows of a month: employees with raw rows but no stats
+    yet (e.g. data loaded without signals). Rows that exist but drifted need
+    rebuild_monthly_stats.
+    """
+    Attendance, LeaveApplication, MonthlyEmployeeStats = _models(None)
+    has_stats = Exists(MonthlyEmployeeStats.objects.filter(employee_id=OuterRef('employee_id'), month=month, year=year))
+    attendance = Attendance.objects.filter(in_month('attendance_date', month, year))
+    leaves = LeaveApplication.objects.filter(in_month('start_date', month, year), status='approved')
+    missing = (
+        attendance.filter(~has_stats).order_by().values_list('employee_id', flat=True)
+        .union(leaves.filter(~has_stats).order_by().values_list('employee_id', flat=True))
+    )
+    refresh_employee_days((employee_id, date(year, month, 1)) for employee_id in missing)
+
+
+def _attendance_keys(instance):
+    return {(instance.employee_id, instance.attendance_date)}
+
+
+def _leave_keys(instance):
+    return {
+        (instance.employee_id, date(year, month, 1))
+        for month, year in months_between(instance.start_date, instance.end_date)
+    }
+
+
+STAT_KEYS = {
+    'Attendance': _attendance_keys,
+    'LeaveApplication': _leave_keys,
+}
+
+
+def remember_previous_keys(sender, instance, **kwargs):
+    """pre_save: note the months an edited row counted in before the edit."""
+    instance._previous_stat_keys = set()
+    if instance.pk:
+        previous = sender.objects.filter(pk=instance.pk).first()
+        if previous is not None:
+            instance._previous_stat_keys = STAT_KEYS[sender.__name__](previous)
+
+
+def deleting_employee(kwargs):
+    """True inside a post_delete cascaded from deleting employees, whose derived rows go with them."""
+    origin = kwargs.get('origin')
+    if origin is None:
+        return False
+    model = getattr(origin, 'model', type(origin))
+    return model._meta.label == 'core.Employee'
+
+
+def refresh_for_instance(sender, instance, **kwargs):
+    """post_save/post_delete: recompute the affected employee-months in the same transaction."""
+    if deleting_employee(kwargs):
+        return
+    keys = STAT_KEYS[sender.__name__](instance) | getattr(instance, '_previous_stat_keys', set())
+    refresh_employee_days(keys)
@@ -0,0 +1,197 @@
+import base64
+import binascii
+import json
+from collections import namedtuple
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from django.http import JsonResponse
+
+MAX_PAGE_SIZE = 500
+
+# One page before it is read: the .values() queryset plus what is needed to project it.
+_Page = namedtuple('_Page', 'rows limit order specs')
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def page_size(request):
+    default = settings.REST_FRAMEWORK.get('PAGE_SIZE', 20)
+    try:
+        limit = int(request.GET.get('limit', default))
+    except ValueError:
+        raise PaginationError("limit must be an integer")
+    if limit < 1:
+        raise PaginationError("limit must be positive")
+    return min(limit, getattr(settings, 'LIST_MAX_PAGE_SIZE', MAX_PAGE_SIZE))
+
+
+def requested_fields(request, fields):
+    """Output keys selected with ?fields=a,b (all of ``fields`` when absent)."""
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(fields)
+    keys = [key.strip() for key in raw.split(',') if key.strip()]
+    unknown = [key for key in keys if key not in fields]
+    if unknown:
+        raise PaginationError(f"Unknown fields {unknown}. Available fields are {list(fields)}")
+    return keys
+
+
+def _resolve_field(model, path):
+    field = None
+    for part in path.split('__'):
+        field = model._meta.get_field(part)
+        model = field.related_model
+    return field
+
+
+def ordering_keys(queryset):
+    """
+    [(field path, descending, nullable)] for the queryset's ordering plus an id tie-breaker.
+
+    Falls back to the model's Meta.ordering, which is what every list endpoint uses.
+    """
+    model = queryset.model
+    ordering = list(queryset.query.order_by or model._meta.ordering)
+    keys = []
+    for name in ordering:
+        descending = name.startswith('-')
+        path = name.lstrip('-')
+        if path == 'pk':
+            path = 'id'
+        keys.append((path, descending, _resolve_field(model, path).null))
+    if 'id' not in [path for path, _, _ in keys]:
+        keys.append(('id', keys[0][1] if keys else False, False))
+    return keys
+
+
+def _order_by(keys):
+    order = []
+    for path, descending, nullable in keys:
+        if nullable:
+            expr = F(path)
+            order.append(expr.desc(nulls_last=True) if descending else expr.asc(nulls_last=True))
+        else:
+            order.append(f"-{path}" if descending else path)
+    return order
+
+
+def _after(keys, values):
+    """Q matching the rows that sort strictly after ``values`` (NULLs sort last)."""
+    clauses = []
+    equal = Q()
+    for (path, descending, nullable), value in zip(keys, values):
+        if value is None:
+            equal &= Q(**{f"{path}__isnull": True})
+            continue
+        after = Q(**{f"{path}__lt" if descending else f"{path}__gt": value})
+        if nullable:
+            after |= Q(**{f"{path}__isnull": True})
+        clauses.append(equal & after)
+        equal &= Q(**{path: value})
+    if not clauses:
+        return Q(pk__in=[])
+    return reduce(or_, clauses)
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, cls=DjangoJSONEncoder).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(model, keys, cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError):
+        raise PaginationError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise PaginationError("Invalid cursor")
+    try:
+        return [
+            None if value is None else _resolve_field(model, path).to_python(value)
+            for (path, _, _), value in zip(keys, values)
+        ]
+    except Exception:
+        raise PaginationError("Invalid cursor")
+
+
+def field_spec(spec):
+    """(path, transform) of one ``fields`` entry; transform is None for a bare path."""
+    if isinstance(spec, tuple):
+        return spec
+    return spec, None
+
+
+def paginate(request, queryset, fields):
+    """
+    Keyset-paginate ``queryset`` and project it to the requested fields.
+
+    ``fields`` maps output keys to a model path (``'employee__full_name'``) or to
+    ``(path, transform)``. Only the selected paths are fetched, via ``.values()``,
+    and the page is located with a WHERE on the ordering columns instead of an
+    OFFSET, so every page costs the same. Returns ``(rows, next_cursor)``.
+    """
+    page = _page(request, queryset, fields)
+    return _project(list(page.rows), page)
+
+
+async def apaginate(request, queryset, fields):
+    """paginate() for async views; the page is read through the async ORM."""
+    page = _page(request, queryset, fields)
+    return _project([row async for row in page.rows], page)
+
+
+def _page(request, queryset, fields):
+    """The unevaluated .values() queryset of one page, limit + 1 rows long."""
+    keys = requested_fields(request, fields)
+    limit = page_size(request)
+    order = ordering_keys(queryset)
+
+    queryset = queryset.order_by(*_order_by(order))
+    cursor = request.GET.get('cursor')
+    if cursor:
+        queryset = queryset.filter(_after(order, decode_cursor(queryset.model, order, cursor)))
+
+    specs = {key: field_spec(fields[key]) for key in keys}
+    paths = {path for path, _ in specs.values()} | {path for path, _, _ in order}
+    return _Page(queryset.values(*paths)[:limit + 1], limit, order, specs)
+
+
+def _project(rows, page):
+    limit, order, specs = page.limit, page.order, page.specs
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1][path] for path, _, _ in order])
+
+    results = []
+    for row in rows:
+        item = {}
+        for key, (path, transform) in specs.items():
+            item[key] = transform(row[path]) if transform else row[path]
+        results.append(item)
+    return results, next_cursor
+
+
+def paginated_response(request, key, queryset, fields, **extra):
+    """JsonResponse of one page under ``key`` plus ``next_cursor``; 400 on bad parameters."""
+    try:
+        rows, next_cursor = paginate(request, queryset, fields)
+    except PaginationError as e:
+        return JsonResponse({'message': str(e)}, status=400)
+    return JsonResponse({**extra, key: rows, 'next_cursor': next_cursor})
+
+
+async def apaginated_response(request, key, queryset, fields, **extra):
+    try:
+        rows, next_cursor = await apaginate(request, queryset, fields)
+    except PaginationError as e:
+        return JsonResponse({'message': str(e)}, status=400)
+    return JsonResponse({**extra, key: rows, 'next_cursor': next_cursor})
@@ -0,0 +1,386 @@
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+from decimal import ROUND_HALF_EVEN, Context, Decimal, getcontext, localcontext
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import Employee, EmployeeInsurance, MonthlyEmployeeStats, Payroll, PayrollDirtyMark, PayrollRun
+from .monthly_stats import ensure_monthly_stats
+from .payroll_vector import compute_payrolls_vectorized
+from .periods import month_bounds
+from .signals import refresh_dashboard_on_commit
+from .workers import init_django_worker
+
+PAYROLL_FIELDS = ['bonuses', 'bonus_reason', 'deductions', 'deduction_reason', 'net_salary']
+SHARDS_PER_WORKER = 4
+BATCH_SIZE = 1000
+# Pinned in deterministic mode so no process-wide decimal setting can change a result.
+DECIMAL_CONTEXT = Context(prec=28, rounding=ROUND_HALF_EVEN)
+CENT = Decimal('0.01')
+PAYROLL_ENGINES = ['scalar', 'vector']
+
+
+class PayrollInputs:
+    """
+    Everything the payroll calculation needs for one month, loaded in bulk.
+
+    uncovered_absences: employee_id -> absent days not covered by approved paid leave
+    overtime_days:      employee_id -> number of present days longer than 8 hours
+    insurance:          employee_id -> list of monthly deductions
+
+    Attendance and leave figures come precomputed from MonthlyEmployeeStats.
+    """
+
+    def __init__(self, month, year, employees):
+        self.month = month
+        self.year = year
+        self.start_date, self.end_date = month_bounds(month, year)
+        self.uncovered_absences = {}
+        self.overtime_days = {}
+        self.insurance = defaultdict(list)
+        self._load(employees)
+
+    def _load(self, employees):
+        ensure_monthly_stats(self.month, self.year)
+        stats = MonthlyEmployeeStats.objects.filter(
+            employee__in=employees, month=self.month, year=self.year
+        ).order_by().values_list('employee_id', 'uncovered_absences', 'overtime_days')
+        for employee_id, uncovered, overtime in stats:
+            self.uncovered_absences[employee_id] = uncovered
+            self.overtime_days[employee_id] = overtime
+
+        insurances = EmployeeInsurance.objects.filter(
+            employee__in=employees,
+            end_date__gte=self.start_date,
+            monthly_deduction__isnull=False
+        ).order_by('-start_date', 'id').values_list('employee_id', 'monthly_deduction')
+        for employee_id, deduction in insurances:
+            self.insurance[employee_id].append(deduction)
+
+
+def tenure_years(joining_date, today):
+    return max(
+        0,
+        today.year - joining_date.year -
+        ((today.month, today.day) < (joining_date.month, joining_date.day))
+    )
+
+
+def compute_payroll(employee, inputs, today):
+    """
+    Calculate (bonus, bonus_percentage, deductions) for one employee.
+
+    Amounts are accumulated one absence/overtime day at a time so the result
+    is identical, digit for digit, to the historical per-row calculation.
+    """
+    basic_salary = employee.basic_salary
+    total_deductions = Decimal('0.00')
+
+    for _ in range(inputs.uncovered_absences.get(employee.id, 0)):
+        total_deductions += basic_salary / Decimal("30")
+
+    for deduction in inputs.insurance.get(employee.id, ()):
+        total_deductions += Decimal(deduction)
+
+    bonus_percentage = min(tenure_years(employee.joining_date, today), 10)
+    bonus = (basic_salary * Decimal(bonus_percentage) / Decimal(100))
+
+    for _ in range(inputs.overtime_days.get(employee.id, 0)):
+        bonus += basic_salary * Decimal('0.5') / Decimal('100')
+
+    return bonus, bonus_percentage, total_deductions
+
+
+def payroll_row(employee, month, year, bonus, bonus_percentage, total_deductions, net_salary):
+    return Payroll(
+        employee=employee,
+        month=month,
+        year=year,
+        bonuses=bonus,
+        bonus_reason=f'{bonus_percentage}% tenure bonus and overtime',
+        deductions=total_deductions,
+        deduction_reason='Absences/Leaves/Insurance',
+        net_salary=net_salary,
+        status='pending'
+    )
+
+
+def new_payroll(employee, month, year, inputs, today):
+    bonus, bonus_percentage, total_deductions = compute_payroll(employee, inputs, today)
+    return payroll_row(
+        employee, month, year, bonus, bonus_percentage, total_deductions,
+        employee.basic_salary + bonus - total_deductions,
+    )
+
+
+def build_payrolls(month, year, employees=None, today=None, engine=None):
+    """
+    The month's payroll of every active employee, computing the missing ones.
+
+    Inputs are loaded with one query per table and computed in memory; nothing
+    is written. Returns (payrolls ordered like ``employees``, the new unsaved
+    ones). ``engine`` (default settings.PAYROLL_ENGINE) is 'scalar', the
+    per-employee Decimal calculation, or 'vector', core.payroll_vector over
+    NumPy arrays.
+    """
+    engine = engine or getattr(settings, 'PAYROLL_ENGINE', 'scalar')
+    if engine not in PAYROLL_ENGINES:
+        raise ValueError(f"Unknown payroll engine, use one of {PAYROLL_ENGINES}")
+    if employees is None:
+        employees = Employee.objects.filter(employment_status='active')
+    today = today or date.today()
+
+    employees = list(employees)
+    inputs = PayrollInputs(month, year, [emp.id for emp in employees])
+
+    existing = {
+        p.employee_id: p
+        for p in Payroll.objects.filter(month=month, year=year, employee__in=[emp.id for emp in employees])
+    }
+
+    amounts = None
+    if engine == 'vector':
+        missing = [employee for employee in employees if employee.id not in existing]
+        amounts = compute_payrolls_vectorized(missing, inputs, today)
+
+    payrolls = []
+    new_payrolls = []
+    for employee in employees:
+        payroll = existing.get(employee.id)
+        if payroll is None:
+            if amounts is None:
+                payroll = new_payroll(employee, month, year, inputs, today)
+            else:
+                payroll = payroll_row(employee, month, year, *amounts[employee.id])
+            new_payrolls.append(payroll)
+        else:
+            payroll.employee = employee
+        payrolls.append(payroll)
+
+    return payrolls, new_payrolls
+
+
+def save_new_payrolls(new_payrolls, count=False):
+    """
+    Insert computed payrolls of one month in one short transaction.
+
+    A row another writer inserted in the meantime is skipped by the unique
+    (employee, month, year) index instead of failing the whole batch. With
+    ``count``, returns how many rows were really inserted, from the month's
+    row count before and after the insert (two extra queries).
+    """
+    if not new_payrolls:
+        return 0
+    month_rows = Payroll.objects.filter(month=new_payrolls[0].month, year=new_payrolls[0].year)
+    with transaction.atomic():
+        before = month_rows.count() if count else 0
+        Payroll.objects.bulk_create(new_payrolls, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        refresh_dashboard_on_commit('payroll')
+        return month_rows.count() - before if count else len(new_payrolls)
+
+
+def generate_payrolls(month, year, employees=None, today=None, engine=None):
+    """
+    Create the month's payroll for every active employee that does not have one yet.
+
+    Existing payrolls are returned untouched. Returns the serialized payroll
+    rows ordered like ``employees``; see build_payrolls for ``engine``.
+    """
+    payrolls, new_payrolls = build_payrolls(month, year, employees, today, engine)
+    save_new_payrolls(new_payrolls)
+    return [serialize_payroll(payroll, month, year) for payroll in payrolls]
+
+
+def shard_employees(employees, shards, by='department'):
+    """
+    Split (employee_id, department_id) pairs into at most ``shards`` lists of ids.
+
+    by='department' keeps each department in one shard, largest departments
+    first onto the smallest shard; by='range' cuts the sorted ids into
+    contiguous, equally sized ranges.
+    """
+    shards = max(1, shards)
+    if by == 'range':
+        ids = sorted(employee_id for employee_id, _ in employees)
+        size = -(-len(ids) // shards)
+        return [ids[i:i + size] for i in range(0, len(ids), size)] if ids else []
+    if by != 'department':
+        raise ValueError(f"Unknown shard key {by!r}, use 'department' or 'range'")
+
+    departments = defaultdict(list)
+    for employee_id, department_id in employees:
+        departments[department_id].append(employee_id)
+    buckets = [[] for _ in range(shards)]
+    for department_id, ids in sorted(departments.items(), key=lambda item: (-len(item[1]), str(item[0]))):
+        min(buckets, key=len).extend(ids)
+    return [sorted(bucket) for bucket in buckets if bucket]
+
+
+def payroll_shard(month, year, employee_ids, today, deterministic=False):
+    """
+    Compute, without saving, the payroll fields of ``employee_ids``.
+
+    Runs inside a worker process with its own database connection; returns
+    [(employee_id, {field: value})] ordered by employee id.
+    """
+    employees = Employee.objects.filter(id__in=employee_ids).only('id', 'basic_salary', 'joining_date').order_by('id')
+    inputs = PayrollInputs(month, year, employee_ids)
+    rows = []
+    with localcontext(DECIMAL_CONTEXT if deterministic else getcontext()):
+        for employee in employees:
+            payroll = new_payroll(employee, month, year, inputs, today)
+            rows.append((employee.id, {field: getattr(payroll, field) for field in PAYROLL_FIELDS}))
+    return rows
+
+
+def run_payroll(month, year, workers=0, shard_by='department', shards=None, deterministic=False,
+                recompute=False, today=None):
+    """
+    Generate the month's payroll outside the request cycle, sharded across a process pool.
+
+    Active employees without a payroll (with ``recompute``, also those whose
+    payroll is still pending) are split by ``shard_by`` and computed by
+    ``workers`` processes (0 computes in-process). The results are merged and
+    written in one transaction as a bulk upsert, skipping payrolls settled
+    in the meantime. In ``deterministic`` mode the decimal context is pinned
+    and rows are written in employee id order, so the table ends up identical
+    whatever the worker count.
+
+    The run holds the month's PayrollRunLock like a triggered run does (see
+    core.payroll_runs), so the two never compute the same month at once;
+    PayrollRunBusy is raised while another run is in progress.
+    Returns {'employees', 'shards', 'written'}.
+    """
+    # core.payroll_runs imports this module.
+    from .payroll_runs import PayrollRunBusy, claim_payroll_run
+
+    run, started = claim_payroll_run(month, year)
+    if not started:
+        raise PayrollRunBusy(f"Payroll run {run.id} for {month}/{year} is still in progress")
+    try:
+        result = _run_payroll(month, year, workers, shard_by, shards, deterministic, recompute, today or date.today())
+    except Exception as e:
+        PayrollRun.objects.filter(id=run.id).update(status='failed', error=str(e), finished_at=timezone.now())
+        raise
+    PayrollRun.objects.filter(id=run.id).update(
+        status='completed', employees=result['employees'], created=result['written'], finished_at=timezone.now(),
+    )
+    return result
+
+
+def _run_payroll(month, year, workers, shard_by, shards, deterministic, recompute, today):
+    ensure_monthly_stats(month, year)
+
+    settled = Payroll.objects.filter(employee=OuterRef('pk'), month=month, year=year)
+    if recompute:
+        settled = settled.exclude(status='pending')
+    employees = list(
+        Employee.objects.filter(employment_status='active').filter(~Exists(settled))
+        .order_by('id').values_list('id', 'department_id')
+    )
+    shard_list = shard_employees(employees, shards or max(1, workers) * SHARDS_PER_WORKER, shard_by)
+
+    results = []
+    if workers <= 0:
+        for shard in shard_list:
+            results.extend(payroll_shard(month, year, shard, today, deterministic))
+    else:
+        # Forked children must not share the parent's database connection.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_django_worker) as pool:
+            futures = [pool.submit(payroll_shard, month, year, shard, today, deterministic) for shard in shard_list]
+            for future in as_completed(futures):
+                results.extend(future.result())
+    if deterministic:
+        results.sort(key=lambda row: row[0])
+
+    # MySQL infers the conflict target from the unique index and rejects an explicit one.
+    target = {}
+    if connection.features.supports_update_conflicts_with_target:
+        target['unique_fields'] = ['employee', 'month', 'year']
+    with transaction.atomic():
+        # Leave payrolls paid while the shards computed; the rest stay locked until the upsert commits.
+        settled = {
+            employee_id for employee_id, status in
+            Payroll.objects.select_for_update().filter(month=month, year=year).values_list('employee_id', 'status')
+            if status != 'pending'
+        }
+        payrolls = [
+            Payroll(employee_id=employee_id, month=month, year=year, status='pending', **fields)
+            for employee_id, fields in results if employee_id not in settled
+        ]
+        if payrolls:
+            Payroll.objects.bulk_create(
+                payrolls, batch_size=BATCH_SIZE, update_conflicts=True, update_fields=PAYROLL_FIELDS, **target
+            )
+            refresh_dashboard_on_commit('payroll')
+    return {'employees': len(employees), 'shards': len(shard_list), 'written': len(payrolls)}
+
+
+def recompute_dirty_payrolls(today=None):
+    """
+    Recompute the pending payrolls whose inputs changed since they were generated.
+
+    Only employee-months flagged in PayrollDirtyMark (see core.payroll_marks)
+    are read and recomputed; paid payrolls are left alone. Marks are cleared
+    unless they were renewed while the pass ran. Returns the diff, one
+    {'employee_id', 'month', 'year', 'changes': {field: [old, new]}} per
+    payroll that changed.
+    """
+    today = today or date.today()
+    started = timezone.now()
+    periods = defaultdict(set)
+    for employee_id, month, year in PayrollDirtyMark.objects.order_by().values_list('employee_id', 'month', 'year'):
+        periods[(year, month)].add(employee_id)
+
+    diff = []
+    with transaction.atomic():
+        for (year, month), employee_ids in sorted(periods.items()):
+            payrolls = list(
+                Payroll.objects.select_for_update().select_related('employee')
+                .filter(month=month, year=year, status='pending', employee_id__in=employee_ids)
+                .order_by('employee_id')
+            )
+            if not payrolls:
+                continue
+            inputs = PayrollInputs(month, year, [payroll.employee_id for payroll in payrolls])
+            changed = []
+            for payroll in payrolls:
+                fresh = new_payroll(payroll.employee, month, year, inputs, today)
+                changes = {}
+                for field in PAYROLL_FIELDS:
+                    old, new = getattr(payroll, field), getattr(fresh, field)
+                    if isinstance(new, Decimal):
+                        new = new.quantize(CENT)  # as the column stores it
+                    if old != new:
+                        changes[field] = [str(old), str(new)]
+                        setattr(payroll, field, new)
+                if changes:
+                    changed.append(payroll)
+                    diff.append({'employee_id': payroll.employee_id, 'month': month, 'year': year, 'changes': changes})
+            Payroll.objects.bulk_update(changed, PAYROLL_FIELDS, batch_size=BATCH_SIZE)
+        PayrollDirtyMark.objects.filter(marked_at__lte=started).delete()
+        if diff:
+            refresh_dashboard_on_commit('payroll')
+    return diff
+
+
+def serialize_payroll(payroll, month, year):
+    employee = payroll.employee
+    return {
+        'employee_id': employee.id,
+        'employee_name': employee.full_name,
+        'month': month,
+        'year': year,
+        'basic_salary': str(employee.basic_salary),
+        'bonuses': str(payroll.bonuses),
+        'bonus_reason': payroll.bonus_reason,
+        'deductions': str(payroll.deductions),
+        'deduction_reason': payroll.deduction_reason,
+        'net_salary': str(payroll.net_salary),
+        'status': payroll.status
+    }
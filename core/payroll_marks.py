@@ -0,0 +1,71 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.utils import timezone
+
+from .models import Employee, Payroll, PayrollDirtyMark
+from .monthly_stats import STAT_KEYS, deleting_employee
+
+
+def mark_payrolls(periods):
+    """
+    Flag (employee_id, month, year) payrolls as stale, in one upsert.
+
+    A repeated mark moves marked_at forward, so a recompute pass that started
+    before it does not clear it.
+    """
+    now = timezone.now()
+    marks = [
+        PayrollDirtyMark(employee_id=employee_id, month=month, year=year, marked_at=now)
+        for employee_id, month, year in sorted(periods)
+    ]
+    if not marks:
+        return
+    target = {}
+    if connection.features.supports_update_conflicts_with_target:
+        target['unique_fields'] = ['employee', 'month', 'year']
+    PayrollDirtyMark.objects.bulk_create(
+        marks, batch_size=1000, update_conflicts=True, update_fields=['marked_at'], **target
+    )
+
+
+def mark_employee_days(pairs):
+    """Flag the months of (employee_id, date) pairs, e.g. after a bulk attendance write."""
+    mark_payrolls({(employee_id, day.month, day.year) for employee_id, day in pairs})
+
+
+def mark_pending_payrolls(employee_ids):
+    """Flag every pending payroll of the employees, for inputs not tied to one month."""
+    mark_payrolls(
+        Payroll.objects.filter(employee_id__in=employee_ids, status='pending')
+        .order_by().values_list('employee_id', 'month', 'year')
+    )
+
+
+def mark_for_instance(sender, instance, **kwargs):
+    """post_save/post_delete of Attendance and LeaveApplication; reuses the monthly stats keys."""
+    if deleting_employee(kwargs):
+        return
+    mark_employee_days(STAT_KEYS[sender.__name__](instance) | getattr(instance, '_previous_stat_keys', set()))
+
+
+def mark_for_insurance(sender, instance, **kwargs):
+    if deleting_employee(kwargs):
+        return
+    mark_pending_payrolls([instance.employee_id])
+
+
+def remember_previous_salary(sender, instance, **kwargs):
+    """pre_save of Employee: note the salary before the edit."""
+    instance._previous_salary = None
+    if instance.pk:
+        instance._previous_salary = (
+            Employee.objects.filter(pk=instance.pk).values_list('basic_salary', flat=True).first()
+        )
+
+
+def mark_for_salary(sender, instance, created=False, **kwargs):
+    previous = getattr(instance, '_previous_salary', None)
+    # update_employee assigns the salary straight from the request body, as a string.
+    if not created and previous is not None and previous != Decimal(str(instance.basic_salary)):
+        mark_pending_payrolls([instance.pk])
@@ -0,0 +1,136 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Payroll, PayrollRun, PayrollRunLock
+from .payroll import PAYROLL_ENGINES, build_payrolls, save_new_payrolls, serialize_payroll
+
+
+class IdempotencyConflict(ValueError):
+    pass
+
+
+class PayrollRunBusy(RuntimeError):
+    pass
+
+
+def claim_payroll_run(month, year, key=None, requested_by=None):
+    """
+    Start a run for the month, or join the one already in progress.
+
+    The month's PayrollRunLock row is the lock: it is taken FOR UPDATE and points
+    at the latest run, so two triggers cannot both start one. A run still
+    'running' after PAYROLL_RUN_TTL seconds is treated as abandoned. A known
+    idempotency ``key`` returns its run, whatever its state.
+    Returns (run, started).
+    """
+    if key:
+        run = PayrollRun.objects.filter(idempotency_key=key).first()
+        if run is not None:
+            return _check_key(run, month, year), False
+
+    ttl = timedelta(seconds=getattr(settings, 'PAYROLL_RUN_TTL', 600))
+    PayrollRunLock.objects.get_or_create(month=month, year=year)
+    with transaction.atomic():
+        lock = PayrollRunLock.objects.select_for_update().get(month=month, year=year)
+        if key:
+            # A trigger with the same key may have won the lock first.
+            run = PayrollRun.objects.filter(idempotency_key=key).first()
+            if run is not None:
+                return _check_key(run, month, year), False
+        now = timezone.now()
+        current = PayrollRun.objects.filter(id=lock.run_id, status='running').first()
+        if current is not None and current.started_at > now - ttl:
+            return current, False
+
+        run = PayrollRun.objects.create(
+            month=month, year=year, idempotency_key=key or None, requested_by_id=requested_by, started_at=now,
+        )
+        lock.run = run
+        lock.save(update_fields=['run'])
+    return run, True
+
+
+def _check_key(run, month, year):
+    if (run.month, run.year) != (month, year):
+        raise IdempotencyConflict(f"Idempotency-Key was already used for {run.month}/{run.year}")
+    return run
+
+
+def execute_payroll_run(run, today=None, engine=None):
+    """
+    Compute outside any transaction, write in one short one, then record the outcome on the run.
+
+    Returns the stored rows, so a replay of the run returns the same amounts
+    and a row another writer inserted first is reported as it was kept.
+    """
+    try:
+        payrolls, new_payrolls = build_payrolls(run.month, run.year, today=today, engine=engine)
+        # Rows another writer inserted first are skipped, so this can be less than len(new_payrolls).
+        created = save_new_payrolls(new_payrolls, count=True)
+    except Exception as e:
+        PayrollRun.objects.filter(id=run.id).update(status='failed', error=str(e), finished_at=timezone.now())
+        raise
+    run.status = 'completed'
+    run.employees = len(payrolls)
+    run.created = created
+    run.finished_at = timezone.now()
+    run.save(update_fields=['status', 'employees', 'created', 'finished_at'])
+    return payroll_rows(run.month, run.year)
+
+
+def wait_for_run(run, timeout, interval=0.2):
+    """Poll a run started elsewhere until it leaves 'running' or ``timeout`` seconds pass."""
+    deadline = time.monotonic() + timeout
+    while run.status == 'running' and time.monotonic() < deadline:
+        time.sleep(interval)
+        run.refresh_from_db()
+    return run
+
+
+def payroll_rows(month, year):
+    """Serialized stored payrolls of the month's active employees."""
+    payrolls = (
+        Payroll.objects.filter(month=month, year=year, employee__employment_status='active')
+        .select_related('employee').order_by('employee__full_name', 'employee_id')
+    )
+    return [serialize_payroll(payroll, month, year) for payroll in payrolls]
+
+
+def trigger_payroll_run(month, year, key=None, requested_by=None, today=None, engine=None, wait=None):
+    """
+    Generate the month's payroll at most once per concurrent burst of triggers.
+
+    The first trigger computes; the others wait up to ``wait`` seconds
+    (PAYROLL_RUN_WAIT) for it and return its rows. Returns (run, rows); rows
+    is None when the shared run is still running or failed.
+    """
+    if engine and engine not in PAYROLL_ENGINES:
+        raise ValueError(f"Unknown payroll engine, use one of {PAYROLL_ENGINES}")
+    run, started = claim_payroll_run(month, year, key, requested_by)
+    if started:
+        return run, execute_payroll_run(run, today, engine)
+    if wait is None:
+        wait = getattr(settings, 'PAYROLL_RUN_WAIT', 30)
+    run = wait_for_run(run, wait)
+    if run.status != 'completed':
+        return run, None
+    return run, payroll_rows(month, year)
+
+
+def serialize_run(run):
+    return {
+        'run_id': run.id,
+        'month': run.month,
+        'year': run.year,
+        'status': run.status,
+        'idempotency_key': run.idempotency_key,
+        'employees': run.employees,
+        'created': run.created,
+        'error': run.error or None,
+        'started_at': run.started_at,
+        'finished_at': run.finished_at,
+    }
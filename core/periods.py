@@ -0,0 +1,35 @@
+from datetime import date
+
+from django.db.models import Q
+
+
+def month_bounds(month, year):
+    """Return the half-open [start, end) date range of a month."""
+    start = date(year, month, 1)
+    if month == 12:
+        return start, date(year + 1, 1, 1)
+    return start, date(year, month + 1, 1)
+
+
+def year_bounds(year):
+    """Return the half-open [start, end) date range of a year."""
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+
+def _in_range(field, start, end):
+    return Q(**{f'{field}__gte': start, f'{field}__lt': end})
+
+
+def in_month(field, month, year):
+    """
+    Q matching ``field`` inside a month.
+
+    Use instead of ``field__month=``/``field__year=``: those wrap the column in
+    EXTRACT() and the database can no longer use an index on it.
+    """
+    return _in_range(field, *month_bounds(month, year))
+
+
+def in_year(field, year):
+    """Q matching ``field`` inside a year; see in_month."""
+    return _in_range(field, *year_bounds(year))
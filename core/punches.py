@@ -0,0 +1,154 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Max, Min, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .attendance import BATCH_SIZE, RowError
+from .models import Attendance, Employee, PunchEvent, Watermark
+from .monthly_stats import refresh_employee_days
+from .payroll_marks import mark_employee_days
+from .signals import refresh_dashboard_on_commit
+
+ROLLUP = 'attendance_rollup'
+EMPLOYEE_CHUNK = 1000
+
+
+def validate_punch(row, active_ids):
+    try:
+        employee_id = int(row.get('employee_id'))
+    except (TypeError, ValueError):
+        raise RowError("employee_id is required")
+    if employee_id not in active_ids:
+        raise RowError("Employee not found")
+    try:
+        punched_at = parse_datetime(row.get('punched_at') or '')
+    except ValueError:
+        punched_at = None
+    if punched_at is None:
+        raise RowError("Invalid punched_at, use an ISO 8601 date and time")
+    if timezone.is_naive(punched_at):
+        punched_at = timezone.make_aware(punched_at)
+    return PunchEvent(employee_id=employee_id, punched_at=punched_at, source=str(row.get('source') or '')[:50])
+
+
+def ingest_punches(rows, batch_size=BATCH_SIZE):
+    """
+    Append validated (row number, dict) punches to the event log.
+
+    Plain INSERTs only: no conflicts to resolve and no Attendance rows touched,
+    the rollup derives those later. Returns {'rows', 'accepted', 'errors'}.
+    """
+    active_ids = set(Employee.objects.filter(employment_status='active').values_list('id', flat=True))
+    result = {'rows': 0, 'accepted': 0, 'errors': []}
+    batch = []
+    for number, row in rows:
+        result['rows'] += 1
+        try:
+            if isinstance(row, RowError):
+                raise row
+            batch.append(validate_punch(row, active_ids))
+        except RowError as e:
+            result['errors'].append({'row': number, 'error': str(e)})
+            continue
+        result['accepted'] += 1
+        if len(batch) >= batch_size:
+            PunchEvent.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        PunchEvent.objects.bulk_create(batch)
+    return result
+
+
+def day_status(check_in, check_out):
+    """present / late / absent of a day from its first and last punch."""
+    min_hours = getattr(settings, 'ATTENDANCE_MIN_HOURS', 4)
+    late_after = time.fromisoformat(getattr(settings, 'ATTENDANCE_LATE_AFTER', '09:15'))
+    if check_out:
+        worked = datetime.combine(datetime.min, check_out) - datetime.combine(datetime.min, check_in)
+        if worked < timedelta(hours=min_hours):
+            return 'absent'
+    return 'late' if check_in > late_after else 'present'
+
+
+def _touched_days(last_id, high, since):
+    events = PunchEvent.objects.filter(id__lte=high)
+    if since is None:
+        events = events.filter(id__gt=last_id)
+    else:
+        events = events.filter(Q(id__gt=last_id) | Q(received_at__gte=since))
+    return set(
+        events.annotate(day=TruncDate('punched_at')).order_by().values_list('employee_id', 'day').distinct()
+    )
+
+
+def _day_rows(touched):
+    """Attendance rows (first in, last out) for the touched (employee_id, day) pairs."""
+    days = sorted({day for _, day in touched})
+    start = timezone.make_aware(datetime.combine(days[0], time.min))
+    end = timezone.make_aware(datetime.combine(days[-1] + timedelta(days=1), time.min))
+    employee_ids = sorted({employee_id for employee_id, _ in touched})
+
+    rows = []
+    for i in range(0, len(employee_ids), EMPLOYEE_CHUNK):
+        spans = (
+            PunchEvent.objects.filter(
+                employee_id__in=employee_ids[i:i + EMPLOYEE_CHUNK], punched_at__gte=start, punched_at__lt=end,
+            )
+            .annotate(day=TruncDate('punched_at'))
+            .order_by()
+            .values('employee_id', 'day')
+            .annotate(first=Min('punched_at'), last=Max('punched_at'), punches=Count('id'))
+        )
+        for span in spans:
+            if (span['employee_id'], span['day']) not in touched:
+                continue
+            check_in = timezone.localtime(span['first']).time().replace(microsecond=0)
+            check_out = None
+            if span['punches'] > 1:
+                check_out = timezone.localtime(span['last']).time().replace(microsecond=0)
+            rows.append(Attendance(
+                employee_id=span['employee_id'], attendance_date=span['day'],
+                check_in_time=check_in, check_out_time=check_out, status=day_status(check_in, check_out),
+            ))
+    return rows
+
+
+def rollup_attendance(now=None):
+    """
+    Derive the daily Attendance rows of every day that got punches since the last run.
+
+    Events are located by id above the watermark. Events received within
+    ATTENDANCE_ROLLUP_GRACE seconds of the previous run are re-read as well,
+    because ids of concurrent inserts can commit out of order. Only the
+    touched employee-days are re-aggregated and upserted.
+    """
+    now = now or timezone.now()
+    grace = timedelta(seconds=getattr(settings, 'ATTENDANCE_ROLLUP_GRACE', 300))
+    Watermark.objects.get_or_create(name=ROLLUP)
+    with transaction.atomic():
+        mark = Watermark.objects.select_for_update().get(name=ROLLUP)
+        high = PunchEvent.objects.aggregate(high=Max('id'))['high'] or mark.position
+        since = mark.updated_at - grace if mark.updated_at else None
+        touched = _touched_days(mark.position, high, since)
+
+        rows = _day_rows(touched) if touched else []
+        if rows:
+            target = {}
+            if connection.features.supports_update_conflicts_with_target:
+                target['unique_fields'] = ['employee', 'attendance_date']
+            Attendance.objects.bulk_create(
+                rows, update_conflicts=True, update_fields=['check_in_time', 'check_out_time', 'status'], **target
+            )
+            refresh_employee_days(touched)
+            mark_employee_days(touched)
+            refresh_dashboard_on_commit('attendance')
+
+        result = {'events_from': mark.position, 'events_to': high, 'days': len(rows)}
+        mark.position = high
+        mark.updated_at = now
+        mark.save(update_fields=['position', 'updated_at'])
+    return result
@@ -0,0 +1,165 @@
+import os
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Sum
+
+from .models import (
+    Complaint, Employee, EmployeeInsurance, MonthlyCompanyReport, MonthlyEmployeeReport, MonthlyEmployeeStats,
+    Payroll,
+)
+from .monthly_stats import ensure_monthly_stats
+from .periods import in_month
+
+
+def employee_reports_folder():
+    base_folder = os.path.join(settings.MEDIA_ROOT, "employee_reports")
+    os.makedirs(base_folder, exist_ok=True)
+    return base_folder
+
+
+def generate_employee_report(emp, month, year, base_folder=None):
+    """Write (or rewrite) the monthly .txt report of one employee."""
+    base_folder = base_folder or employee_reports_folder()
+
+    MonthlyEmployeeReport.objects.filter(employee=emp, month=month, year=year).delete()
+
+    payroll_status = "Pending"
+    if Payroll.objects.filter(status='paid', month=month, year=year, employee=emp).exists():
+        payroll_status = "Paid"
+
+    stats = MonthlyEmployeeStats.objects.filter(employee=emp, month=month, year=year).first()
+    present_days = stats.present_days if stats else 0
+    absent_days = stats.absent_days if stats else 0
+    leaves = stats.approved_leaves if stats else 0
+
+    insurance_exp = EmployeeInsurance.objects.filter(
+        in_month('end_date', month, year),
+        employee=emp,
+    ).count()
+
+    total_comp = Complaint.objects.filter(employee=emp).count()
+    resolved_comp = Complaint.objects.filter(employee=emp, status="resolved").count()
+    unresolved_comp = total_comp - resolved_comp
+
+    content = f"""
+Employee Monthly Report
+=======================
+
+Employee Name: {emp.full_name}
+Employee ID: {emp.id}
+Month: {month}-{year}
+
+Attendance
+----------
+Present: {present_days}
+Absent: {absent_days}
+
+Leaves Approved: {leaves}
+
+Insurance Expiring This Month: {insurance_exp}
+
+Complaints:
+  Total: {total_comp}
+  Resolved: {resolved_comp}
+  Unresolved: {unresolved_comp}
+
+Payroll for {month}, {year}: {payroll_status}
+"""
+
+    file_name = f"employee_{emp.full_name}_{month}_{year}.txt"
+    file_path = os.path.join(base_folder, file_name)
+
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+    MonthlyEmployeeReport.objects.create(
+        employee=emp,
+        month=month,
+        year=year,
+        report_file=file_path,
+        generated_at=datetime.now().replace(second=0, microsecond=0)
+    )
+
+    return {
+        "employee_id": emp.id,
+        "file_path": file_path,
+        "status": "created",
+        "generated_on": datetime.now().replace(second=0, microsecond=0)
+    }
+
+
+def generate_company_report(month, year):
+
+    exists = MonthlyCompanyReport.objects.filter(
+        month=month,
+        year=year
+    ).first()
+
+    if exists:
+        return {
+            "status": "already_exists",
+            "file_path": os.path.join(settings.MEDIA_ROOT, exists.report_file),
+            "generated_on": datetime.now().replace(second=0, microsecond=0)
+        }
+
+    total_employees = Employee.objects.filter(employment_status='active').count()
+
+    ensure_monthly_stats(month, year)
+    totals = MonthlyEmployeeStats.objects.filter(month=month, year=year).aggregate(
+        presents=Sum('present_days'),
+        absents=Sum('absent_days'),
+        leaves=Sum('approved_leaves'),
+    )
+    presents = totals['presents'] or 0
+    absents = totals['absents'] or 0
+    leaves = totals['leaves'] or 0
+
+    insurance_expiring = EmployeeInsurance.objects.filter(in_month('end_date', month, year)).count()
+
+    total_complaints = Complaint.objects.count()
+    resolved = Complaint.objects.filter(status="resolved").count()
+    unresolved = total_complaints - resolved
+
+    content = f"""
+Company Monthly Report
+======================
+
+Month: {month}-{year}
+
+Total Active Employees: {total_employees}
+
+Attendance Summary:
+  Present: {presents}
+  Absent: {absents}
+
+Approved Leaves: {leaves}
+
+Insurance Expiring This Month: {insurance_expiring}
+
+Complaints:
+  Total: {total_complaints}
+  Resolved: {resolved}
+  Unresolved: {unresolved}
+"""
+
+    folder = os.path.join(settings.MEDIA_ROOT, "company_reports")
+    os.makedirs(folder, exist_ok=True)
+
+    file_name = f"company_report_{month}_{year}.txt"
+    file_path = os.path.join(folder, file_name)
+
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+    MonthlyCompanyReport.objects.create(
+        month=month,
+        year=year,
+        report_file=file_path,
+    )
+
+    return {
+        "status": "created",
+        "file_path": file_path,
+        "generated_on": datetime.now().replace(second=0, microsecond=0)
+    }
@@ -0,0 +1,204 @@
+from .models import (
+    Attendance, Complaint, Department, Designation, Employee, InsurancePlan, InterviewedCandidate,
+    LeaveApplication, LeaveType, Payroll,
+)
+from .pagination import apaginated_response, field_spec, paginated_response
+
+
+def or_na(value):
+    return value if value else 'N/A'
+
+
+class Payload:
+    """
+    The declared shape of an endpoint's rows.
+
+    ``fields`` maps output keys to a model path (``'department__department_name'``)
+    or ``(path, transform)``; paths follow foreign keys only. From those paths
+    the payload knows which relations it needs: list endpoints fetch them as
+    joins through ``.values()`` in ``page()``, and single objects are loaded
+    with the matching ``select_related`` and ``only`` in ``queryset()``.
+    """
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = fields
+
+    def _walk(self, path):
+        """The fields along ``path``."""
+        model, steps = self.model, []
+        for part in path.split('__'):
+            field = model._meta.get_field(part)
+            if field.one_to_many or field.many_to_many:
+                raise ValueError(f"{path}: to-many relations are not supported")
+            steps.append(field)
+            model = field.related_model
+        return steps
+
+    def relations(self):
+        """select_related paths needed by the fields."""
+        select = set()
+        for path, _ in map(field_spec, self.fields.values()):
+            names = [field.name for field in self._walk(path)[:-1]]
+            select.update('__'.join(names[:i]) for i in range(1, len(names) + 1))
+        # Drop paths implied by a longer one, e.g. 'employee' by 'employee__department'.
+        return sorted(p for p in select if not any(o.startswith(p + '__') for o in select))
+
+    def only_fields(self):
+        return sorted({
+            '__'.join(field.name for field in self._walk(path)) for path, _ in map(field_spec, self.fields.values())
+        })
+
+    def queryset(self, queryset=None):
+        queryset = self.model.objects.all() if queryset is None else queryset
+        select = self.relations()
+        if select:
+            queryset = queryset.select_related(*select)
+        return queryset.only(*self.only_fields())
+
+    def serialize(self, obj):
+        """Row dict of one instance loaded through ``queryset()``."""
+        row = {}
+        for key, spec in self.fields.items():
+            path, transform = field_spec(spec)
+            value = _follow(obj, path.split('__'))
+            row[key] = transform(value) if transform else value
+        return row
+
+    def page(self, request, key, queryset=None, **extra):
+        """Cursor-paginated JsonResponse of ``queryset`` (all rows by default)."""
+        queryset = self.model.objects.all() if queryset is None else queryset
+        return paginated_response(request, key, queryset, self.fields, **extra)
+
+    async def apage(self, request, key, queryset=None, **extra):
+        """page() for async views."""
+        queryset = self.model.objects.all() if queryset is None else queryset
+        return await apaginated_response(request, key, queryset, self.fields, **extra)
+
+
+def _follow(obj, parts):
+    for part in parts:
+        if obj is None:
+            return None
+        obj = getattr(obj, part)
+    return obj
+
+
+EMPLOYEE_LIST = Payload(Employee, {
+    'id': 'id',
+    'full_name': 'full_name',
+    'email': 'email',
+    'phone_number': 'phone',
+    'employment_status': 'employment_status',
+    'joining_date': 'joining_date',
+    'termination_date': ('termination_date', or_na),
+})
+
+EMPLOYEE_DETAIL = Payload(Employee, {
+    'full_name': 'full_name',
+    'email': 'email',
+    'phone_number': 'phone',
+    'department': 'department__department_name',
+    'designation': 'designation__designation_name',
+    'employment_status': 'employment_status',
+    'joining_date': 'joining_date',
+    'termination_date': ('termination_date', or_na),
+})
+
+DEPARTMENT_EMPLOYEES = Payload(Employee, {
+    'full_name': 'full_name',
+    'email': 'email',
+    'phone_number': 'phone',
+    'designation': 'designation__designation_name',
+    'employment_status': 'employment_status',
+    'joining_date': 'joining_date',
+    'termination_date': ('termination_date', or_na),
+})
+
+OLD_EMPLOYEES = Payload(Employee, {
+    'full_name': 'full_name',
+    'email': 'email',
+    'phone_number': 'phone',
+    'department': 'department__department_name',
+    'designation': 'designation__designation_name',
+    'joining_date': 'joining_date',
+    'termination_date': 'termination_date',
+})
+
+DEPARTMENTS = Payload(Department, {
+    'id': 'id',
+    'department_name': 'department_name',
+})
+
+DESIGNATIONS = Payload(Designation, {
+    'id': 'id',
+    'designation_name': 'designation_name',
+})
+
+CANDIDATES = Payload(InterviewedCandidate, {
+    'id': 'id',
+    'full_name': 'full_name',
+    'email': 'email',
+    'phone_number': 'phone',
+    'position_applied': 'applied_position__designation_name',
+    'interview_date': 'interview_date',
+    'status': 'status',
+    'remarks': 'remarks',
+    'department': 'department__department_name',
+    'interviewer': 'interviewer__full_name',
+})
+
+PAYROLL_HISTORY = Payload(Payroll, {
+    "employee": ("employee__full_name", lambda name: name if name is not None else "Employee Deleted"),
+    "net_salary": "net_salary",
+    "month": "month",
+    "year": "year",
+    "status": "status",
+})
+
+LEAVE_TYPES = Payload(LeaveType, {
+    'id': 'id',
+    'leave_type_name': 'leave_type_name',
+    'description': 'policy_description',
+    'max_days_allowed': 'max_days_per_year',
+})
+
+LEAVE_APPLICATIONS = Payload(LeaveApplication, {
+    'id': 'id',
+    'employee_id': 'employee_id',
+    'full_name': 'employee__full_name',
+    'leave_id': 'leave_type_id',
+    'leave_type_name': 'leave_type__leave_type_name',
+    'start_date': 'start_date',
+    'end_date': 'end_date',
+    'total_days': 'total_days',
+    'status': 'status',
+    'applied_date': 'applied_date',
+})
+
+ATTENDANCE = Payload(Attendance, {
+    "employee_id": "employee_id",
+    "employee_name": "employee__full_name",
+    "date": "attendance_date",
+    "check_in_time": "check_in_time",
+    "check_out_time": "check_out_time",
+    "status": "status",
+})
+
+INSURANCE_PLANS = Payload(InsurancePlan, {
+    'id': 'id',
+    'plan_name': 'plan_name',
+    'coverage': ('coverage_amount', str),
+    'premium': ('premium_amount', str),  # convert Decimal to string for JSON
+    'policy terms': 'policy_terms'
+})
+
+COMPLAINTS = Payload(Complaint, {
+    "id": "id",
+    "employee_id": "employee_id",
+    "employee_name": "employee__full_name",
+    "title": "subject",
+    "description": "description",
+    "status": "status",
+    "created_at": "filed_date"
+})
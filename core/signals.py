@@ -0,0 +1,83 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from .metrics import count_connection
+from .models import Attendance, Department, Employee, EmployeeInsurance, LeaveApplication
+from .monthly_stats import refresh_for_instance, remember_previous_keys
+from .payroll_marks import mark_for_insurance, mark_for_instance, mark_for_salary, remember_previous_salary
+from .stats import (
+    DELTA_COUNTERS, DELTA_FIELDS, apply_dashboard_deltas, dashboard_deltas, refresh_dashboard_stats,
+)
+
+# Dashboard counter groups (see core.stats.COUNTERS) still recomputed after a
+# change of these models, with the fields that trigger it (none: every save).
+# All other counters move by deltas (see core.stats.DELTA_COUNTERS), applied in
+# the writer's transaction: they roll back with it, and a recompute queued for
+# commit by a bulk write in the same transaction overwrites them rather than
+# adding to them.
+DASHBOARD_GROUPS = {
+    Employee: (('employees',), ('department_id', 'joining_date')),
+    Department: (('employees',), ()),
+}
+
+# Models feeding MonthlyEmployeeStats (see core.monthly_stats); their changes also mark payrolls stale
+# (see core.payroll_marks), as do insurance and salary changes.
+MONTHLY_STATS_SOURCES = [Attendance, LeaveApplication]
+
+
+def refresh_dashboard_on_commit(*groups):
+    transaction.on_commit(partial(refresh_dashboard_stats, *groups))
+
+
+def _dashboard_fields(model):
+    return DELTA_FIELDS[model] + DASHBOARD_GROUPS.get(model, ((), ()))[1]
+
+
+def _dashboard_row(model, instance):
+    return {field: getattr(instance, field) for field in _dashboard_fields(model)}
+
+
+def remember_dashboard_row(sender, instance, **kwargs):
+    """pre_save: the fields the dashboard follows, as stored before the edit."""
+    instance._dashboard_previous = None
+    fields = _dashboard_fields(sender)
+    if instance.pk and fields:
+        instance._dashboard_previous = sender.objects.filter(pk=instance.pk).values(*fields).first()
+
+
+def _dashboard_save(sender, instance, created=False, **kwargs):
+    current = _dashboard_row(sender, instance)
+    previous = None if created else getattr(instance, '_dashboard_previous', None) or current
+    apply_dashboard_deltas(dashboard_deltas(sender, previous, current))
+    groups, fields = DASHBOARD_GROUPS.get(sender, ((), ()))
+    if groups and (created or not fields or any(previous[field] != current[field] for field in fields)):
+        refresh_dashboard_on_commit(*groups)
+
+
+def _dashboard_delete(sender, instance, **kwargs):
+    apply_dashboard_deltas(dashboard_deltas(sender, _dashboard_row(sender, instance), None))
+    groups, _ = DASHBOARD_GROUPS.get(sender, ((), ()))
+    if groups:
+        refresh_dashboard_on_commit(*groups)
+
+
+def connect_signals():
+    for model in DELTA_COUNTERS:
+        pre_save.connect(remember_dashboard_row, sender=model, dispatch_uid=f'dashboard_pre_save_{model.__name__}')
+        post_save.connect(_dashboard_save, sender=model, dispatch_uid=f'dashboard_save_{model.__name__}')
+        post_delete.connect(_dashboard_delete, sender=model, dispatch_uid=f'dashboard_delete_{model.__name__}')
+    for model in MONTHLY_STATS_SOURCES:
+        name = model.__name__
+        pre_save.connect(remember_previous_keys, sender=model, dispatch_uid=f'monthly_stats_pre_save_{name}')
+        post_save.connect(refresh_for_instance, sender=model, dispatch_uid=f'monthly_stats_save_{name}')
+        post_delete.connect(refresh_for_instance, sender=model, dispatch_uid=f'monthly_stats_delete_{name}')
+        post_save.connect(mark_for_instance, sender=model, dispatch_uid=f'payroll_marks_save_{name}')
+        post_delete.connect(mark_for_instance, sender=model, dispatch_uid=f'payroll_marks_delete_{name}')
+    post_save.connect(mark_for_insurance, sender=EmployeeInsurance, dispatch_uid='payroll_marks_save_EmployeeInsurance')
+    post_delete.connect(mark_for_insurance, sender=EmployeeInsurance, dispatch_uid='payroll_marks_delete_EmployeeInsurance')
+    pre_save.connect(remember_previous_salary, sender=Employee, dispatch_uid='payroll_marks_pre_save_Employee')
+    post_save.connect(mark_for_salary, sender=Employee, dispatch_uid='payroll_marks_save_Employee')
+    connection_created.connect(count_connection, dispatch_uid='metrics_connection_created')
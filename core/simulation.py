@@ -0,0 +1,175 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
+
+from .models import Designation, Employee, Payroll
+from .monthly_stats import overtime_counts
+from .payroll import CENT, PayrollInputs, compute_payroll, tenure_years
+
+# The rules compute_payroll applies today.
+DEFAULT_RULES = {
+    'tenure_rate': Decimal('1'),        # bonus % per year of tenure
+    'tenure_cap': Decimal('10'),        # maximum tenure bonus %
+    'overtime_hours': Decimal('8'),     # a present day longer than this is overtime
+    'overtime_rate': Decimal('0.5'),    # bonus % of salary per overtime day
+    'absence_divisor': Decimal('30'),   # an uncovered absence costs salary / divisor
+}
+MAX_MONTHS = 24
+TOTAL_KEYS = ['bonuses', 'deductions', 'net_salary']
+
+
+class SimulationError(ValueError):
+    pass
+
+
+def _mapping(value, name):
+    if not isinstance(value or {}, dict):
+        raise SimulationError(f"{name} must be an object")
+    return value or {}
+
+
+def parse_rules(overrides):
+    rules = dict(DEFAULT_RULES)
+    for name, value in _mapping(overrides, 'rules').items():
+        if name not in DEFAULT_RULES:
+            raise SimulationError(f"Unknown rule {name!r}, use one of {list(DEFAULT_RULES)}")
+        try:
+            value = Decimal(str(value))
+        except InvalidOperation:
+            raise SimulationError(f"Rule {name!r} must be a number")
+        if value < 0 or (name == 'absence_divisor' and value == 0):
+            raise SimulationError(f"Rule {name!r} is out of range")
+        rules[name] = value
+    return rules
+
+
+def parse_salaries(overrides):
+    """Designation name -> basic salary used for every employee of that designation."""
+    salaries = {}
+    for name, value in _mapping(overrides, 'salaries').items():
+        try:
+            salaries[name] = Decimal(str(value))
+        except InvalidOperation:
+            raise SimulationError(f"Salary of {name!r} must be a number")
+        if salaries[name] <= 0:
+            raise SimulationError(f"Salary of {name!r} must be positive")
+    unknown = set(salaries) - set(Designation.objects.filter(designation_name__in=salaries).values_list(
+        'designation_name', flat=True))
+    if unknown:
+        raise SimulationError(f"Unknown designation(s) {sorted(unknown)}")
+    return salaries
+
+
+def parse_periods(data):
+    """[(month, year)] from {'month', 'year'} or an inclusive {'from': 'YYYY-MM', 'to': 'YYYY-MM'} range."""
+    data = _mapping(data, 'The request body')
+    try:
+        if data.get('from') or data.get('to'):
+            start_year, start_month = map(int, str(data['from']).split('-'))
+            end_year, end_month = map(int, str(data['to']).split('-'))
+        else:
+            start_month = end_month = int(data['month'])
+            start_year = end_year = int(data['year'])
+    except (KeyError, TypeError, ValueError):
+        raise SimulationError("Give month and year, or from and to as YYYY-MM")
+    if not (1 <= start_month <= 12 and 1 <= end_month <= 12):
+        raise SimulationError("Months must be between 1 and 12")
+    periods = []
+    month, year = start_month, start_year
+    while (year, month) <= (end_year, end_month):
+        periods.append((month, year))
+        month, year = (1, year + 1) if month == 12 else (month + 1, year)
+    if not periods:
+        raise SimulationError("from cannot be after to")
+    if len(periods) > MAX_MONTHS:
+        raise SimulationError(f"At most {MAX_MONTHS} months per simulation")
+    return periods
+
+
+def simulated_payroll(salary, tenure, absences, overtime, insurance, rules):
+    """(bonuses, deductions, net_salary) of one employee-month under ``rules``."""
+    percentage = min(tenure * rules['tenure_rate'], rules['tenure_cap'])
+    bonus = salary * percentage / 100 + overtime * salary * rules['overtime_rate'] / 100
+    deductions = absences * salary / rules['absence_divisor'] + insurance
+    return bonus, deductions, salary + bonus - deductions
+
+
+def simulate_payroll(periods, rules=None, salaries=None, today=None):
+    """
+    Payroll totals of ``periods`` under overridden rules, without writing anything.
+
+    Every active employee is simulated against a baseline: the stored Payroll
+    row of the month where there is one, otherwise the current rules. Inputs
+    are bulk-loaded per month (monthly stats, insurance, existing payrolls,
+    plus one attendance GROUP BY when overtime_hours is changed). Returns
+    totals and per-department totals with their deltas, in cents.
+    """
+    rules = rules or dict(DEFAULT_RULES)
+    salaries = salaries or {}
+    today = today or date.today()
+    employees = list(
+        Employee.objects.filter(employment_status='active')
+        .select_related('department', 'designation')
+        .only('id', 'basic_salary', 'joining_date', 'department__department_name', 'designation__designation_name')
+        .order_by('id')
+    )
+    active = Employee.objects.filter(employment_status='active').values('id')
+    tenure = {emp.id: tenure_years(emp.joining_date, today) for emp in employees}
+    overtime_after = timedelta(hours=float(rules['overtime_hours']))
+
+    zero = dict.fromkeys(TOTAL_KEYS, Decimal('0'))
+    departments = defaultdict(lambda: {'employees': set(), 'baseline': dict(zero), 'simulated': dict(zero)})
+    for month, year in periods:
+        inputs = PayrollInputs(month, year, active)
+        overtime = inputs.overtime_days
+        if rules['overtime_hours'] != DEFAULT_RULES['overtime_hours']:
+            overtime = overtime_counts(month, year, overtime_after, active)
+        stored = {
+            row[0]: row[1:]
+            for row in Payroll.objects.filter(month=month, year=year, employee__in=active)
+            .order_by().values_list('employee_id', *TOTAL_KEYS)
+        }
+
+        for emp in employees:
+            totals = departments[emp.department.department_name if emp.department else None]
+            totals['employees'].add(emp.id)
+            baseline = stored.get(emp.id)
+            if baseline is None:
+                bonus, _, deductions = compute_payroll(emp, inputs, today)
+                baseline = (bonus, deductions, emp.basic_salary + bonus - deductions)
+            simulated = simulated_payroll(
+                salaries.get(emp.designation.designation_name if emp.designation else None, emp.basic_salary),
+                tenure[emp.id],
+                inputs.uncovered_absences.get(emp.id, 0),
+                overtime.get(emp.id, 0),
+                sum(inputs.insurance.get(emp.id, ()), Decimal('0')),
+                rules,
+            )
+            # Rounded per employee-month, as a Payroll row stores them.
+            for key, old, new in zip(TOTAL_KEYS, baseline, simulated):
+                totals['baseline'][key] += old.quantize(CENT)
+                totals['simulated'][key] += new.quantize(CENT)
+
+    def cents(values):
+        return {key: str(value.quantize(CENT) + 0) for key, value in values.items()}
+
+    def with_delta(totals):
+        delta = {key: totals['simulated'][key] - totals['baseline'][key] for key in TOTAL_KEYS}
+        return {'baseline': cents(totals['baseline']), 'simulated': cents(totals['simulated']), 'delta': cents(delta)}
+
+    company = {'baseline': dict(zero), 'simulated': dict(zero)}
+    for totals in departments.values():
+        for side in ('baseline', 'simulated'):
+            for key in TOTAL_KEYS:
+                company[side][key] += totals[side][key]
+    return {
+        'periods': [{'month': month, 'year': year} for month, year in periods],
+        'rules': {name: str(value) for name, value in rules.items()},
+        'salaries': {name: str(value) for name, value in salaries.items()},
+        'employees': len(employees),
+        'totals': with_delta(company),
+        'departments': [
+            {'department': name, 'employees': len(totals['employees']), **with_delta(totals)}
+            for name, totals in sorted(departments.items(), key=lambda item: str(item[0]))
+        ],
+    }
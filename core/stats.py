@@ -0,0 +1,191 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from .models import (
+    Attendance, Complaint, DashboardStats, Department, Employee, EmployeeInsurance, LeaveApplication,
+    MonthlyEmployeeStats, Payroll,
+)
+
+STATS_PK = 1
+
+
+def _employee_counters():
+    today = date.today()
+    start_of_month = today.replace(day=1)
+    last_day_prev_month = start_of_month - timedelta(days=1)
+    first_day_prev_month = last_day_prev_month.replace(day=1)
+
+    employees_per_department = Employee.objects.values('department__department_name').annotate(
+        count=Count('id')
+    )
+    return {
+        'employees_per_department': [
+            {"department": d['department__department_name'], "employee_count": d['count']}
+            for d in employees_per_department
+        ],
+        'new_hires': Employee.objects.filter(joining_date__gte=start_of_month, joining_date__lte=today).count(),
+        'prev_hires': Employee.objects.filter(
+            joining_date__gte=first_day_prev_month,
+            joining_date__lte=last_day_prev_month
+        ).count(),
+        'hires_period': start_of_month,
+    }
+
+
+def _active_employee_counters():
+    return {'total_active_employees': Employee.objects.filter(employment_status="active").count()}
+
+
+def _department_counters():
+    return {'total_departments': Department.objects.count()}
+
+
+def _attendance_counters():
+    counts = MonthlyEmployeeStats.objects.aggregate(present=Sum('present_days'), absent=Sum('absent_days'))
+    return {'present_count': counts['present'] or 0, 'absent_count': counts['absent'] or 0}
+
+
+def _complaint_counters():
+    return {'unresolved_complaints': Complaint.objects.filter(status="open").count()}
+
+
+def _leave_counters():
+    return {'pending_leaves': LeaveApplication.objects.filter(status="pending").count()}
+
+
+def _insurance_counters():
+    return {'total_insurances': EmployeeInsurance.objects.count()}
+
+
+def _payroll_counters():
+    return {'total_payroll': Payroll.objects.aggregate(total=Sum('net_salary'))['total'] or 0}
+
+
+COUNTERS = {
+    'employees': _employee_counters,
+    'active_employees': _active_employee_counters,
+    'departments': _department_counters,
+    'attendance': _attendance_counters,
+    'complaints': _complaint_counters,
+    'leaves': _leave_counters,
+    'insurances': _insurance_counters,
+    'payroll': _payroll_counters,
+}
+
+
+# Counters that are a plain count or sum over rows, moved by F() deltas when a
+# single row is saved or deleted: model -> {counter: the row's contribution}.
+# A row is a dict of the model's DELTA_FIELDS.
+DELTA_COUNTERS = {
+    Employee: {'total_active_employees': lambda row: row['employment_status'] == 'active'},
+    Department: {'total_departments': lambda row: 1},
+    Attendance: {
+        'present_count': lambda row: row['status'] == 'present',
+        'absent_count': lambda row: row['status'] == 'absent',
+    },
+    Complaint: {'unresolved_complaints': lambda row: row['status'] == 'open'},
+    LeaveApplication: {'pending_leaves': lambda row: row['status'] == 'pending'},
+    EmployeeInsurance: {'total_insurances': lambda row: 1},
+    # Views assign amounts straight from the request body, as strings.
+    Payroll: {'total_payroll': lambda row: Decimal(str(row['net_salary']))},
+}
+DELTA_FIELDS = {
+    Employee: ('employment_status',),
+    Department: (),
+    Attendance: ('status',),
+    Complaint: ('status',),
+    LeaveApplication: ('status',),
+    EmployeeInsurance: (),
+    Payroll: ('net_salary',),
+}
+
+
+def dashboard_deltas(model, old, new):
+    """{counter: change} for a row of ``model`` going from ``old`` to ``new`` (field dicts; None = no row)."""
+    deltas = {}
+    for counter, value in DELTA_COUNTERS[model].items():
+        change = (value(new) if new is not None else 0) - (value(old) if old is not None else 0)
+        if change:
+            deltas[counter] = change
+    return deltas
+
+
+def apply_dashboard_deltas(deltas):
+    """Add ``deltas`` to the stored counters in one UPDATE; builds the row when there is none yet."""
+    if not deltas:
+        return
+    values = {counter: F(counter) + change for counter, change in deltas.items()}
+    if not DashboardStats.objects.filter(pk=STATS_PK).update(updated_at=timezone.now(), **values):
+        rebuild_dashboard_stats()
+
+
+def rebuild_dashboard_stats():
+    """Recompute every counter from scratch (repairs any drift)."""
+    values = {}
+    for counter in COUNTERS.values():
+        values.update(counter())
+    stats, _ = DashboardStats.objects.update_or_create(pk=STATS_PK, defaults=values)
+    return stats
+
+
+def refresh_dashboard_stats(*groups):
+    """
+    Recompute only the given counter groups, e.g. refresh_dashboard_stats('complaints').
+
+    For bulk writes that send no signals; single-row saves apply deltas instead.
+    """
+    values = {'updated_at': timezone.now()}
+    for group in groups:
+        values.update(COUNTERS[group]())
+    if not DashboardStats.objects.filter(pk=STATS_PK).update(**values):
+        rebuild_dashboard_stats()
+
+
+def get_dashboard_stats():
+    stats = DashboardStats.objects.filter(pk=STATS_PK).first()
+    if stats is None:
+        return rebuild_dashboard_stats()
+    if stats.hires_period != date.today().replace(day=1):
+        # New month: the hire counters are relative to the current month.
+        refresh_dashboard_stats('employees')
+        stats.refresh_from_db()
+    return stats
+
+
+async def aget_dashboard_stats():
+    """get_dashboard_stats() for async views: one async read, the rare rebuild runs in a thread."""
+    stats = await DashboardStats.objects.filter(pk=STATS_PK).afirst()
+    if stats is None or stats.hires_period != date.today().replace(day=1):
+        return await sync_to_async(get_dashboard_stats)()
+    return stats
+
+
+def serialize_dashboard(stats):
+    total_attendance = stats.present_count + stats.absent_count
+    if total_attendance > 0:
+        presence_ratio = round(stats.present_count / total_attendance, 2)
+        absence_ratio = round(stats.absent_count / total_attendance, 2)
+    else:
+        presence_ratio = 0
+        absence_ratio = 0
+
+    total_hires = stats.new_hires + stats.prev_hires
+    increase_in_hires_percentage = float(stats.new_hires / total_hires) * 100 if total_hires else 0
+
+    return {
+        "total_active_employees": stats.total_active_employees,
+        "presence_ratio": presence_ratio,
+        "absence_ratio": absence_ratio,
+        "unresolved_complaints": stats.unresolved_complaints,
+        "total_insurances": stats.total_insurances,
+        "total_departments": stats.total_departments,
+        "employees_per_department": stats.employees_per_department,
+        "pending_leaves": stats.pending_leaves,
+        "total_payroll": float(stats.total_payroll),
+        "increase_in_hires_percentage": increase_in_hires_percentage,
+        "new_hires": stats.new_hires
+    }
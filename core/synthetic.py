@@ -0,0 +1,206 @@
+import random
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from django.db.models import Max
+
+from .models import (
+    Attendance, Complaint, Department, Designation, Employee, EmployeeInsurance, InsurancePlan,
+    LeaveApplication, LeaveType, Payroll,
+)
+from .monthly_stats import refresh_monthly_stats
+from .periods import month_bounds
+from .stats import rebuild_dashboard_stats
+
+BATCH_SIZE = 5000
+
+DEPARTMENTS = {
+    'IT': ['Software Engineer', 'CTO', 'System Administrator', 'Manager'],
+    'HR': ['Manager', 'Recruiter'],
+    'Finance': ['Accountant', 'Financial Analyst', 'Manager'],
+    'Sales': ['Sales Executive', 'Manager'],
+    'Marketing': ['Marketing Executive', 'Manager'],
+    'Staff': ['Janitor', 'Cleaner'],
+}
+
+SALARIES = {
+    'Software Engineer': 80000,
+    'CTO': 150000,
+    'System Administrator': 60000,
+    'Manager': 100000,
+    'Recruiter': 40000,
+    'Accountant': 30000,
+    'Financial Analyst': 120000,
+    'Sales Executive': 55000,
+    'Marketing Executive': 65000,
+    'Janitor': 10000,
+    'Cleaner': 15000,
+}
+
+LEAVE_TYPES = [('Sick', 10, True), ('Casual', 12, True), ('Unpaid', 30, False)]
+INSURANCE_PLANS = [
+    ('Basic Health', Decimal('100000'), Decimal('500')),
+    ('Family Health', Decimal('300000'), Decimal('1200')),
+    ('Dental', Decimal('50000'), Decimal('250')),
+    ('Life', Decimal('1000000'), Decimal('900')),
+    ('Accident', Decimal('200000'), Decimal('300')),
+]
+COMPLAINT_SUBJECTS = ['Incorrect Payroll', 'Leave not approved', 'Equipment issue', 'Workplace conduct']
+
+
+def recent_months(months, today=None):
+    """[(month, year)] of the ``months`` months up to and including the current one, oldest first."""
+    today = today or date.today()
+    month, year = today.month, today.year
+    periods = []
+    for _ in range(months):
+        periods.append((month, year))
+        month, year = (12, year - 1) if month == 1 else (month - 1, year)
+    return periods[::-1]
+
+
+def _workdays(month, year, until):
+    day, end = month_bounds(month, year)
+    while day < end and day <= until:
+        if day.weekday() < 5:
+            yield day
+        day += timedelta(days=1)
+
+
+def _backdate(model, field, after_id, value):
+    """auto_now_add fields ignore the value given to bulk_create; set it afterwards."""
+    model.objects.filter(id__gt=after_id or 0).update(**{field: value})
+
+
+def seed_synthetic(employees, months, today=None, seed=0):
+    """
+    Bulk-create a realistic HR dataset of ``employees`` employees with ``months`` months of history.
+
+    Attendance, leaves and complaints cover every month up to ``today``;
+    payrolls are paid for every month but the current one, which is left for
+    payroll generation. Deterministic for a given ``seed``. Returns row counts.
+    """
+    rng = random.Random(seed)
+    today = today or date.today()
+    periods = recent_months(months, today)
+    counts = {}
+
+    departments = {}
+    designations = {}
+    for dept_name, positions in DEPARTMENTS.items():
+        departments[dept_name] = Department.objects.get_or_create(department_name=dept_name)[0]
+        for position in positions:
+            if position not in designations:
+                designations[position] = Designation.objects.get_or_create(designation_name=position)[0]
+    leave_types = [
+        LeaveType.objects.get_or_create(leave_type_name=name, defaults={'max_days_per_year': days, 'is_paid': paid})[0]
+        for name, days, paid in LEAVE_TYPES
+    ]
+    plans = [
+        InsurancePlan.objects.get_or_create(plan_name=name, defaults={'coverage_amount': cover, 'premium_amount': premium})[0]
+        for name, cover, premium in INSURANCE_PLANS
+    ]
+
+    offset = Employee.objects.aggregate(last=Max('id'))['last'] or 0
+    first_period = date(periods[0][1], periods[0][0], 1)
+    new_employees = []
+    for i in range(employees):
+        dept_name = rng.choice(list(DEPARTMENTS))
+        position = rng.choice(DEPARTMENTS[dept_name])
+        joined = first_period - timedelta(days=rng.randint(0, 5 * 365))
+        fired = rng.random() < 0.05
+        new_employees.append(Employee(
+            full_name=f"Synthetic Employee {offset + i}",
+            email=f"synthetic{offset + i}@example.com",
+            phone=f"0300{rng.randint(1000000, 9999999)}",
+            department=departments[dept_name],
+            designation=designations[position],
+            joining_date=joined,
+            termination_date=today - timedelta(days=rng.randint(1, 90)) if fired else None,
+            employment_status='fired' if fired else 'active',
+            basic_salary=Decimal(SALARIES[position] + rng.randint(-5, 5) * 1000),
+        ))
+    Employee.objects.bulk_create(new_employees, batch_size=BATCH_SIZE)
+    staff = list(Employee.objects.filter(id__gt=offset).only('id', 'basic_salary', 'employment_status', 'termination_date'))
+    counts['employees'] = len(staff)
+
+    enrollments = []
+    for emp in staff:
+        for plan in rng.sample(plans, rng.choice([0, 1, 1, 2])):
+            enrollments.append(EmployeeInsurance(
+                employee=emp, insurance_plan=plan,
+                start_date=first_period - timedelta(days=rng.randint(0, 365)),
+                end_date=today + timedelta(days=rng.randint(-60, 365)),
+                status='active' if emp.employment_status == 'active' else 'inactive',
+                monthly_deduction=(plan.premium_amount / 12).quantize(Decimal('0.01')),
+            ))
+    EmployeeInsurance.objects.bulk_create(enrollments, batch_size=BATCH_SIZE)
+    counts['insurances'] = len(enrollments)
+
+    counts.update(attendance=0, leaves=0, complaints=0, payrolls=0)
+    for month, year in periods:
+        start, _ = month_bounds(month, year)
+        workdays = list(_workdays(month, year, today))
+
+        attendance = []
+        for emp in staff:
+            for day in workdays:
+                if emp.termination_date and day >= emp.termination_date:
+                    break
+                roll = rng.random()
+                if roll < 0.05:
+                    attendance.append(Attendance(employee=emp, attendance_date=day, status='absent'))
+                    continue
+                check_in = time(9, rng.randint(0, 59)) if roll < 0.10 else time(8, rng.randint(30, 59))
+                attendance.append(Attendance(
+                    employee=emp, attendance_date=day, status='late' if roll < 0.10 else 'present',
+                    check_in_time=check_in, check_out_time=time(check_in.hour + rng.choice([8, 8, 9, 10]), check_in.minute),
+                ))
+        Attendance.objects.bulk_create(attendance, batch_size=BATCH_SIZE)
+        counts['attendance'] += len(attendance)
+
+        last_leave = LeaveApplication.objects.aggregate(last=Max('id'))['last']
+        leaves = []
+        for emp in staff:
+            if workdays and rng.random() < 0.3:
+                begin = rng.choice(workdays)
+                days = rng.randint(1, 5)
+                leaves.append(LeaveApplication(
+                    employee=emp, leave_type=rng.choice(leave_types), start_date=begin,
+                    end_date=begin + timedelta(days=days - 1), total_days=days,
+                    status=rng.choice(['approved', 'approved', 'approved', 'pending', 'rejected']),
+                ))
+        LeaveApplication.objects.bulk_create(leaves, batch_size=BATCH_SIZE)
+        _backdate(LeaveApplication, 'applied_date', last_leave, start)
+        counts['leaves'] += len(leaves)
+
+        last_complaint = Complaint.objects.aggregate(last=Max('id'))['last']
+        complaints = [
+            Complaint(
+                employee=emp, subject=rng.choice(COMPLAINT_SUBJECTS), description='Synthetic complaint',
+                status=rng.choice(['open', 'resolved', 'resolved']),
+            )
+            for emp in staff if rng.random() < 0.05
+        ]
+        Complaint.objects.bulk_create(complaints, batch_size=BATCH_SIZE)
+        _backdate(Complaint, 'filed_date', last_complaint, start)
+        counts['complaints'] += len(complaints)
+
+        if (month, year) != (today.month, today.year):
+            payrolls = []
+            for emp in staff:
+                bonus = Decimal(rng.choice([0, 0, 500, 1000]))
+                deduction = Decimal(rng.choice([0, 0, 0, 1500]))
+                payrolls.append(Payroll(
+                    employee=emp, month=month, year=year, bonuses=bonus, deductions=deduction,
+                    net_salary=emp.basic_salary + bonus - deduction, status='paid',
+                    payment_date=month_bounds(month, year)[1],
+                ))
+            Payroll.objects.bulk_create(payrolls, batch_size=BATCH_SIZE)
+            counts['payrolls'] += len(payrolls)
+
+    # bulk_create bypasses the signals that keep the dashboard row and monthly stats current.
+    for month, year in periods:
+        refresh_monthly_stats(month, year)
+    rebuild_dashboard_stats()
+    return counts
@@ -1,4 +1,1544 @@
-from django.test import TestCase
+import csv
+import json
+import random
+import sqlite3
+import tempfile
+import threading
+from collections import defaultdict
+from fractions import Fraction
+from io import StringIO
+from types import SimpleNamespace
+from unittest import skipUnless
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.utils import ConnectionHandler
+from django.db.models import F
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
 # Create your tests here.
 
+from datetime import date, time, timedelta, datetime
+
+from django.utils import timezone
+from decimal import Decimal
+
+from .models import (
+    Attendance, Department, Designation, Employee, EmployeeInsurance, InsurancePlan,
+    LeaveApplication, LeaveType, Payroll, BackgroundJob, MonthlyEmployeeReport, Complaint, DashboardStats,
+    MaintenanceTask, InterviewedCandidate, MonthlyEmployeeStats, PayrollDirtyMark, PayrollRun, PayrollRunLock,
+    Watermark,
+)
+from .attendance import ingest_attendance
+from .authz import AuthzCache, AuthContext, authorization_context, authz_cache
+from .dbpool import ConnectionPool, PoolTimeout, pools
+from .benchmarks import SESSION_REQUESTS, report, run_suite
+from .exports import EXPORTS, iter_rows
+from .intervals import IntervalIndex
+from .jobs import CHUNK_SIZE, claim_next_job, run_job
+from .login import HashingPool, LoginBusy, login_throttle
+from .maintenance import acquire_task, pay_payrolls, run_task
+from .metrics import registry
+from .monthly_stats import STAT_FIELDS, compute_monthly_stats, ensure_monthly_stats, rebuild_monthly_stats
+from . import payroll as payroll_module
+from . import payroll_runs
+from .payroll_runs import IdempotencyConflict, claim_payroll_run, execute_payroll_run, trigger_payroll_run
+from .periods import in_month
+from . import payroll_vector
+from .payroll import (
+    PayrollInputs, compute_payroll, generate_payrolls, recompute_dirty_payrolls, run_payroll, tenure_years,
+)
+from .punches import rollup_attendance
+from .reports import generate_company_report
+from . import serializers
+from .serializers import Payload
+from .simulation import parse_rules, parse_salaries, simulate_payroll
+from .stats import get_dashboard_stats, rebuild_dashboard_stats, serialize_dashboard
+from .synthetic import seed_synthetic
+
+
+def seed_payroll_dataset():
+    it = Department.objects.create(department_name='IT')
+    hr = Department.objects.create(department_name='HR')
+    engineer = Designation.objects.create(designation_name='Software Engineer')
+    manager = Designation.objects.create(designation_name='Manager')
+
+    employees = [
+        Employee.objects.create(
+            full_name=f'Employee {i}', email=f'employee{i}@example.com',
+            department=it if i % 2 else hr, designation=engineer if i % 3 else manager,
+            joining_date=date(2024 - i, 1 + i % 12, 1 + i % 27),
+            basic_salary=Decimal(80000 + 1234 * i) + Decimal('0.35') * i,
+        )
+        for i in range(8)
+    ]
+    Employee.objects.create(
+        full_name='Gone', email='gone@example.com', department=it, designation=engineer,
+        joining_date=date(2020, 1, 1), basic_salary=Decimal('50000'), employment_status='fired',
+    )
+
+    paid = LeaveType.objects.create(leave_type_name='Sick', max_days_per_year=10, is_paid=True)
+    unpaid = LeaveType.objects.create(leave_type_name='Unpaid', max_days_per_year=10, is_paid=False)
+    plan = InsurancePlan.objects.create(plan_name='Health')
+
+    for i, emp in enumerate(employees):
+        for day in range(1, 29):
+            att_date = date(2025, 3, day)
+            if (day + i) % 5 == 0:
+                Attendance.objects.create(employee=emp, attendance_date=att_date, status='absent')
+            else:
+                hours = 9 if (day * i) % 4 == 0 else 8
+                Attendance.objects.create(
+                    employee=emp, attendance_date=att_date, status='present' if day % 7 else 'late',
+                    check_in_time=time(9, 0), check_out_time=time(9 + hours, 0),
+                )
+        if i % 2 == 0:
+            LeaveApplication.objects.create(
+                employee=emp, leave_type=paid, start_date=date(2025, 2, 25), end_date=date(2025, 3, 10),
+                total_days=14, status='approved',
+            )
+        if i % 3 == 0:
+            LeaveApplication.objects.create(
+                employee=emp, leave_type=unpaid, start_date=date(2025, 3, 11), end_date=date(2025, 3, 20),
+                total_days=10, status='approved',
+            )
+            LeaveApplication.objects.create(
+                employee=emp, leave_type=paid, start_date=date(2025, 3, 12), end_date=date(2025, 3, 18),
+                total_days=7, status='approved',
+            )
+        LeaveApplication.objects.create(
+            employee=emp, leave_type=paid, start_date=date(2025, 3, 20), end_date=date(2025, 3, 25),
+            total_days=6, status='pending',
+        )
+        for j in range(i % 3):
+            EmployeeInsurance.objects.create(
+                employee=emp, insurance_plan=plan, start_date=date(2024, 1, 1 + j),
+                end_date=date(2025, 2, 1) if j == 1 else date(2026, 1, 1),
+                monthly_deduction=Decimal('12.34') * (j + 1),
+            )
+    return employees
+
+
+def legacy_payroll(employee, month, year, today):
+    """The original per-employee payroll calculation from generate_payroll_view."""
+    start_date = date(year, month, 1)
+    total_deductions = Decimal('0.00')
+    absences = Attendance.objects.filter(
+        employee=employee, attendance_date__month=month, attendance_date__year=year, status='absent'
+    )
+    for absence in absences:
+        leave_exists = LeaveApplication.objects.filter(
+            employee=employee, status='approved', leave_type__is_paid=True,
+            start_date__lte=absence.attendance_date, end_date__gte=absence.attendance_date
+        ).exists()
+        if not leave_exists:
+            total_deductions += employee.basic_salary / Decimal("30")
+    for insurance in EmployeeInsurance.objects.filter(employee=employee, end_date__gte=start_date):
+        total_deductions += Decimal(insurance.monthly_deduction)
+    tenure_years = max(
+        0,
+        today.year - employee.joining_date.year -
+        ((today.month, today.day) < (employee.joining_date.month, employee.joining_date.day))
+    )
+    bonus_percentage = min(tenure_years, 10)
+    bonus = (employee.basic_salary * Decimal(bonus_percentage) / Decimal(100))
+    attendances = Attendance.objects.filter(
+        employee=employee, attendance_date__month=month, attendance_date__year=year, status='present'
+    )
+    for attendance in attendances:
+        if attendance.check_in_time and attendance.check_out_time:
+            work_duration = (
+                datetime.combine(attendance.attendance_date, attendance.check_out_time) -
+                datetime.combine(attendance.attendance_date, attendance.check_in_time)
+            )
+            if work_duration > timedelta(hours=8):
+                bonus += employee.basic_salary * Decimal('0.5') / Decimal('100')
+    return {
+        'bonuses': str(bonus),
+        'bonus_reason': f'{bonus_percentage}% tenure bonus and overtime',
+        'deductions': str(total_deductions),
+        'net_salary': str(employee.basic_salary + bonus - total_deductions),
+    }
+
+
+def login_as_hr(client):
+    hr_employee = Employee.objects.filter(department__department_name='HR').first()
+    authz_cache.clear()  # ids are reused across rolled-back tests
+    session = client.session
+    session['employee_id'] = hr_employee.id
+    session['department'] = 'HR'
+    session['authz_version'] = authorization_context(hr_employee.id).version  # warm, as login_view leaves it
+    session.save()
+
+
+def use_temp_media_root(test):
+    """Point MEDIA_ROOT at a directory that is removed when ``test`` ends."""
+    media_root = tempfile.TemporaryDirectory()
+    test.addCleanup(media_root.cleanup)
+    override = override_settings(MEDIA_ROOT=media_root.name)
+    override.enable()
+    test.addCleanup(override.disable)
+
+
+class PayrollEngineTests(TestCase):
+
+    def setUp(self):
+        self.employees = seed_payroll_dataset()
+        self.today = date(2025, 4, 15)
+
+    def test_matches_per_employee_calculation(self):
+        expected = {
+            emp.id: legacy_payroll(emp, 3, 2025, self.today) for emp in self.employees
+        }
+        rows = generate_payrolls(3, 2025, today=self.today)
+
+        self.assertEqual(len(rows), len(self.employees))
+        for row in rows:
+            for key, value in expected[row['employee_id']].items():
+                self.assertEqual(row[key], value, (row['employee_id'], key))
+        self.assertEqual(Payroll.objects.filter(month=3, year=2025).count(), len(self.employees))
+
+    def test_existing_payrolls_are_left_untouched(self):
+        generate_payrolls(3, 2025, today=self.today)
+        Attendance.objects.filter(attendance_date__month=3).update(status='absent')
+
+        before = list(Payroll.objects.order_by('id').values_list('net_salary', flat=True))
+        generate_payrolls(3, 2025, today=self.today)
+        after = list(Payroll.objects.order_by('id').values_list('net_salary', flat=True))
+        self.assertEqual(before, after)
+
+    def test_constant_query_count(self):
+        with self.assertNumQueries(8):
+            generate_payrolls(3, 2025, today=self.today)
+
+    def test_sharded_run_is_independent_of_layout(self):
+        snapshots = []
+        for shard_by, shards in (('range', 1), ('range', 5), ('department', 3)):
+            Payroll.objects.all().delete()
+            result = run_payroll(3, 2025, shard_by=shard_by, shards=shards, deterministic=True, today=self.today)
+            self.assertEqual(result['written'], len(self.employees))
+            snapshots.append(list(
+                Payroll.objects.order_by('id').values_list('employee_id', 'bonuses', 'deductions', 'net_salary')
+            ))
+        self.assertEqual(snapshots[0], snapshots[1])
+        self.assertEqual(snapshots[0], snapshots[2])
+
+        expected = {emp.id: legacy_payroll(emp, 3, 2025, self.today) for emp in self.employees}
+        for employee_id, _, deductions, net_salary in snapshots[0]:
+            self.assertEqual(str(net_salary), str(Decimal(expected[employee_id]['net_salary']).quantize(Decimal('0.01'))))
+
+    def test_run_payroll_command_recomputes_pending_only(self):
+        run_payroll(3, 2025, today=self.today)
+        paid = Payroll.objects.filter(employee=self.employees[1]).update(status='paid', net_salary=1)
+        Payroll.objects.filter(employee=self.employees[0]).update(net_salary=1)
+        out = StringIO()
+        call_command('run_payroll', month=3, year=2025, workers=0, recompute=True, stdout=out)
+        self.assertIn(f'{len(self.employees) - paid} payroll(s) written', out.getvalue())
+        self.assertNotEqual(Payroll.objects.get(employee=self.employees[0]).net_salary, 1)
+        self.assertEqual(Payroll.objects.get(employee=self.employees[1]).net_salary, 1)
+
+    def test_run_payroll_leaves_payrolls_settled_while_it_computed(self):
+        run_payroll(3, 2025, today=self.today)
+        original = payroll_module.payroll_shard
+
+        def paying_shard(month, year, employee_ids, *args):
+            Payroll.objects.filter(employee=self.employees[0]).update(status='paid', net_salary=1)
+            return original(month, year, employee_ids, *args)
+
+        payroll_module.payroll_shard = paying_shard
+        try:
+            result = run_payroll(3, 2025, recompute=True, shards=1, today=self.today)
+        finally:
+            payroll_module.payroll_shard = original
+        self.assertEqual(result['written'], len(self.employees) - 1)
+        self.assertEqual(Payroll.objects.get(employee=self.employees[0]).net_salary, 1)
+        self.assertEqual(PayrollRun.objects.first().created, len(self.employees) - 1)
+
+    def test_run_payroll_waits_its_turn(self):
+        claim_payroll_run(3, 2025)
+        with self.assertRaises(CommandError):
+            call_command('run_payroll', month=3, year=2025, workers=0, stdout=StringIO())
+        self.assertFalse(Payroll.objects.exists())
+
+    def test_view(self):
+        login_as_hr(self.client)
+        response = self.client.get('/api/payroll-generate/employee/', {'month': 3, 'year': 2025})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['payrolls']), len(self.employees))
+
+
+class PayrollRunTests(TestCase):
+    url = '/api/payroll-generate/employee/'
+
+    def setUp(self):
+        self.employees = seed_payroll_dataset()
+        login_as_hr(self.client)
+
+    def test_idempotency_key_replays_the_run(self):
+        first = self.client.get(self.url, {'month': 3, 'year': 2025}, HTTP_IDEMPOTENCY_KEY='march')
+        second = self.client.get(self.url, {'month': 3, 'year': 2025}, HTTP_IDEMPOTENCY_KEY='march')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(first.json()['run']['run_id'], second.json()['run']['run_id'])
+        self.assertEqual(first.json()['payrolls'], second.json()['payrolls'])
+        self.assertEqual(PayrollRun.objects.count(), 1)
+        self.assertEqual(PayrollRun.objects.get().created, len(self.employees))
+
+    def test_key_reused_for_another_month_conflicts(self):
+        self.client.get(self.url, {'month': 3, 'year': 2025}, HTTP_IDEMPOTENCY_KEY='march')
+        response = self.client.get(self.url, {'month': 4, 'year': 2025}, HTTP_IDEMPOTENCY_KEY='march')
+        self.assertEqual(response.status_code, 409)
+        with self.assertRaises(IdempotencyConflict):
+            claim_payroll_run(4, 2025, 'march')
+
+    @override_settings(PAYROLL_RUN_WAIT=0)
+    def test_concurrent_trigger_joins_the_running_run(self):
+        running, started = claim_payroll_run(3, 2025, 'march')
+        self.assertTrue(started)
+
+        response = self.client.get(self.url, {'month': 3, 'year': 2025})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['run']['run_id'], running.id)
+        self.assertEqual(PayrollRun.objects.count(), 1)
+        self.assertEqual(PayrollRunLock.objects.get(month=3, year=2025).run_id, running.id)
+        self.assertFalse(Watermark.objects.exists())
+        self.assertFalse(Payroll.objects.exists())
+
+        # Once it finishes, a retry with its key gets the stored rows.
+        PayrollRun.objects.filter(id=running.id).update(status='completed')
+        run, rows = trigger_payroll_run(3, 2025, key='march', wait=0)
+        self.assertEqual(run.id, running.id)
+        self.assertEqual(rows, [])
+
+    @override_settings(PAYROLL_RUN_TTL=60)
+    def test_stale_run_is_replaced(self):
+        stale, _ = claim_payroll_run(3, 2025)
+        PayrollRun.objects.filter(id=stale.id).update(started_at=timezone.now() - timedelta(minutes=5))
+
+        run, rows = trigger_payroll_run(3, 2025)
+        self.assertNotEqual(run.id, stale.id)
+        self.assertEqual(run.status, 'completed')
+        self.assertEqual(len(rows), len(self.employees))
+        self.assertEqual(Payroll.objects.filter(month=3, year=2025).count(), len(self.employees))
+
+        response = self.client.get(f'/api/payroll/runs/{run.id}/')
+        self.assertEqual(response.json()['run']['employees'], len(self.employees))
+
+    def test_created_counts_only_inserted_rows(self):
+        run, _ = claim_payroll_run(3, 2025)
+        # Another writer stores one employee's payroll after this run computed it.
+        original = payroll_runs.save_new_payrolls
+
+        def racing_save(new_payrolls, **kwargs):
+            Payroll.objects.create(
+                employee=self.employees[0], month=3, year=2025, bonuses=0, deductions=0, net_salary=1, status='pending',
+            )
+            return original(new_payrolls, **kwargs)
+
+        payroll_runs.save_new_payrolls = racing_save
+        try:
+            execute_payroll_run(run)
+        finally:
+            payroll_runs.save_new_payrolls = original
+        run.refresh_from_db()
+        self.assertEqual(run.created, len(self.employees) - 1)
+        self.assertEqual(Payroll.objects.filter(month=3, year=2025).count(), len(self.employees))
+
+    def test_unknown_engine_does_not_start_a_run(self):
+        response = self.client.get(self.url, {'month': 3, 'year': 2025, 'engine': 'gpu'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(PayrollRun.objects.exists())
+
+
+@skipUnless(payroll_vector.np is not None, "NumPy is not installed")
+class VectorPayrollTests(TestCase):
+
+    def test_matches_scalar_engine_to_the_cent(self):
+        rng = random.Random(7)
+        today = date(2025, 4, 15)
+        employees, inputs = [], PayrollInputs.__new__(PayrollInputs)
+        inputs.uncovered_absences, inputs.overtime_days, inputs.insurance = {}, {}, defaultdict(list)
+        for i in range(2000):
+            emp = SimpleNamespace(
+                id=i, basic_salary=Decimal(rng.randint(3_000_000, 50_000_000)) / 100,
+                joining_date=date(rng.randint(2005, 2025), rng.randint(1, 12), rng.randint(1, 28)),
+            )
+            employees.append(emp)
+            inputs.uncovered_absences[i] = rng.choice([0, 0, 1, 2, 3, 7])
+            inputs.overtime_days[i] = rng.randint(0, 22)
+            inputs.insurance[i] = [Decimal(rng.randint(0, 50_000)) / 100 for _ in range(rng.randint(0, 3))]
+
+        vector = payroll_vector.compute_payrolls_vectorized(employees, inputs, today)
+        cent = Decimal('0.01')
+        ties = 0
+        for emp in employees:
+            bonus, percentage, deductions = compute_payroll(emp, inputs, today)
+            scalar = [bonus, deductions, emp.basic_salary + bonus - deductions]
+
+            # The exact amounts; the scalar engine carries a 28-digit approximation of salary / 30.
+            salary = Fraction(emp.basic_salary)
+            exact_bonus = salary * (2 * percentage + inputs.overtime_days[emp.id]) / 200
+            exact_deductions = salary * inputs.uncovered_absences[emp.id] / 30 + sum(map(Fraction, inputs.insurance[emp.id]))
+            exact = [exact_bonus, exact_deductions, salary + exact_bonus - exact_deductions]
+
+            result = [vector[emp.id][0], vector[emp.id][2], vector[emp.id][3]]
+            self.assertEqual(vector[emp.id][1], percentage)
+            for got, approximate, value in zip(result, scalar, exact):
+                self.assertEqual(got, Decimal(round(value * 100)) * cent, emp.id)  # round() is half-even
+                if (value * 200).denominator == 1 and (value * 200) % 2:
+                    ties += 1  # exactly half a cent: the scalar engine's error decides the rounding
+                else:
+                    self.assertEqual(got, approximate.quantize(cent), emp.id)
+        self.assertLess(ties, len(employees) // 10)
+
+    def test_selectable_engine(self):
+        employees = seed_payroll_dataset()
+        login_as_hr(self.client)
+        today = date(2025, 4, 15)
+        generate_payrolls(3, 2025, today=today)
+        scalar = list(Payroll.objects.order_by('employee_id').values_list('employee_id', 'bonuses', 'deductions', 'net_salary'))
+        Payroll.objects.all().delete()
+        rows = generate_payrolls(3, 2025, today=today, engine='vector')
+        self.assertEqual(len(rows), len(employees))
+        vector = list(Payroll.objects.order_by('employee_id').values_list('employee_id', 'bonuses', 'deductions', 'net_salary'))
+        self.assertEqual(vector, scalar)
+
+        response = self.client.get('/api/payroll-generate/employee/', {'month': 3, 'year': 2025, 'engine': 'gpu'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ReportJobTests(TestCase):
+
+    def setUp(self):
+        use_temp_media_root(self)
+        self.employees = seed_payroll_dataset()
+        login_as_hr(self.client)
+
+    def enqueue(self, report_type='employee'):
+        response = self.client.get('/api/add_report/', {'report_type': report_type, 'month': 3, 'year': 2025})
+        self.assertEqual(response.status_code, 202)
+        return response.json()['job_id']
+
+    def test_enqueue_is_deduplicated_until_the_job_finishes(self):
+        job_id = self.enqueue()
+        self.assertEqual(self.enqueue(), job_id)
+        self.assertEqual(BackgroundJob.objects.count(), 1)
+
+    @override_settings(REPORT_JOB_LEASE=60)
+    def test_job_of_a_dead_worker_expires(self):
+        job_id = self.enqueue()
+        claim_next_job()
+        self.assertEqual(self.enqueue(), job_id)
+
+        BackgroundJob.objects.filter(id=job_id).update(heartbeat_at=timezone.now() - timedelta(seconds=61))
+        new_job_id = self.enqueue()
+        self.assertNotEqual(new_job_id, job_id)
+        dead = BackgroundJob.objects.get(id=job_id)
+        self.assertEqual(dead.status, 'failed')
+        self.assertIsNotNone(dead.finished_at)
+        self.assertEqual(claim_next_job().id, new_job_id)
+
+    def test_expired_job_keeps_its_failed_status(self):
+        job_id = self.enqueue()
+        job = claim_next_job()
+        # fail_expired_jobs gave up on the worker while it was still going.
+        BackgroundJob.objects.filter(id=job_id).update(status='failed', finished_at=timezone.now())
+        with self.assertLogs('core.jobs', 'WARNING'):
+            job = run_job(job, workers=0)
+
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(BackgroundJob.objects.get(id=job_id).done, 0)
+        self.assertLessEqual(MonthlyEmployeeReport.objects.count(), CHUNK_SIZE)
+
+    def test_worker_generates_reports_and_reports_progress(self):
+        job_id = self.enqueue()
+        run_job(claim_next_job(), workers=0)
+
+        job = self.client.get(f'/api/jobs/{job_id}/').json()['job']
+        self.assertEqual(job['status'], 'completed')
+        self.assertEqual(job['done'], len(self.employees))
+        self.assertEqual(job['total'], len(self.employees))
+        self.assertEqual(job['errors'], [])
+        self.assertEqual(MonthlyEmployeeReport.objects.count(), len(self.employees))
+        self.assertIsNone(claim_next_job())
+
+    def test_cancel(self):
+        job_id = self.enqueue('company')
+        response = self.client.post(f'/api/jobs/{job_id}/cancel/')
+        self.assertEqual(response.json()['job']['status'], 'cancelled')
+        self.assertIsNone(claim_next_job())
+        self.assertEqual(self.client.post(f'/api/jobs/{job_id}/cancel/').status_code, 409)
+
+
+class DashboardStatsTests(TestCase):
+
+    def setUp(self):
+        self.employees = seed_payroll_dataset()
+
+    def current(self):
+        return serialize_dashboard(get_dashboard_stats())
+
+    def test_signals_keep_counters_in_sync_with_a_rebuild(self):
+        self.current()
+        with self.captureOnCommitCallbacks(execute=True):
+            Complaint.objects.create(employee=self.employees[0], subject='Late', description='x')
+            LeaveApplication.objects.filter(status='pending').first().delete()
+            self.employees[1].employment_status = 'resigned'
+            self.employees[1].save()
+            generate_payrolls(3, 2025)
+            payroll = Payroll.objects.first()
+            payroll.net_salary = '1234.50'
+            payroll.save()
+            attendance = Attendance.objects.filter(status='present').first()
+            attendance.status = 'absent'
+            attendance.save()
+            self.employees[2].department = Department.objects.create(department_name='Legal')
+            self.employees[2].save()
+            EmployeeInsurance.objects.first().delete()
+        incremental = self.current()
+
+        DashboardStats.objects.all().delete()
+        rebuild_dashboard_stats()
+        rebuilt = self.current()
+        self.assertEqual(incremental, rebuilt)
+        self.assertEqual(incremental['unresolved_complaints'], 1)
+        self.assertEqual(incremental['total_active_employees'], len(self.employees) - 1)
+
+    def test_single_row_writes_apply_deltas_without_recounting(self):
+        rebuild_dashboard_stats()
+        complaint = Complaint.objects.create(employee=self.employees[0], subject='Late', description='x')
+        self.assertEqual(self.current()['unresolved_complaints'], 1)
+        # pre_save read of the status, the update, and the delta UPDATE of dashboard_stats
+        with self.assertNumQueries(3):
+            complaint.status = 'resolved'
+            complaint.save()
+        self.assertEqual(self.current()['unresolved_complaints'], 0)
+
+    def test_read_is_a_single_lookup(self):
+        rebuild_dashboard_stats()
+        with self.assertNumQueries(1):
+            self.current()
+
+
+class MaintenanceTests(TestCase):
+
+    def setUp(self):
+        self.employees = seed_payroll_dataset()
+        generate_payrolls(3, 2025)
+        Payroll.objects.update(created_at=timezone.now() - timedelta(days=5))
+        self.disputed = self.employees[0]
+        complaint = Complaint.objects.create(employee=self.disputed, subject='incorrect payroll', description='x')
+        Complaint.objects.filter(id=complaint.id).update(filed_date=date(2025, 3, 30))
+
+    def test_disputed_payroll_is_paid_after_its_complaint_is_resolved(self):
+        self.assertEqual(pay_payrolls(), {'paid': len(self.employees) - 1, 'complaints_resolved': 1})
+        self.assertEqual(Payroll.objects.get(employee=self.disputed).status, 'pending')
+        self.assertEqual(Complaint.objects.get(employee=self.disputed).status, 'resolved')
+
+        self.assertEqual(pay_payrolls(), {'paid': 1, 'complaints_resolved': 0})
+        self.assertFalse(Payroll.objects.filter(status='pending').exists())
+
+    def test_each_run_resolves_one_complaint_per_payroll(self):
+        second = Complaint.objects.create(employee=self.disputed, subject='Incorrect Payroll', description='y')
+        Complaint.objects.filter(id=second.id).update(filed_date=date(2025, 3, 31))
+
+        self.assertEqual(pay_payrolls()['complaints_resolved'], 1)
+        self.assertEqual(Complaint.objects.get(id=second.id).status, 'resolved')
+        self.assertEqual(Complaint.objects.filter(employee=self.disputed, status='open').count(), 1)
+        self.assertEqual(pay_payrolls(), {'paid': 0, 'complaints_resolved': 1})
+        self.assertEqual(pay_payrolls(), {'paid': 1, 'complaints_resolved': 0})
+
+    def test_recent_payrolls_stay_pending(self):
+        Payroll.objects.update(created_at=timezone.now())
+        self.assertEqual(pay_payrolls(), {'paid': 0, 'complaints_resolved': 0})
+
+    def test_task_runs_once_per_interval_and_records_bookkeeping(self):
+        task = run_task('pay_payrolls', owner='node-a')
+        self.assertEqual(task.last_status, 'ok')
+        self.assertEqual(task.run_count, 1)
+        self.assertIsNone(task.locked_by)
+        self.assertIsNone(run_task('pay_payrolls', owner='node-b'))
+
+    def test_lock_is_exclusive(self):
+        self.assertTrue(acquire_task('make_active_inactive', 'node-a', force=True))
+        self.assertFalse(acquire_task('make_active_inactive', 'node-b', force=True))
+        MaintenanceTask.objects.filter(name='make_active_inactive').update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertTrue(acquire_task('make_active_inactive', 'node-b', force=True))
+
+
+class CursorPaginationTests(TestCase):
+
+    def setUp(self):
+        self.employees = seed_payroll_dataset()
+        login_as_hr(self.client)
+
+    def walk(self, url, key, **params):
+        items, cursor = [], None
+        while True:
+            query = dict(params, **({'cursor': cursor} if cursor else {}))
+            body = self.client.get(url, query).json()
+            items.extend(body[key])
+            cursor = body['next_cursor']
+            if not cursor:
+                return items
+
+    def test_pages_cover_the_table_in_model_order(self):
+        names = [item['full_name'] for item in self.walk('/api/employees/all/', 'employees', limit=3)]
+        self.assertEqual(names, list(Employee.objects.values_list('full_name', flat=True)))
+
+    def test_descending_ordering_with_ties(self):
+        rows = self.walk('/api/attendance/view/', 'attendances', limit=7)
+        self.assertEqual(len(rows), Attendance.objects.count())
+        expected = list(Attendance.objects.order_by('-attendance_date', '-id').values_list('employee_id', 'attendance_date'))
+        self.assertEqual([(r['employee_id'], date.fromisoformat(r['date'])) for r in rows], expected)
+
+    def test_nullable_ordering_key(self):
+        for i in range(5):
+            InterviewedCandidate.objects.create(
+                full_name=f'Candidate {i}', email=f'c{i}@example.com',
+                interview_date=date(2025, 1, i + 1) if i % 2 else None,
+            )
+        rows = self.walk('/api/interviewed-candidates/', 'all_candidates', limit=2)
+        self.assertEqual([r['full_name'] for r in rows], ['Candidate 3', 'Candidate 1', 'Candidate 4', 'Candidate 2', 'Candidate 0'])
+
+    def test_field_projection(self):
+        body = self.client.get('/api/employees/all/', {'fields': 'id,full_name', 'limit': 2}).json()
+        self.assertEqual(set(body['employees'][0]), {'id', 'full_name'})
+        self.assertEqual(self.client.get('/api/employees/all/', {'fields': 'salary'}).status_code, 400)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get('/api/employees/all/', {'cursor': 'nope'}).status_code, 400)
+
+
+class StreamingExportTests(TestCase):
+
+    def setUp(self):
+        self.employees = seed_payroll_dataset()
+        login_as_hr(self.client)
+
+    def read(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson_streams_every_row_in_chunks(self):
+        response = self.client.get('/api/exports/attendance/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual([r['id'] for r in rows], list(Attendance.objects.order_by('id').values_list('id', flat=True)))
+
+        total = Attendance.objects.count()
+        with self.assertNumQueries(2):
+            rows = list(iter_rows(Attendance.objects.all(), EXPORTS['attendance']['fields'], chunk_size=total // 2 + 1))
+        self.assertEqual(len(rows), total)
+
+    def test_csv_with_date_and_department_filters(self):
+        response = self.client.get('/api/exports/attendance/', {
+            'output': 'csv', 'from': '2025-03-10', 'to': '2025-03-20', 'department': 'IT',
+        })
+        lines = list(csv.reader(self.read(response).splitlines()))
+        self.assertEqual(lines[0], list(EXPORTS['attendance']['fields']))
+        expected = Attendance.objects.filter(
+            attendance_date__range=(date(2025, 3, 10), date(2025, 3, 20)),
+            employee__department__department_name='IT',
+        ).count()
+        self.assertEqual(len(lines) - 1, expected)
+        self.assertTrue(all(line[3] == 'IT' for line in lines[1:]))
+
+    def test_payroll_range_uses_year_and_month(self):
+        generate_payrolls(3, 2025, today=date(2025, 4, 1))
+        generate_payrolls(4, 2025, today=date(2025, 5, 1))
+        response = self.client.get('/api/exports/payroll/', {'from': '2025-04-01'})
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertTrue(rows)
+        self.assertEqual({r['month'] for r in rows}, {4})
+
+    def test_bad_parameters(self):
+        self.assertEqual(self.client.get('/api/exports/salaries/').status_code, 400)
+        self.assertEqual(self.client.get('/api/exports/leaves/', {'output': 'xml'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/exports/leaves/', {'from': '03/2025'}).status_code, 400)
+
+
+class InsuredEmployeesTests(TestCase):
+
+    def setUp(self):
+        self.employees = seed_payroll_dataset()
+        login_as_hr(self.client)
+
+    def enroll(self, plans, per_plan):
+        dept = Department.objects.get(department_name='IT')
+        first = InsurancePlan.objects.count() - 1
+        for p in range(first, first + plans):
+            plan = InsurancePlan.objects.create(plan_name=f'Plan {p}')
+            for e in range(per_plan):
+                emp = Employee.objects.create(
+                    full_name=f'Insured {p}-{e}', email=f'insured{p}-{e}@example.com', department=dept,
+                    joining_date=date(2024, 1, 1), basic_salary=Decimal('1000'),
+                )
+                EmployeeInsurance.objects.create(employee=emp, insurance_plan=plan, start_date=date(2025, 1, 1))
+
+    def test_each_plan_lists_only_its_active_enrollees(self):
+        self.enroll(3, 2)
+        gone = Employee.objects.get(full_name='Gone')
+        EmployeeInsurance.objects.create(employee=gone, insurance_plan=InsurancePlan.objects.get(plan_name='Plan 0'), start_date=date(2025, 1, 1))
+
+        body = self.client.get('/api/insurance/employees/').json()
+        plans = {p['insurance_name']: [e['employee_name'] for e in p['employees']] for p in body['insurances']}
+        self.assertEqual(plans['Plan 1'], ['Insured 1-0', 'Insured 1-1'])
+        self.assertNotIn('Gone', plans['Plan 0'])
+        self.assertEqual(len(plans['Health']), EmployeeInsurance.objects.filter(insurance_plan__plan_name='Health').count())
+
+    def test_query_count_is_independent_of_enrollment_size(self):
+        # Session + page of plans + enrollees, whether plans have 2 or 40 members.
+        self.enroll(2, 2)
+        with self.assertNumQueries(3):
+            small = self.client.get('/api/insurance/employees/', {'limit': 2}).json()
+        self.enroll(2, 40)
+        with self.assertNumQueries(3):
+            self.client.get('/api/insurance/employees/', {'limit': 2, 'cursor': small['next_cursor']})
+
+
+class ListQueryCountTests(TestCase):
+    # endpoint -> queries including the session lookup
+    LIST_ENDPOINTS = {
+        '/api/employees/all/': 2,
+        '/api/departments/': 2,
+        '/api/departments/employees/': 4,
+        '/api/designations/': 2,
+        '/api/shortlisted-candidates/': 2,
+        '/api/interviewed-candidates/': 2,
+        '/api/old-employee-records/': 2,
+        '/api/payroll-history/': 1,
+        '/api/leaves/all/': 2,
+        '/api/leaves/employees/': 2,
+        '/api/attendance/view/': 2,
+        '/api/insurance/all/': 2,
+        '/api/insurance/employees/': 3,
+        '/api/complain/all/': 2,
+    }
+
+    def setUp(self):
+        self.employees = seed_payroll_dataset()
+        login_as_hr(self.client)
+
+    def grow(self, n):
+        it = Department.objects.get(department_name='IT')
+        engineer = Designation.objects.get(designation_name='Software Engineer')
+        start = Employee.objects.count()
+        for i in range(start, start + n):
+            emp = Employee.objects.create(
+                full_name=f'Extra {i}', email=f'extra{i}@example.com', department=it, designation=engineer,
+                joining_date=date(2024, 1, 1), basic_salary=Decimal('1000'),
+                termination_date=date(2025, 1, 1) if i % 2 else None,
+            )
+            InterviewedCandidate.objects.create(
+                full_name=f'Candidate {i}', email=f'candidate{i}@example.com', applied_position=engineer,
+                department=it, interviewer=emp, status='shortlisted' if i % 2 else 'pending',
+            )
+            Complaint.objects.create(employee=emp, subject='Noise', description='-')
+            Payroll.objects.create(employee=emp, month=1, year=2025, net_salary=Decimal('1000'))
+
+    def test_every_list_endpoint_has_a_constant_query_count(self):
+        for size in (5, 40):
+            self.grow(size)
+            for url, queries in self.LIST_ENDPOINTS.items():
+                with self.subTest(url=url, size=size), self.assertNumQueries(queries):
+                    self.assertEqual(self.client.get(url, {'limit': 100, 'department_name': 'IT'}).status_code, 200)
+
+    def test_detail_payload_loads_relations_with_the_row(self):
+        employee = self.employees[1]
+        with self.assertNumQueries(2):
+            body = self.client.get('/api/employees/', {'employee_id': employee.id}).json()
+        self.assertEqual(body['department'], 'IT')
+        self.assertEqual(body['termination_date'], 'N/A')
+
+    def test_payload_relations(self):
+        self.assertEqual(serializers.CANDIDATES.relations(), ['applied_position', 'department', 'interviewer'])
+        self.assertEqual(serializers.LEAVE_APPLICATIONS.only_fields(), [
+            'applied_date', 'employee', 'employee__full_name', 'end_date', 'id', 'leave_type',
+            'leave_type__leave_type_name', 'start_date', 'status', 'total_days',
+        ])
+        with self.assertRaises(ValueError):
+            Payload(Department, {'staff': 'employees__full_name'}).relations()
+
+
+class RequestMetricsTests(TestCase):
+
+    def setUp(self):
+        seed_payroll_dataset()
+        login_as_hr(self.client)
+        registry.reset()
+
+    def scrape(self):
+        response = self.client.get('/api/metrics/')
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_counts_latency_queries_and_bytes_per_url_name(self):
+        first = self.client.get('/api/employees/all/')
+        second = self.client.get('/api/employees/all/', {'limit': 2})
+        text = self.scrape()
+        self.assertIn('hrms_http_requests_total{endpoint="employee_list",method="GET",status="200"} 2', text)
+        self.assertIn('hrms_http_request_duration_seconds_count{endpoint="employee_list"} 2', text)
+        self.assertIn('hrms_db_queries_total{endpoint="employee_list"} 4', text)
+        self.assertIn('hrms_db_queries_per_request_bucket{endpoint="employee_list",le="2"} 2', text)
+        self.assertIn('hrms_db_query_duration_seconds_total{endpoint="employee_list"}', text)
+        self.assertIn(f'hrms_http_response_bytes_total{{endpoint="employee_list"}} {len(first.content) + len(second.content)}', text)
+        self.client.get('/api/nowhere/')
+        self.assertIn('endpoint="unmatched"', self.scrape())
+
+    def test_streaming_responses_are_recorded_when_consumed(self):
+        response = self.client.get('/api/exports/complaints/')
+        self.assertNotIn('endpoint="export"', registry.render())
+        body = b''.join(response.streaming_content)
+        text = registry.render()
+        self.assertIn('hrms_db_queries_total{endpoint="export"} 2', text)
+        self.assertIn(f'hrms_http_response_bytes_total{{endpoint="export"}} {len(body)}', text)
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_slow_query_log(self):
+        with self.assertLogs('core.slow_queries', 'WARNING') as logs:
+            self.client.get('/api/departments/')
+        self.assertTrue(any('departments' in line and 'SELECT' in line for line in logs.output))
+        self.assertIn('hrms_db_slow_queries_total{endpoint="department_list"} 2', registry.render())
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+        self.assertEqual(self.client.get('/api/metrics/', HTTP_AUTHORIZATION='Bearer s3cret').status_code, 200)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_metrics_without_token_need_an_hr_session(self):
+        self.assertEqual(Client().get('/api/metrics/').status_code, 404)
+        self.assertEqual(Client().get('/api/metrics/', HTTP_AUTHORIZATION='Bearer ').status_code, 404)
+        session = self.client.session
+        session['employee_id'] = Employee.objects.exclude(department__department_name='HR').first().id
+        session.save()
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+
+
+class SyntheticDatasetTests(TestCase):
+
+    def test_seed_is_bulk_and_deterministic(self):
+        today = date(2025, 3, 14)
+        counts = seed_synthetic(30, 2, today=today, seed=7)
+        self.assertEqual(counts['employees'], 30)
+        self.assertEqual(Attendance.objects.count(), counts['attendance'])
+        self.assertEqual(Payroll.objects.filter(month=3, year=2025).count(), 0)
+        self.assertEqual(Payroll.objects.filter(month=2, year=2025).count(), 30)
+        self.assertFalse(Attendance.objects.filter(attendance_date__gt=today).exists())
+        self.assertFalse(Complaint.objects.exclude(filed_date__in=[date(2025, 2, 1), date(2025, 3, 1)]).exists())
+
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(seed_synthetic(30, 2, today=today, seed=7), counts)
+        with CaptureQueriesContext(connection) as large:
+            seed_synthetic(60, 2, today=today, seed=7)
+        # SQLite splits bulk inserts by its parameter limit, so allow a few extra batches.
+        self.assertLess(len(large) - len(small), 30)
+
+    def test_benchmark_suite(self):
+        results = run_suite([20], months=1, names=['dashboard', 'insured_employees', 'payroll_generation'], repeat=2, flush=False)
+        self.assertEqual([r['benchmark'] for r in results], ['dashboard', 'insured_employees', 'payroll_generation'])
+        for result in results:
+            self.assertEqual(result['employees'], 20)
+            self.assertGreater(result['queries'], 0)
+            self.assertLessEqual(result['seconds']['min'], result['seconds']['max'])
+        self.assertEqual(json.loads(json.dumps(report(results)))['results'], results)
+
+
+class BulkAttendanceTests(TestCase):
+
+    def setUp(self):
+        self.employees = seed_payroll_dataset()
+        login_as_hr(self.client)
+        self.emp = self.employees[0]
+
+    def post_ndjson(self, rows):
+        body = "\n".join(row if isinstance(row, str) else json.dumps(row) for row in rows)
+        return self.client.post('/api/attendance/bulk/', body, content_type='application/x-ndjson')
+
+    def test_check_in_then_check_out_upserts_one_row(self):
+        day = '2025-04-01'
+        first = self.post_ndjson([
+            {'employee_id': self.emp.id, 'attendance_date': day, 'check_in_time': '09:05:00'},
+            {'employee_id': self.emp.id, 'attendance_date': day, 'check_in_time': '08:55:00'},
+        ]).json()
+        self.assertEqual((first['accepted'], first['written'], first['errors']), (2, 1, []))
+
+        # session, active ids, savepoint, stored rows, upsert, monthly stats refresh (2 selects, savepoint, delete,
+        # insert, release), payroll mark, release
+        with self.assertNumQueries(13):
+            self.post_ndjson([{'employee_id': self.emp.id, 'attendance_date': day, 'check_out_time': '17:30:00'}])
+        # A late duplicate check-in must not clear the check-out.
+        self.post_ndjson([{'employee_id': self.emp.id, 'attendance_date': day, 'check_in_time': '10:00:00'}])
+
+        att = Attendance.objects.get(employee=self.emp, attendance_date=date(2025, 4, 1))
+        self.assertEqual((att.check_in_time, att.check_out_time, att.status), (time(8, 55), time(17, 30), 'present'))
+
+    def test_out_of_order_punches_merge_with_the_stored_row(self):
+        day = '2025-04-02'
+        self.post_ndjson([{'employee_id': self.emp.id, 'attendance_date': day, 'status': 'absent'}])
+        self.post_ndjson([{'employee_id': self.emp.id, 'attendance_date': day, 'check_out_time': '18:00:00'}])
+        # Resent earlier punches: a check-out before the recorded one, then the morning check-in.
+        self.post_ndjson([{'employee_id': self.emp.id, 'attendance_date': day, 'check_out_time': '12:00:00'}])
+        self.post_ndjson([{'employee_id': self.emp.id, 'attendance_date': day, 'check_in_time': '09:40:00',
+                           'status': 'late'}])
+
+        att = Attendance.objects.get(employee=self.emp, attendance_date=date(2025, 4, 2))
+        self.assertEqual((att.check_in_time, att.check_out_time, att.status), (time(9, 40), time(18, 0), 'late'))
+        self.post_ndjson([{'employee_id': self.emp.id, 'attendance_date': day, 'status': 'absent'}])
+        att.refresh_from_db()
+        self.assertEqual((att.check_in_time, att.check_out_time, att.status), (time(9, 40), time(18, 0), 'late'))
+
+    def test_csv_and_per_row_errors(self):
+        gone = Employee.objects.get(full_name='Gone')
+        body = "\n".join([
+            "employee_id,attendance_date,check_in_time,check_out_time,status",
+            f"{self.emp.id},2025-04-02,09:00:00,17:00:00,",
+            f"{gone.id},2025-04-02,09:00:00,17:00:00,",
+            f"{self.emp.id},2025-13-02,09:00:00,,",
+            f"{self.emp.id},2999-01-01,09:00:00,,",
+            f"{self.emp.id},2025-04-03,,,absent",
+            f"{self.emp.id},2025-04-04,25:00:00,,",
+        ])
+        result = self.client.post('/api/attendance/bulk/', body, content_type='text/csv').json()
+        self.assertEqual((result['rows'], result['accepted']), (6, 2))
+        self.assertEqual([e['row'] for e in result['errors']], [3, 4, 5, 7])
+        self.assertEqual(Attendance.objects.get(employee=self.emp, attendance_date=date(2025, 4, 3)).status, 'absent')
+
+    def test_import_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson', delete=False) as f:
+            for emp in self.employees:
+                f.write(json.dumps({'employee_id': emp.id, 'attendance_date': '2025-04-07', 'check_in_time': '09:00:00'}) + "\n")
+            f.write("not json\n")
+        out = StringIO()
+        with self.assertRaises(CommandError):
+            call_command('import_attendance', f.name, batch_size=3, stdout=out, stderr=StringIO())
+        self.assertIn('8 accepted', out.getvalue())
+        self.assertEqual(Attendance.objects.filter(attendance_date=date(2025, 4, 7)).count(), 8)
+
+
+class PunchRollupTests(TestCase):
+
+    def setUp(self):
+        self.employees = seed_payroll_dataset()
+        login_as_hr(self.client)
+        self.emp, self.other = self.employees[0], self.employees[1]
+
+    def punch(self, *rows):
+        body = "\n".join(json.dumps({'employee_id': e.id, 'punched_at': at}) for e, at in rows)
+        return self.client.post('/api/attendance/punches/', body, content_type='application/x-ndjson').json()
+
+    def attendance(self, employee, day):
+        att = Attendance.objects.get(employee=employee, attendance_date=day)
+        return att.check_in_time, att.check_out_time, att.status
+
+    def test_first_in_last_out_and_status(self):
+        result = self.punch(
+            (self.emp, '2025-04-01T08:55:00'), (self.emp, '2025-04-01T12:30:00'), (self.emp, '2025-04-01T17:40:00'),
+            (self.other, '2025-04-01T09:40:00'), (self.other, '2025-04-01T11:00:00'),
+        )
+        self.assertEqual((result['accepted'], result['errors']), (5, []))
+        self.assertFalse(Attendance.objects.filter(attendance_date=date(2025, 4, 1)).exists())
+
+        self.assertEqual(rollup_attendance()['days'], 2)
+        self.assertEqual(self.attendance(self.emp, date(2025, 4, 1)), (time(8, 55), time(17, 40), 'present'))
+        self.assertEqual(self.attendance(self.other, date(2025, 4, 1))[2], 'absent')  # under ATTENDANCE_MIN_HOURS
+
+    def test_incremental_runs_only_touch_new_days(self):
+        self.punch((self.emp, '2025-04-02T09:30:00'))
+        rollup_attendance()
+        self.assertEqual(self.attendance(self.emp, date(2025, 4, 2)), (time(9, 30), None, 'late'))
+
+        # Outside the grace window only events above the watermark are read.
+        later = timezone.now() + timedelta(hours=1)
+        self.punch((self.emp, '2025-04-02T18:00:00'))
+        result = rollup_attendance(now=later)
+        self.assertEqual(result['days'], 1)
+        self.assertEqual(self.attendance(self.emp, date(2025, 4, 2)), (time(9, 30), time(18, 0), 'late'))
+
+        with override_settings(ATTENDANCE_ROLLUP_GRACE=0):
+            self.assertEqual(rollup_attendance(now=later + timedelta(hours=1))['days'], 0)
+
+    def test_runs_as_maintenance_task_and_rejects_bad_rows(self):
+        result = self.punch((self.emp, '2025-04-03T09:00:00'), (self.emp, 'yesterday'))
+        self.assertEqual([e['row'] for e in result['errors']], [2])
+        task = run_task('rollup_attendance', force=True)
+        self.assertEqual((task.last_status, task.last_result['days']), ('ok', 1))
+
+
+class MonthlyEmployeeStatsTests(TestCase):
+
+    def setUp(self):
+        self.employees = seed_payroll_dataset()
+        self.emp = self.employees[0]
+
+    def stored(self, month, year):
+        return {
+            row.pop('employee_id'): row
+            for row in MonthlyEmployeeStats.objects.filter(month=month, year=year).values('employee_id', *STAT_FIELDS)
+        }
+
+    def test_signals_keep_stats_equal_to_a_recompute(self):
+        absence = Attendance.objects.filter(employee=self.emp, status='absent').first()
+        absence.attendance_date = date(2025, 4, 2)
+        absence.save()
+        Attendance.objects.filter(employee=self.employees[1], status='present').first().delete()
+        leave = LeaveApplication.objects.filter(employee=self.emp, status='pending').first()
+        leave.status = 'approved'
+        leave.save()
+
+        for month in (3, 4):
+            self.assertEqual(self.stored(month, 2025), compute_monthly_stats(month, 2025))
+        self.assertEqual(self.stored(4, 2025)[self.emp.id]['absent_days'], 1)
+
+    def test_backfill_and_bulk_paths(self):
+        expected = self.stored(3, 2025)
+        MonthlyEmployeeStats.objects.all().delete()
+        self.assertEqual(rebuild_monthly_stats(), [(2, 2025), (3, 2025)])
+        self.assertEqual(self.stored(3, 2025), expected)
+
+        ingest_attendance([(1, {'employee_id': self.emp.id, 'attendance_date': '2025-03-29', 'status': 'absent'})])
+        self.assertEqual(self.stored(3, 2025)[self.emp.id]['absent_days'], expected[self.emp.id]['absent_days'] + 1)
+
+    def test_company_report_builds_missing_stats(self):
+        use_temp_media_root(self)
+        MonthlyEmployeeStats.objects.all().delete()
+        with open(generate_company_report(3, 2025)['file_path']) as f:
+            content = f.read()
+        self.assertIn(f"Absent: {Attendance.objects.filter(status='absent').count()}", content)
+        self.assertTrue(MonthlyEmployeeStats.objects.filter(month=3, year=2025).exists())
+
+    def test_ensure_builds_employees_missing_from_a_started_month(self):
+        expected = self.stored(3, 2025)
+        # A bulk load left one employee without stats while the others have theirs.
+        MonthlyEmployeeStats.objects.filter(employee=self.emp).delete()
+        ensure_monthly_stats(3, 2025)
+        self.assertEqual(self.stored(3, 2025), expected)
+        with self.assertNumQueries(1):
+            ensure_monthly_stats(3, 2025)
+
+
+class SargablePeriodTests(TestCase):
+
+    def setUp(self):
+        self.employees = seed_payroll_dataset()
+        self.emp = self.employees[0]
+
+    def index_name(self, model, fields):
+        return next(index.name for index in model._meta.indexes if index.fields == fields)
+
+    def test_month_filters_use_indexes(self):
+        cases = [
+            (Attendance.objects.filter(in_month('attendance_date', 3, 2025)),
+             self.index_name(Attendance, ['attendance_date'])),
+            (Attendance.objects.filter(in_month('attendance_date', 3, 2025), employee=self.emp, status='absent'),
+             self.index_name(Attendance, ['employee', 'attendance_date', 'status'])),
+            (LeaveApplication.objects.filter(
+                employee=self.emp, status='approved', start_date__lte=date(2025, 3, 5), end_date__gte=date(2025, 3, 5),
+            ), self.index_name(LeaveApplication, ['employee', 'status', 'start_date', 'end_date'])),
+        ]
+        for queryset, index in cases:
+            with self.subTest(index=index):
+                plan = queryset.explain()
+                self.assertIn(index, plan)
+                if connection.vendor == 'sqlite':
+                    self.assertIn('SEARCH', plan)
+        if connection.vendor == 'sqlite':
+            # Django turns __year into a BETWEEN, but __month stays EXTRACT() and can only scan.
+            self.assertIn('SCAN', Attendance.objects.filter(attendance_date__month=3).explain())
+
+    def test_monthly_paths_do_not_extract_date_parts(self):
+        use_temp_media_root(self)
+        with CaptureQueriesContext(connection) as ctx:
+            generate_payrolls(3, 2025, today=date(2025, 4, 15))
+            Payroll.objects.update(created_at=timezone.now() - timedelta(days=5))
+            pay_payrolls()
+            generate_company_report(3, 2025)
+            rebuild_monthly_stats()
+        sql = ' '.join(query['sql'] for query in ctx.captured_queries).lower()
+        self.assertNotIn('extract', sql)
+        self.assertEqual(Payroll.objects.filter(status='paid').count(), len(self.employees))
+
+
+class LeaveCoverageTests(TestCase):
+
+    def setUp(self):
+        self.employees = seed_payroll_dataset()
+        self.emp = self.employees[0]
+
+    def test_interval_index_matches_brute_force(self):
+        spans = [(1, date(2025, 3, 1), date(2025, 3, 3)), (1, date(2025, 3, 4), date(2025, 3, 6)),
+                 (1, date(2025, 3, 5), date(2025, 3, 5)), (1, date(2025, 3, 10), date(2025, 3, 12)),
+                 (2, date(2025, 3, 2), date(2025, 3, 2))]
+        index = IntervalIndex(spans)
+        self.assertEqual(index.ranges(1), [(date(2025, 3, 1), date(2025, 3, 6)), (date(2025, 3, 10), date(2025, 3, 12))])
+
+        days = [date(2025, 2, 27) + timedelta(days=i) for i in range(20)]
+        for key in (1, 2, 3):
+            covered = {d for k, s, e in spans if k == key for d in days if s <= d <= e}
+            for day in days:
+                self.assertEqual(index.covers(key, day), day in covered, (key, day))
+            for first in days:
+                for last in days[days.index(first):days.index(first) + 5]:
+                    window = {d for d in covered if first <= d <= last}
+                    self.assertEqual(index.overlaps(key, first, last), bool(window), (key, first, last))
+                    self.assertEqual(index.covered_days(key, first, last), len(window), (key, first, last))
+
+    def test_coverage_endpoint(self):
+        login_as_hr(self.client)
+        ids = [emp.id for emp in self.employees[:4]]
+        with self.assertNumQueries(2):  # session, leaves
+            response = self.client.get('/api/leaves/coverage/', {
+                'employee_ids': ','.join(map(str, ids)), 'from': '2025-03-01', 'to': '2025-03-31', 'paid': 'true',
+            })
+        self.assertEqual(response.status_code, 200)
+        result = {row['employee_id']: row for row in response.json()['employees']}
+
+        for emp in self.employees[:4]:
+            expected = sum(
+                LeaveApplication.objects.filter(
+                    employee=emp, status='approved', leave_type__is_paid=True,
+                    start_date__lte=date(2025, 3, day), end_date__gte=date(2025, 3, day),
+                ).exists()
+                for day in range(1, 32)
+            )
+            self.assertEqual(result[emp.id]['covered_days'], expected, emp.id)
+        self.assertEqual(result[self.emp.id]['ranges'], [
+            {'start': '2025-03-01', 'end': '2025-03-10'}, {'start': '2025-03-12', 'end': '2025-03-18'},
+        ])
+
+        bad = self.client.get('/api/leaves/coverage/', {'employee_ids': 'x', 'from': '2025-03-01', 'to': '2025-03-31'})
+        self.assertEqual(bad.status_code, 400)
+
+    def test_apply_leaves_rejects_overlaps(self):
+        login_as_hr(self.client)
+        start = date.today() + timedelta(days=30)
+
+        def apply(first, last):
+            return self.client.post(f'/api/apply-leaves/{self.emp.id}/', {
+                'start_date': str(first), 'end_date': str(last), 'leave_type': 'sick',
+            }, content_type='application/json').status_code
+
+        self.assertEqual(apply(start, start + timedelta(days=2)), 201)
+        self.assertEqual(apply(start + timedelta(days=2), start + timedelta(days=4)), 409)
+        self.assertEqual(apply(start + timedelta(days=3), start + timedelta(days=4)), 201)
+
+
+class PayrollRecomputeTests(TestCase):
+
+    def setUp(self):
+        self.employees = seed_payroll_dataset()
+        self.today = date(2025, 4, 15)
+        generate_payrolls(3, 2025, today=self.today)
+        PayrollDirtyMark.objects.all().delete()
+
+    def test_only_stale_pending_payrolls_are_recomputed(self):
+        first, second, third, paid = self.employees[:4]
+        Payroll.objects.filter(employee=paid).update(status='paid')
+
+        att = Attendance.objects.filter(employee=first, attendance_date__month=3, status='present').first()
+        att.status = 'absent'
+        att.save()
+        second.basic_salary = '99999.99'
+        second.save()
+        second.phone = '123'
+        second.save()  # unchanged salary marks nothing new
+        EmployeeInsurance.objects.filter(employee=third).delete()
+        Attendance.objects.filter(employee=paid, attendance_date=date(2025, 3, 2)).update(status='absent')
+        Attendance.objects.get(employee=paid, attendance_date=date(2025, 3, 3)).save()
+
+        paid_before = Payroll.objects.get(employee=paid).net_salary
+        diff = recompute_dirty_payrolls(today=self.today)
+
+        self.assertEqual([row['employee_id'] for row in diff], [first.id, second.id, third.id])
+        self.assertIn('deductions', diff[0]['changes'])
+        for emp in (first, second, third):
+            emp.refresh_from_db()
+            expected = legacy_payroll(emp, 3, 2025, self.today)
+            payroll = Payroll.objects.get(employee=emp)
+            self.assertEqual(payroll.net_salary, Decimal(expected['net_salary']).quantize(Decimal('0.01')))
+        self.assertEqual(Payroll.objects.get(employee=paid).net_salary, paid_before)
+        self.assertFalse(PayrollDirtyMark.objects.exists())
+        self.assertEqual(recompute_dirty_payrolls(today=self.today), [])
+
+    def test_view_and_employee_delete(self):
+        login_as_hr(self.client)
+        emp = self.employees[1]
+        LeaveApplication.objects.filter(employee=emp).update(status='approved')
+        LeaveApplication.objects.filter(employee=emp).first().save()
+        response = self.client.post('/api/payroll/recompute/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['employee_id'] for row in response.json()['changes']], [emp.id])
+
+        emp.delete()
+        self.assertFalse(MonthlyEmployeeStats.objects.filter(employee_id=emp.id).exists())
+        self.assertFalse(PayrollDirtyMark.objects.exists())
+
+
+class PayrollSimulationTests(TestCase):
+
+    def setUp(self):
+        self.employees = seed_payroll_dataset()
+        self.today = date(2025, 4, 15)
+        login_as_hr(self.client)
+
+    def test_default_rules_match_generated_payroll(self):
+        result = simulate_payroll([(3, 2025)], today=self.today)
+        self.assertEqual(set(result['totals']['delta'].values()), {'0.00'})
+        self.assertFalse(Payroll.objects.exists())
+
+        generate_payrolls(3, 2025, today=self.today)
+        stored = sum(Payroll.objects.values_list('net_salary', flat=True))
+        self.assertEqual(result['totals']['simulated']['net_salary'], str(stored))
+
+    def test_overrides_and_department_deltas(self):
+        generate_payrolls(3, 2025, today=self.today)
+        with CaptureQueriesContext(connection) as ctx:
+            result = simulate_payroll(
+                [(3, 2025)], parse_rules({'tenure_cap': 2, 'overtime_rate': 1}),
+                parse_salaries({'Manager': 200000}), today=self.today,
+            )
+        queries = len(ctx.captured_queries)
+
+        expected = defaultdict(Decimal)
+        inputs = PayrollInputs(3, 2025, [emp.id for emp in self.employees])
+        for emp in self.employees:
+            salary = Decimal(200000) if emp.designation.designation_name == 'Manager' else emp.basic_salary
+            tenure = min(tenure_years(emp.joining_date, self.today), 2)
+            bonus = salary * tenure / 100 + inputs.overtime_days.get(emp.id, 0) * salary / 100
+            deductions = inputs.uncovered_absences.get(emp.id, 0) * salary / 30 + sum(inputs.insurance[emp.id], Decimal(0))
+            expected[emp.department.department_name] += (salary + bonus - deductions).quantize(Decimal('0.01'))
+        for row in result['departments']:
+            self.assertEqual(row['simulated']['net_salary'], str(expected[row['department']]))
+            stored = Payroll.objects.filter(employee__department__department_name=row['department'])
+            self.assertEqual(row['baseline']['net_salary'], str(sum(stored.values_list('net_salary', flat=True))))
+
+        for i, emp in enumerate(self.employees):  # twice the employees, same number of queries
+            Employee.objects.create(
+                full_name=f'Copy {i}', email=f'copy{i}@example.com', department=emp.department,
+                designation=emp.designation, joining_date=emp.joining_date, basic_salary=emp.basic_salary,
+            )
+        with self.assertNumQueries(queries):
+            simulate_payroll([(3, 2025)], parse_rules({'tenure_cap': 2}), parse_salaries({'Manager': 1}), today=self.today)
+
+    def test_endpoint(self):
+        response = self.client.post('/api/payroll/simulate/', {
+            'from': '2025-02', 'to': '2025-03', 'rules': {'overtime_hours': 8.5, 'absence_divisor': 22},
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['periods']), 2)
+        self.assertFalse(Payroll.objects.exists())
+
+        for body in ({'month': 13, 'year': 2025}, {'month': 3, 'year': 2025, 'rules': {'bogus': 1}},
+                     {'month': 3, 'year': 2025, 'salaries': {'Astronaut': 1}}):
+            response = self.client.post('/api/payroll/simulate/', body, content_type='application/json')
+            self.assertEqual(response.status_code, 400, body)
+
+
+class AuthorizationContextTests(TestCase):
+    url = '/api/employees/all/'
+
+    def setUp(self):
+        self.employees = seed_payroll_dataset()
+        self.hr = Employee.objects.filter(department__department_name='HR').first()
+        self.other = Employee.objects.filter(department__department_name='HR').exclude(id=self.hr.id).first()
+        login_as_hr(self.client)
+
+    def test_context_is_cached_between_requests(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        with CaptureQueriesContext(connection) as first:
+            self.client.get(self.url)
+        authz_cache.clear()
+        with CaptureQueriesContext(connection) as cold:
+            self.client.get(self.url)
+        self.assertEqual(len(cold), len(first) + 1)
+        self.assertEqual(self.client.session['authz_version'], 0)
+
+    def test_termination_revokes_access(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        response = self.client.put(f'/api/employees/{self.hr.id}/update/', {
+            'to_update': 'status', 'new_val': 'terminated',
+        }, content_type='application/json')
+        self.assertEqual(response.json()['message'], 'Employee status updated successfully.')
+        self.assertEqual(Employee.objects.get(id=self.hr.id).authz_version, 1)
+
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertNotIn('employee_id', self.client.session)
+
+    def test_transfer_without_version_bump_is_seen_after_ttl(self):
+        self.client.get(self.url)
+        # Another worker process moved the employee; this one only learns it when the entry expires.
+        Employee.objects.filter(id=self.hr.id).update(
+            department=Department.objects.get(department_name='IT'), authz_version=F('authz_version') + 1,
+        )
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        authz_cache.entries[self.hr.id] = (authz_cache.entries[self.hr.id][0], 0)
+
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertEqual(self.client.session['department'], 'IT')
+        self.assertEqual(self.client.session['authz_version'], 1)
+
+    def test_deleted_employee_loses_access(self):
+        session = self.client.session
+        session['employee_id'] = self.other.id
+        session.save()
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.client.delete(f'/api/employees/{self.other.id}/delete/')
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_lru_eviction_and_ttl(self):
+        cache = AuthzCache(size=2, ttl=60)
+        for employee_id in (1, 2):
+            cache.put(AuthContext(employee_id, 'active', 'HR', None, 0))
+        cache.get(1)
+        cache.put(AuthContext(3, 'active', 'HR', None, 0))
+        self.assertIsNone(cache.get(2))
+        self.assertIsNotNone(cache.get(1))
+
+        expired = AuthzCache(size=2, ttl=0)
+        expired.put(AuthContext(1, 'active', 'HR', None, 0))
+        self.assertIsNone(expired.get(1))
+
+
+class SessionBackendTests(TestCase):
+
+    def test_login_on_every_backend(self):
+        seed_payroll_dataset()
+        self.hr = Employee.objects.filter(department__department_name='HR').first()
+        self.hr.set_password('secret')
+        self.hr.save()
+        for backend, engine in settings.SESSION_ENGINES.items():
+            with self.subTest(backend=backend), override_settings(SESSION_ENGINE=engine):
+                client = Client()
+                response = client.post('/api/login/', {'email': self.hr.email, 'password': 'secret'},
+                                       content_type='application/json')
+                self.assertTrue(response.json()['success'])
+                self.assertEqual(client.get('/api/designations/').status_code, 200)
+                user = client.get('/api/check-session/').json()['user']
+                self.assertEqual((user['id'], user['department']), (self.hr.id, 'HR'))
+
+                client.post('/api/logout/')
+                self.assertFalse(client.get('/api/check-session/').json()['authenticated'])
+
+    def test_session_benchmarks_read_without_queries(self):
+        results = run_suite([20], months=1, names=['session_cache', 'session_signed_cookies', 'session_db'],
+                            repeat=1, flush=False)
+        queries = {result['benchmark']: result['queries'] for result in results}
+        self.assertEqual(queries['session_cache'], 0)
+        self.assertEqual(queries['session_signed_cookies'], 0)
+        self.assertEqual(queries['session_db'], SESSION_REQUESTS)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class LoginTests(TestCase):
+    url = '/api/login/'
+
+    def setUp(self):
+        seed_payroll_dataset()
+        self.hr = Employee.objects.filter(department__department_name='HR').first()
+        self.hr.set_password('secret')
+        self.hr.save()
+        login_throttle.clear()
+
+    def login(self, password, email=None, ip='10.0.0.1'):
+        return self.client.post(self.url, {'email': email or self.hr.email, 'password': password},
+                                content_type='application/json', REMOTE_ADDR=ip)
+
+    @override_settings(LOGIN_MAX_FAILURES=3)
+    def test_repeated_failures_are_refused_before_hashing(self):
+        for _ in range(3):
+            self.assertEqual(self.login('wrong').status_code, 401)
+        response = self.login('secret')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        # Other accounts behind the same address are not locked out.
+        self.assertEqual(self.login('wrong', email='employee2@example.com').status_code, 403)
+
+        login_throttle.clear()
+        self.assertEqual(self.login('secret').status_code, 200)
+
+    @override_settings(LOGIN_MAX_FAILURES=3, LOGIN_MAX_FAILURES_PER_IP=4)
+    def test_address_limit_and_reset_on_success(self):
+        self.login('wrong')
+        self.login('wrong')
+        self.assertEqual(self.login('secret').status_code, 200)
+        self.assertEqual(self.login('wrong').status_code, 401)  # the email counter was reset
+        self.assertEqual(self.login('wrong', email='nobody@example.com').status_code, 401)
+        self.assertEqual(self.login('secret').status_code, 429)
+        self.assertEqual(self.login('secret', ip='10.0.0.2').status_code, 200)
+
+    def test_outdated_hash_is_upgraded_on_login(self):
+        old_hash = self.hr.password_hash
+        with override_settings(PASSWORD_HASHERS=[
+            'django.contrib.auth.hashers.PBKDF2PasswordHasher', 'django.contrib.auth.hashers.MD5PasswordHasher',
+        ]):
+            self.assertEqual(self.login('secret').status_code, 200)
+        new_hash = Employee.objects.get(id=self.hr.id).password_hash
+        self.assertTrue(old_hash.startswith('md5$'))
+        self.assertTrue(new_hash.startswith('pbkdf2_sha256$'))
+
+    @override_settings(LOGIN_HASH_WORKERS=1, LOGIN_HASH_QUEUE=0)
+    def test_full_hashing_pool_rejects_instead_of_queueing(self):
+        pool = HashingPool()
+        started, release = threading.Event(), threading.Event()
+
+        def hold():
+            started.set()
+            release.wait(5)
+
+        waiter = threading.Thread(target=pool.run, args=(hold,))
+        waiter.start()
+        started.wait(5)
+        try:
+            with self.assertRaises(LoginBusy):
+                pool.run(make_password, 'secret')
+        finally:
+            release.set()
+            waiter.join()
+        self.assertTrue(pool.run(make_password, 'secret').startswith('md5$'))
+
+
+class AsyncViewTests(TestCase):
+    # async URL -> (sync URL, query string)
+    ENDPOINTS = {
+        '/api/async/dashboard/': ('/api/dashboard/', {}),
+        '/api/async/employees/all/': ('/api/employees/all/', {'limit': 3}),
+        '/api/async/employees/': ('/api/employees/', {'employee_id': None}),
+        '/api/async/departments/employees/': ('/api/departments/employees/', {'department_name': 'HR'}),
+        '/api/async/attendance/view/': ('/api/attendance/view/', {'limit': 5, 'fields': 'employee_name,date,status'}),
+        '/api/async/complain/all/': ('/api/complain/all/', {}),
+        '/api/async/leaves/all/': ('/api/leaves/all/', {}),
+        '/api/async/leaves/employees/': ('/api/leaves/employees/', {}),
+    }
+
+    def setUp(self):
+        self.employees = seed_payroll_dataset()
+        login_as_hr(self.client)
+        login_as_hr(self.async_client)
+        self.async_client.cookies = self.client.cookies
+        registry.reset()
+
+    async def test_async_endpoints_match_sync_ones(self):
+        for url, (sync_url, params) in self.ENDPOINTS.items():
+            if 'employee_id' in params:
+                params = {'employee_id': self.employees[0].id}
+            with self.subTest(url=url):
+                response = await self.async_client.get(url, params)
+                self.assertEqual(response.status_code, 200)
+                expected = await sync_to_async(self.client.get)(sync_url, params)
+                self.assertEqual(response.json(), expected.json())
+
+        cursor = (await self.async_client.get('/api/async/employees/all/', {'limit': 3})).json()['next_cursor']
+        page = await self.async_client.get('/api/async/employees/all/', {'limit': 3, 'cursor': cursor})
+        self.assertEqual(page.json()['employees'][0]['full_name'], 'Employee 3')
+        self.assertEqual((await self.async_client.get('/api/async/employees/all/', {'cursor': '!'})).status_code, 400)
+
+    async def test_hr_required_on_async_views(self):
+        self.assertEqual((await self.async_client.post('/api/async/dashboard/')).status_code, 405)
+        await Employee.objects.filter(id=self.employees[0].id).aupdate(employment_status='fired')
+        authz_cache.clear()
+        self.assertEqual((await self.async_client.get('/api/async/dashboard/')).status_code, 403)
+        self.assertEqual((await self.async_client.get('/api/async/dashboard/')).status_code, 404)
+
+    async def test_metrics_count_async_queries(self):
+        await self.async_client.get('/api/async/employees/all/')
+        text = registry.render()
+        self.assertIn('hrms_http_requests_total{endpoint="async_employee_list",method="GET",status="200"} 1', text)
+        # The session and the page; the authorization context is cached by login_as_hr.
+        self.assertIn('hrms_db_queries_total{endpoint="async_employee_list"} 2', text)
+
+
+class ConnectionPoolTests(TestCase):
+    def connect(self):
+        return sqlite3.connect(':memory:', check_same_thread=False)
+
+    def test_reuses_released_connections_up_to_size(self):
+        pool = ConnectionPool(size=2, timeout=0.05, max_idle=60)
+        first = pool.acquire(self.connect)
+        pool.release(first)
+        self.assertIs(pool.acquire(self.connect), first)
+        second = pool.acquire(self.connect)
+        with self.assertRaises(PoolTimeout):
+            pool.acquire(self.connect)
+        self.assertEqual(pool.stats(), {
+            'size': 2, 'open': 2, 'idle': 0, 'in_use': 2, 'created': 2, 'reused': 1,
+            'waits': 1, 'wait_seconds': pool.stats()['wait_seconds'], 'timeouts': 1,
+        })
+
+        # A waiter gets the connection another thread hands back.
+        threading.Timer(0.05, pool.release, [second]).start()
+        pool.timeout = 5
+        self.assertIs(pool.acquire(self.connect), second)
+        self.assertEqual(pool.stats()['waits'], 2)
+
+    def test_stale_and_unusable_connections_are_replaced(self):
+        pool = ConnectionPool(size=1, timeout=0.05, max_idle=0)
+        stale = pool.acquire(self.connect)
+        pool.release(stale)
+        fresh = pool.acquire(self.connect)
+        self.assertIsNot(fresh, stale)
+        with self.assertRaises(sqlite3.ProgrammingError):
+            stale.execute('SELECT 1')
+
+        pool.max_idle = 60
+        pool.release(fresh)
+        replacement = pool.acquire(self.connect, usable=lambda conn: False)
+        self.assertIsNot(replacement, fresh)
+        self.assertEqual((pool.stats()['open'], pool.stats()['created']), (1, 3))
+
+    def test_pooled_backend_hands_connections_back(self):
+        with tempfile.NamedTemporaryFile(suffix='.sqlite3') as db:
+            database = {'ENGINE': 'core.dbpool.sqlite3', 'NAME': db.name}
+            handler = ConnectionHandler({'default': database, 'pooled': database})
+            conn = handler['pooled']
+            registry.reset()
+            try:
+                conn.ensure_connection()
+                raw = conn.connection
+                conn.close()
+                self.assertEqual(pools['pooled'].stats()['idle'], 1)
+                with conn.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                self.assertIs(conn.connection, raw)
+                text = registry.render()
+                self.assertIn('hrms_db_connections_opened_total{alias="pooled"} 2', text)
+                self.assertIn('hrms_db_pool_connections{alias="pooled",state="in_use"} 1', text)
+                self.assertIn('hrms_db_pool_connections_reused_total{alias="pooled"} 1', text)
+
+                # A connection closed after a database error is not reused.
+                conn.errors_occurred = True
+                conn.close()
+                self.assertEqual(pools['pooled'].stats()['open'], 0)
+            finally:
+                conn.close()
+                pools.pop('pooled').close_idle()
+                registry.reset()
+
+    def test_pooled_connection_follows_a_changed_database_name(self):
+        # create_test_db swaps NAME on the live alias; the pooled connection to the old file must go.
+        with tempfile.NamedTemporaryFile(suffix='.sqlite3') as first, tempfile.NamedTemporaryFile(suffix='.sqlite3') as second:
+            handler = ConnectionHandler({
+                'default': {'ENGINE': 'core.dbpool.sqlite3', 'NAME': first.name},
+                'pooled': {'ENGINE': 'core.dbpool.sqlite3', 'NAME': first.name},
+            })
+            conn = handler['pooled']
+            try:
+                conn.ensure_connection()
+                old_pool = pools['pooled']
+                conn.close()
+                self.assertEqual(old_pool.stats()['idle'], 1)
+
+                conn.settings_dict['NAME'] = second.name
+                with conn.cursor() as cursor:
+                    cursor.execute('PRAGMA database_list')
+                    self.assertEqual(cursor.fetchone()[2], second.name)
+                self.assertIsNot(pools['pooled'], old_pool)
+                self.assertEqual(old_pool.stats()['open'], 0)
+            finally:
+                conn.close()
+                pools.pop('pooled').close_idle()
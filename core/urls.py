@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 app_name = 'core'
 
@@ -11,6 +11,8 @@ urlpatterns = [
     path('check-session/', views.check_session_view, name='check_session'),
     
     path('dashboard/', views.dashboard_view, name='dashboard'),
+    path('maintenance/', views.maintenance_status_view, name='maintenance_status'),
+    path('metrics/', views.metrics_view, name='metrics'),
     
     path('employees/all/', views.employee_list_view, name='employee_list'), #working
     path('employees/', views.employee_detail_view, name='employee_detail'), #working
@@ -35,16 +37,26 @@ urlpatterns = [
     
     path('payroll-generate/employee/', views.generate_payroll_view, name='generate_payroll'),
     path('payroll-history/', views.payroll_history_view, name='payroll_history'),
+    path('payroll/recompute/', views.recompute_payrolls_view, name='recompute_payrolls'),
+    path('payroll/simulate/', views.simulate_payroll_view, name='simulate_payroll'),
+    path('payroll/runs/<int:run_id>/', views.payroll_run_view, name='payroll_run'),
     path('report/', views.reports_view, name='reports'),
     path('add_report/', views.generate_report_view, name='generate_reports'),
+    path('jobs/reports/', views.generate_report_view, name='enqueue_report_job'),
+    path('jobs/<int:job_id>/', views.job_status_view, name='job_status'),
+    path('jobs/<int:job_id>/cancel/', views.cancel_job_view, name='cancel_job'),
+    path('exports/<str:dataset>/', views.export_view, name='export'),
     
     path('leaves/all/', views.leave_list_view, name='leave_list'), #working
     path('add_leave/', views.add_leave_view, name='add_leave'), #working
     # path('leaves/<int:leave_id>/update/', views.update_leave_status, name='update_leave_status'),
     # path('leaves/<int:leave_id>/delete/', views.delete_leave, name='delete_leave'),
     path('leaves/employees/', views.employee_leave, name='employee_leaves'), #working
+    path('leaves/coverage/', views.leave_coverage_view, name='leave_coverage'),
     
     path('attendance/view/', views.view_attendance_view, name='view_attendance'), #working 
+    path('attendance/bulk/', views.bulk_attendance_view, name='bulk_attendance'),
+    path('attendance/punches/', views.punch_events_view, name='punch_events'),
     # -> date range ka filter front pe lgana hai 
     #path('attendance/mark/<int:employee_id>/', views.mark_attendance, name='mark_attendance'), #working
     # (request mein format YYYY-MM-DD, date ka HH:MM:SS) 
@@ -72,5 +84,15 @@ urlpatterns = [
     
     path('allowed-roles/', views.allowed_roles, name='allowed_roles'), #working
     
-    path('download/', views.download_report_view, name="download")
+    path('download/', views.download_report_view, name="download"),
+
+    # Async variants of the read-only endpoints, for ASGI deployments
+    path('async/dashboard/', async_views.dashboard_view, name='async_dashboard'),
+    path('async/employees/all/', async_views.employee_list_view, name='async_employee_list'),
+    path('async/employees/', async_views.employee_detail_view, name='async_employee_detail'),
+    path('async/departments/employees/', async_views.department_view, name='async_department'),
+    path('async/attendance/view/', async_views.view_attendance_view, name='async_view_attendance'),
+    path('async/complain/all/', async_views.all_complaints_view, name='async_all_complains'),
+    path('async/leaves/all/', async_views.leave_list_view, name='async_leave_list'),
+    path('async/leaves/employees/', async_views.employee_leave, name='async_employee_leaves'),
 ]
\ No newline at end of file
@@ -4,21 +4,37 @@ from rest_framework.response import Response
 from rest_framework import status
 import json
 from django.http import JsonResponse
-from .models import Employee, EmployeeInsurance, Payroll, Department, Designation, Attendance, LeaveApplication, LeaveType, InsurancePlan, InterviewedCandidate, Complaint, MonthlyCompanyReport, MonthlyEmployeeReport
-from django.contrib.auth.hashers import check_password
+from .models import Employee, EmployeeInsurance, PayrollRun, Department, Designation, Attendance, LeaveApplication, LeaveType, InsurancePlan, InterviewedCandidate, Complaint, MonthlyCompanyReport, MonthlyEmployeeReport, BackgroundJob, MaintenanceTask
 from datetime import date, timedelta, datetime
 import secrets
 from django.views.decorators.csrf import csrf_exempt
 import os
 from django.conf import settings
 from .decorators import hr_required
+from .authz import authz_cache, bump_authz_version, remember_login
+from .login import LoginBusy, client_ip, hash_password, login_throttle, throttle_keys, verify_password
+from .payroll import recompute_dirty_payrolls
+from .payroll_runs import IdempotencyConflict, serialize_run, trigger_payroll_run
+from .payroll_vector import EngineUnavailable
+from .simulation import parse_periods, parse_rules, parse_salaries, simulate_payroll
+from .jobs import cancel_job, enqueue_report_job, job_progress
+from .stats import get_dashboard_stats, serialize_dashboard
+from .signals import refresh_dashboard_on_commit
+from .maintenance import serialize_task
+from .pagination import PaginationError, paginate
+from . import serializers
+from .attendance import ingest_attendance, parse_csv, parse_ndjson
+from .exports import ExportError, stream_export
+from .punches import ingest_punches
+from .metrics import registry
+from .periods import in_year
+from .intervals import COVERAGE_MAX_EMPLOYEES, leave_index
 from django.utils import timezone
 from decimal import Decimal
-from django.contrib.auth.hashers import make_password
-from django.db.models import Count, Sum
+from django.db.models import Exists, OuterRef, Sum
 import random
 import traceback
-from django.http import FileResponse, Http404
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
 
 
 allowed_positions_for_departments = {
@@ -46,44 +62,6 @@ salaries = {
     "Cleaner": 15000
 }
 
-def make_active_inactive():
-    
-    active_plans = EmployeeInsurance.objects.filter(
-        end_date__lt=date.today(), 
-        status='active')
-    active_plans.update(status='inactive')
-    inactive_employee_plans = EmployeeInsurance.objects.exclude(
-        employee__employment_status='active'
-    )
-
-    inactive_employee_plans.update(status='inactive')
-
-def pay_payrolls():
-    today = timezone.now().date()
-    three_days_ago = today - timedelta(days=3)
-    pending_payrolls = Payroll.objects.filter(status='pending', created_at__date__lt=three_days_ago, employee__employment_status="active")
-    for payroll in pending_payrolls:
-        employee = payroll.employee
-
-        complaint = Complaint.objects.filter(
-            employee=employee,
-            subject__iexact="Incorrect Payroll",
-            filed_date__month=payroll.month,
-            filed_date__year=payroll.year,
-            status='open'
-        ).first()
-
-        if not complaint:
-            payroll.status = 'paid'
-            payroll.payment_date = timezone.now()
-            payroll.save()
-
-        else:
-            complaint.status = 'resolved'
-            complaint.resolved_date = timezone.now()
-            complaint.save()
-    
-
 def add_employee(full_name, phone, applied_position, department):
     try:
         if applied_position.designation_name == 'CEO':
@@ -103,7 +81,7 @@ def add_employee(full_name, phone, applied_position, department):
             return False
 
         if department.department_name == 'HR':
-            pass_word = make_password(full_name.split()[0].lower())
+            pass_word = hash_password(full_name.split()[0].lower())
         else:
             pass_word = None
 
@@ -135,6 +113,7 @@ def add_employee(full_name, phone, applied_position, department):
 def delete_employee(request, employee_id):
     try:
         Employee.objects.filter(id=employee_id).delete()
+        authz_cache.discard([employee_id])
         return JsonResponse({'message': 'Employee deleted successfully.'})
     except Employee.DoesNotExist:
         return JsonResponse({'message': 'Employee not found'})
@@ -187,6 +166,7 @@ def update_employee(request, employee_id): #update
                 if (emp.department.manager != None and emp.department.manager.employment_status in ['fired', 'terminated', 'resigned']) or (emp.department.manager == None):
                     emp.department.manager = emp           
             emp.save()
+            bump_authz_version([emp.id])
             return JsonResponse({'message': 'Employee designation updated successfully.'})
         elif to_update == 'status':
             if new_val in ['fired', 'terminated', 'resigned']:
@@ -194,10 +174,12 @@ def update_employee(request, employee_id): #update
                     emp.employment_status = new_val
                     emp.termination_date = date.today()
                     emp.save()
+                    bump_authz_version([emp.id])
                     active_insurances = EmployeeInsurance.objects.filter(employee=emp, status='active')
                     active_insurances.update(status='inactive')
                     open_com = Complaint.objects.filter(employee=emp, status='open')
                     open_com.update(status='closed')
+                    refresh_dashboard_on_commit('complaints')
                     return JsonResponse({'message': 'Employee status updated successfully.'})
                 else:
                     return JsonResponse({'message': "Inactive employees can't be updated"})
@@ -344,28 +326,47 @@ def login_view(request):
                 'success': False,
                 'message': 'Email and password are required'
             }, status=400)
+
+        # Brute force is refused before any password is hashed.
+        keys = throttle_keys(email, client_ip(request))
+        retry_after = max(login_throttle.retry_after(key, limit) for key, limit in keys)
+        if retry_after:
+            response = JsonResponse({
+                'success': False,
+                'message': 'Too many failed login attempts, try again later'
+            }, status=429)
+            response['Retry-After'] = str(retry_after)
+            return response
+
+        def failed(message, status):
+            for key, _ in keys:
+                login_throttle.fail(key)
+            return JsonResponse({'success': False, 'message': message}, status=status)
+
         try:
             employee = Employee.objects.get(email=email, employment_status='active')
         except Employee.DoesNotExist:
-            return JsonResponse({
-                'success': False,
-                'message': 'Invalid credentials'
-            }, status=401)
+            return failed('Invalid credentials', 401)
 
         if not employee.password_hash:
-            return JsonResponse({
-                'success': False,
-                'message': 'Access denied. Only HR employees can login.'
-            }, status=403)
+            return failed('Access denied. Only HR employees can login.', 403)
 
-        if check_password(password, employee.password_hash):
+        try:
+            valid, new_hash = verify_password(password, employee.password_hash)
+        except LoginBusy as e:
+            response = JsonResponse({'success': False, 'message': str(e)}, status=503)
+            response['Retry-After'] = '1'
+            return response
+
+        if valid:
+            login_throttle.reset(keys[0][0])
+            if new_hash:
+                Employee.objects.filter(id=employee.id).update(password_hash=new_hash)
             request.session['employee_id'] = employee.id
             request.session['full_name'] = employee.full_name
             request.session['email'] = employee.email
-            request.session['department'] = employee.department.department_name if employee.department else None
-            request.session['designation'] = employee.designation.designation_name if employee.designation else None
+            remember_login(request, employee)
             request.session.set_expiry(0)
-            request.session.save()
             return JsonResponse({
                 'success': True,
                 'message': 'Login successful',
@@ -378,10 +379,7 @@ def login_view(request):
                 }
             })
         else:
-            return JsonResponse({
-                'success': False,
-                'message': 'Invalid credentials'
-            }, status=401)
+            return failed('Invalid credentials', 401)
     except json.JSONDecodeError:
         return JsonResponse({
             'success': False,
@@ -411,93 +409,42 @@ def logout_view(request):
 @hr_required
 def dashboard_view(request):
     try:
-        make_active_inactive()
-        pay_payrolls()
-        total_active_employees = Employee.objects.filter(employment_status="active").count()
-
-        present_today = Attendance.objects.filter(status="present").count()
-        absent_today = Attendance.objects.filter(status="absent").count()
-        total_attendance = present_today + absent_today
-
-        if total_attendance > 0:
-            presence_ratio = round(present_today / total_attendance, 2)
-            absence_ratio = round(absent_today / total_attendance, 2)
-        else:
-            presence_ratio = 0
-            absence_ratio = 0
-
-        unresolved_complaints = Complaint.objects.filter(status="open").count()
-
-        total_insurances = EmployeeInsurance.objects.count()
-
-        today = date.today()
-        start_of_month = today.replace(day=1)
-
-        new_hires = Employee.objects.filter(joining_date__gte=start_of_month, joining_date__lte=today).count()
-        
-        first_day_this_month = start_of_month
-        last_day_prev_month = first_day_this_month - timedelta(days=1)
-        first_day_prev_month = last_day_prev_month.replace(day=1)
-
-        prev_hires = Employee.objects.filter(
-            joining_date__gte=first_day_prev_month,
-            joining_date__lte=last_day_prev_month
-        ).count()
-        total_departments = Department.objects.count()
-
-        employees_per_department = Employee.objects.values('department__department_name').annotate(
-            count=Count('id')
-        )
-
-        pending_leaves = LeaveApplication.objects.filter(status="pending").count()
-
-        total_payroll = Payroll.objects.aggregate(
-            total=Sum('net_salary')
-        )['total'] or 0
-
-        dept_emp_list = [
-            {"department": d['department__department_name'], "employee_count": d['count']}
-            for d in employees_per_department
-        ]
-
-        return JsonResponse({
-            "total_active_employees": total_active_employees,
-            "presence_ratio": presence_ratio,
-            "absence_ratio": absence_ratio,
-            "unresolved_complaints": unresolved_complaints,
-            "total_insurances": total_insurances,
-            "total_departments": total_departments,
-            "employees_per_department": dept_emp_list,
-            "pending_leaves": pending_leaves,
-            "total_payroll": float(total_payroll),
-            "increase_in_hires_percentage": float(new_hires / (new_hires + prev_hires)) * 100,
-            "new_hires" : new_hires
-        }, status=200)
+        return JsonResponse(serialize_dashboard(get_dashboard_stats()), status=200)
     except Exception as e:
         return JsonResponse ({'message': f"{e}"})
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@hr_required
+def maintenance_status_view(request):
+    tasks = MaintenanceTask.objects.all()
+    return JsonResponse({'tasks': [serialize_task(task) for task in tasks]})
+
+def metrics_view(request):
+    # Plain Django view: scrapers send METRICS_TOKEN as a bearer token, which
+    # DRF's JWT authentication would otherwise try to decode. Without a token
+    # configured, only HR sessions may read the metrics.
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if not token:
+        return _hr_metrics(request)
+    if not secrets.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}"):
+        return JsonResponse({'message': 'Invalid metrics token.'}, status=403)
+    return _render_metrics(request)
+
+def _render_metrics(request):
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+_hr_metrics = hr_required(_render_metrics)
+
 @hr_required
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def employee_list_view(request):
     try:
-        employees = Employee.objects.all()
-        employee_data = [
-            {
-                'id': emp.id,
-                'full_name': emp.full_name,
-                'email': emp.email,
-                'phone_number': emp.phone,
-                'employment_status': emp.employment_status,
-                'joining_date': emp.joining_date,
-                'termination_date': emp.termination_date if emp.termination_date else 'N/A'
-            }
-            for emp in employees
-        ]
-        return JsonResponse({'employees': employee_data})
+        return serializers.EMPLOYEE_LIST.page(request, 'employees')
     except Exception as e:
         return JsonResponse ({'message': f"{e}"})
-    
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 @hr_required
@@ -506,19 +453,10 @@ def employee_detail_view(request):
         employee_id = request.GET.get('employee_id')
         if not employee_id:
             return JsonResponse({'message': 'No employee ID provided.'}, status=400)
-        employee = Employee.objects.filter(id=employee_id).first()
+        employee = serializers.EMPLOYEE_DETAIL.queryset().filter(id=employee_id).first()
         if not employee:
             return JsonResponse({'message': 'Employee not found.'}, status=404)
-        return JsonResponse({
-            'full_name': employee.full_name,
-            'email': employee.email,
-            'phone_number': employee.phone,
-            'department': employee.department.department_name if employee.department else None,
-            'designation': employee.designation.designation_name if employee.designation else None,
-            'employment_status': employee.employment_status,
-            'joining_date': employee.joining_date,
-            'termination_date': employee.termination_date if employee.termination_date else 'N/A'
-        })
+        return JsonResponse(serializers.EMPLOYEE_DETAIL.serialize(employee))
     except Exception as e:
         return JsonResponse ({'message': f"{e}"})
 
@@ -528,34 +466,16 @@ def employee_detail_view(request):
 @hr_required
 def department_list_view(request):
     try:
-        departments = Department.objects.all()
-        department_data = [
-            {
-                'id': dept.id,
-                'department_name': dept.department_name,
-            }
-            for dept in departments
-        ]
-        return JsonResponse({'departments': department_data})   
+        return serializers.DEPARTMENTS.page(request, 'departments')
     except Exception as e:
         return JsonResponse ({'message': f"{e}"})
 
-
-
 @api_view(['GET'])
 @permission_classes([AllowAny])
 @hr_required
 def designation_list_view(request):
     try:
-        designations = Designation.objects.all()
-        designation_data = [
-            {
-                'id': desig.id,
-                'designation_name': desig.designation_name,
-            }
-            for desig in designations
-        ]
-        return JsonResponse({'designations': designation_data})
+        return serializers.DESIGNATIONS.page(request, 'designations')
     except Exception as e:
         return JsonResponse ({'message': f"{e}"})
 
@@ -565,22 +485,7 @@ def designation_list_view(request):
 def shortlisted_candidate_list_view(request):
     try:
         candidates = InterviewedCandidate.objects.filter(status='shortlisted')
-        candidate_data = [
-            {
-                'id': candidate.id,
-                'full_name': candidate.full_name,
-                'email': candidate.email,
-                'phone_number': candidate.phone,
-                'position_applied': candidate.applied_position.designation_name if candidate.applied_position else None,
-                'interview_date': candidate.interview_date,
-                'status': candidate.status,
-                'remarks': candidate.remarks,
-                'department': candidate.department.department_name if candidate.department else None,
-                'interviewer': candidate.interviewer.full_name if candidate.interviewer else None
-            }
-            for candidate in candidates
-        ]
-        return JsonResponse({'shortlisted_candidates': candidate_data})
+        return serializers.CANDIDATES.page(request, 'shortlisted_candidates', candidates)
     except Exception as e:
         return JsonResponse ({'message': f"{e}"})
 
@@ -589,23 +494,7 @@ def shortlisted_candidate_list_view(request):
 @hr_required
 def candidate_list_view(request):
     try:
-        candidates = InterviewedCandidate.objects.all()
-        candidate_data = [
-            {
-                'id': candidate.id,
-                'full_name': candidate.full_name,
-                'email': candidate.email,
-                'phone_number': candidate.phone,
-                'position_applied': candidate.applied_position.designation_name if candidate.applied_position else None,
-                'interview_date': candidate.interview_date,
-                'status': candidate.status,
-                'remarks': candidate.remarks,
-                'department': candidate.department.department_name if candidate.department else None,
-                'interviewer': candidate.interviewer.full_name if candidate.interviewer else None
-            }
-            for candidate in candidates
-        ]
-        return JsonResponse({'all_candidates': candidate_data})
+        return serializers.CANDIDATES.page(request, 'all_candidates')
     except Exception as e:
         return JsonResponse ({'message': f"{e}"})
 
@@ -680,45 +569,22 @@ def department_view(request):
         department = Department.objects.filter(department_name=department_name).first()
         if not department:
             return JsonResponse({'message': 'Department not found.'}, status=404)
-        employees = [
-                {
-                    'full_name': emp.full_name,
-                    'email': emp.email,
-                    'phone_number': emp.phone,
-                    'designation': emp.designation.designation_name if emp.designation else None,
-                    'employment_status': emp.employment_status,
-                    'joining_date': emp.joining_date,
-                    'termination_date': emp.termination_date if emp.termination_date else 'N/A'
-                }
-                for emp in Employee.objects.filter(department=department, employment_status='active')   
-            ]
-        return JsonResponse({
-            'department_name': department.department_name,
-            'total_employees': Employee.objects.filter(department=department).count(),
-            'employees': employees
-        })
+        return serializers.DEPARTMENT_EMPLOYEES.page(
+            request,
+            'employees',
+            Employee.objects.filter(department=department, employment_status='active'),
+            department_name=department.department_name,
+            total_employees=Employee.objects.filter(department=department).count(),
+        )
     except Exception as e:
         return JsonResponse ({'message': f"{e}"})
 
-
 @api_view(['GET'])
 @permission_classes([AllowAny])
 @hr_required
 def old_employee_records_view(request):
     old_employees = Employee.objects.filter(termination_date__isnull=False)
-    old_employees_data = [
-        {
-            'full_name': emp.full_name,
-            'email': emp.email,
-            'phone_number': emp.phone,
-            'department': emp.department.department_name if emp.department else None,
-            'designation': emp.designation.designation_name if emp.designation else None,
-            'joining_date': emp.joining_date,
-            'termination_date': emp.termination_date
-        }
-        for emp in old_employees
-    ]
-    return JsonResponse({'old_employees': old_employees_data})
+    return serializers.OLD_EMPLOYEES.page(request, 'old_employees', old_employees)
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -728,124 +594,62 @@ def generate_payroll_view(request):
         month = int(request.GET.get('month', timezone.now().month))
         year = int(request.GET.get('year', timezone.now().year))
 
-        start_date = date(year, month, 1)
-
-        employees = Employee.objects.filter(employment_status='active')
-        payrolls_data = []
-
-        today = date.today()
-
-        for employee in employees:
-
-            total_deductions = Decimal('0.00')
-
-            absences = Attendance.objects.filter(
-                employee=employee,
-                attendance_date__month=month,
-                attendance_date__year=year,
-                status='absent'
-            )
-
-            for absence in absences:
-                leave_exists = LeaveApplication.objects.filter(
-                    employee=employee,
-                    status='approved',
-                    leave_type__is_paid=True,
-                    start_date__lte=absence.attendance_date,
-                    end_date__gte=absence.attendance_date
-                ).exists()
-
-                if not leave_exists:
-                    total_deductions += employee.basic_salary / Decimal("30")
-
-            insurances = EmployeeInsurance.objects.filter(
-                employee=employee,
-                end_date__gte=start_date
-            )
-
-            for insurance in insurances:
-                total_deductions += Decimal(insurance.monthly_deduction)
-
-            tenure_years = max(
-                0,
-                today.year - employee.joining_date.year -
-                ((today.month, today.day) < (employee.joining_date.month, employee.joining_date.day))
+        # Repeated or concurrent triggers share one PayrollRun, see core.payroll_runs.
+        try:
+            run, payrolls_data = trigger_payroll_run(
+                month, year,
+                key=request.headers.get('Idempotency-Key'),
+                requested_by=request.session.get('employee_id'),
+                engine=request.GET.get('engine'),
             )
+        except IdempotencyConflict as e:
+            return JsonResponse({'message': str(e)}, status=409)
+        except (ValueError, EngineUnavailable) as e:
+            return JsonResponse({'message': str(e)}, status=400)
+
+        if run.status == 'running':
+            return JsonResponse({'status': 'running', 'run': serialize_run(run)}, status=202)
+        if run.status == 'failed':
+            return JsonResponse({'message': f"Payroll run failed: {run.error}", 'run': serialize_run(run)}, status=500)
+        return JsonResponse({'status': 'success', 'run': serialize_run(run), 'payrolls': payrolls_data})
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
 
-            bonus_percentage = min(tenure_years, 10)
-            bonus = (employee.basic_salary * Decimal(bonus_percentage) / Decimal(100))
 
-            attendances = Attendance.objects.filter(
-                employee=employee,
-                attendance_date__month=month,
-                attendance_date__year=year,
-                status='present'
-            )
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@hr_required
+def simulate_payroll_view(request):
+    try:
+        data = json.loads(request.body or '{}')
+        periods = parse_periods(data)
+        rules = parse_rules(data.get('rules'))
+        salaries = parse_salaries(data.get('salaries'))
+    except ValueError as e:  # SimulationError and malformed JSON
+        return JsonResponse({'message': str(e)}, status=400)
+    return JsonResponse(simulate_payroll(periods, rules, salaries))
 
-            for attendance in attendances:
-                if attendance.check_in_time and attendance.check_out_time:
-                    work_duration = (
-                        datetime.combine(attendance.attendance_date, attendance.check_out_time) -
-                        datetime.combine(attendance.attendance_date, attendance.check_in_time)
-                    )
-                    if work_duration > timedelta(hours=8):
-                        bonus += employee.basic_salary * Decimal('0.5') / Decimal('100')
 
-            payroll, created = Payroll.objects.get_or_create(
-                employee=employee,
-                month=month,
-                year=year,
-                defaults={
-                    'bonuses': bonus,
-                    'bonus_reason': f'{bonus_percentage}% tenure bonus and overtime',
-                    'deductions': total_deductions,
-                    'deduction_reason': 'Absences/Leaves/Insurance',
-                    'net_salary': employee.basic_salary + bonus - total_deductions,
-                    'status': 'pending'
-                }
-            )
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@hr_required
+def recompute_payrolls_view(request):
+    diff = recompute_dirty_payrolls()
+    return JsonResponse({'recomputed': len(diff), 'changes': diff})
 
-            if created:
-                payroll.net_salary = payroll.employee.basic_salary + payroll.bonuses - payroll.deductions
-                payroll.save()
-
-            payrolls_data.append({
-                'employee_id': employee.id,
-                'employee_name': employee.full_name,
-                'month': month,
-                'year': year,
-                'basic_salary': str(payroll.employee.basic_salary),
-                'bonuses': str(payroll.bonuses),
-                'bonus_reason': payroll.bonus_reason,
-                'deductions': str(payroll.deductions),
-                'deduction_reason': payroll.deduction_reason,
-                'net_salary': str(payroll.net_salary),
-                'status': payroll.status
-            })
 
-        return JsonResponse({'status': 'success', 'payrolls': payrolls_data})
-    except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@hr_required
+def payroll_run_view(request, run_id):
+    run = PayrollRun.objects.filter(id=run_id).first()
+    if not run:
+        return JsonResponse({'message': 'Payroll run not found.'}, status=404)
+    return JsonResponse({'run': serialize_run(run)})
 
     
 def payroll_history_view(request):
-    payrolls = Payroll.objects.select_related('employee').all()
-    payroll_data = []
-
-    for p in payrolls:
-        employee = p.employee if hasattr(p, "employee") else None
-
-        payroll_data.append({
-            "employee": employee.full_name if employee else "Employee Deleted",
-            "net_salary": p.net_salary,
-            "month": p.month,
-            "year": p.year,
-            "status": p.status,
-        })
-
-    return JsonResponse({"Payrolls": payroll_data})
-
-
+    return serializers.PAYROLL_HISTORY.page(request, 'Payrolls')
 
 # @api_view(['POST'])
 # @permission_classes([AllowAny])
@@ -891,244 +695,68 @@ def payroll_history_view(request):
 
 @csrf_exempt
 @hr_required
-@api_view(['GET'])
+@api_view(['GET', 'POST'])
 @permission_classes([AllowAny])
 def generate_report_view(request):
     try:
         report_type = request.GET.get("report_type")   # "employee" or "company"
         month = int(request.GET.get("month"))
         year = int(request.GET.get("year"))
-        if report_type == "employee":
-            return generate_employee_reports(month, year)
-
-        elif report_type == "company":
-            return generate_company_report(month, year)
+        if report_type not in ["employee", "company"]:
+            return JsonResponse({"error": "Invalid report_type"}, status=400)
 
-        return JsonResponse({"error": "Invalid report_type"}, status=400)
+        job, created = enqueue_report_job(report_type, month, year)
+        return JsonResponse({
+            "status": "queued" if created else "already_queued",
+            "job_id": job.id,
+            "job": job_progress(job)
+        }, status=202)
     except Exception as e:
         return JsonResponse ({'message': f"{e}"}, status=500)
 
-def generate_employee_reports(month, year):
-
-    employees = Employee.objects.filter(employment_status="active")
-    results = []
-
-    base_folder = os.path.join(settings.MEDIA_ROOT, "employee_reports")
-    os.makedirs(base_folder, exist_ok=True)
-
-    for emp in employees:
-        if MonthlyEmployeeReport.objects.filter(employee=emp, month=month, year=year).exists():
-            MonthlyEmployeeReport.objects.filter(employee=emp, month=month, year=year).delete()
-        payroll_status = "Pending"
-        p = Payroll.objects.filter(status='paid', month=month, year=year, employee=emp)
-        if p.exists():
-            payroll_status = "Paid"
-        exists = MonthlyEmployeeReport.objects.filter(
-            employee=emp,
-            month=month,
-            year=year
-        ).first()
-
-        if exists:
-            results.append({
-                "employee_id": emp.id,
-                "file_path": os.join(settings.MEDIA_ROOT,exists.report_file),
-                "status": "already_exists",
-                "generated_on": datetime.now().replace(second=0, microsecond=0)
-            })
-            continue
-
-        
-        attendance = Attendance.objects.filter(
-            employee=emp,
-            attendance_date__month=month,
-            attendance_date__year=year
-        )
-        present_days = attendance.filter(status="present").count()
-        absent_days = attendance.filter(status="absent").count()
-
-        
-        leaves = LeaveApplication.objects.filter(
-            employee=emp,
-            status="approved",
-            start_date__month=month,
-            start_date__year=year
-        ).count()
-
-        
-        insurance_exp = EmployeeInsurance.objects.filter(
-            employee=emp,
-            end_date__month=month,
-            end_date__year=year
-        ).count()
-
-        
-        total_comp = Complaint.objects.filter(employee=emp).count()
-        resolved_comp = Complaint.objects.filter(employee=emp, status="resolved").count()
-        unresolved_comp = total_comp - resolved_comp
-
-        
-        content = f"""
-Employee Monthly Report
-=======================
-
-Employee Name: {emp.full_name}
-Employee ID: {emp.id}
-Month: {month}-{year}
-
-Attendance
-----------
-Present: {present_days}
-Absent: {absent_days}
-
-Leaves Approved: {leaves}
-
-Insurance Expiring This Month: {insurance_exp}
-
-Complaints:
-  Total: {total_comp}
-  Resolved: {resolved_comp}
-  Unresolved: {unresolved_comp}
-  
-Payroll for {month}, {year}: {payroll_status}
-"""
-
-        
-        file_name = f"employee_{emp.full_name}_{month}_{year}.txt"
-        file_path = os.path.join(base_folder, file_name)
-
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(content)
-
-
-        
-        MonthlyEmployeeReport.objects.create(
-            employee=emp,
-            month=month,
-            year=year,
-            report_file=file_path,
-            generated_at=datetime.now().replace(second=0, microsecond=0)
-        )
-
-        results.append({
-            "employee_id": emp.id,
-            "file_path": file_path,
-            "status": "created",
-            "generated_on": datetime.now().replace(second=0, microsecond=0)
-        })
-
-    return JsonResponse({"status": "success", "employee_reports": results})
-
 
+@api_view(['GET'])
 @permission_classes([AllowAny])
-def generate_company_report(month, year):
-
-    exists = MonthlyCompanyReport.objects.filter(
-        month=month,
-        year=year
-    ).first()
-
-    if exists:
-        return JsonResponse({
-            "status": "already_exists",
-            "file_path": os.path.join(settings.MEDIA_ROOT,exists.report_file),
-            "generated_on": datetime.now().replace(second=0, microsecond=0)
-        })
-
-    #
-    total_employees = Employee.objects.filter(employment_status='active').count()
-
-    presents = Attendance.objects.filter(
-        attendance_date__month=month,
-        attendance_date__year=year,
-        status="present"
-    ).count()
-
-    absents = Attendance.objects.filter(
-        attendance_date__month=month,
-        attendance_date__year=year,
-        status="absent"
-    ).count()
-
-    leaves = LeaveApplication.objects.filter(
-        status="approved",
-        start_date__month=month,
-        start_date__year=year
-    ).count()
-
-    insurance_expiring = EmployeeInsurance.objects.filter(
-        end_date__month=month,
-        end_date__year=year
-    ).count()
-
-    total_complaints = Complaint.objects.count()
-    resolved = Complaint.objects.filter(status="resolved").count()
-    unresolved = total_complaints - resolved
-
-   
-    content = f"""
-Company Monthly Report
-======================
-
-Month: {month}-{year}
-
-Total Active Employees: {total_employees}
-
-Attendance Summary:
-  Present: {presents}
-  Absent: {absents}
-
-Approved Leaves: {leaves}
-
-Insurance Expiring This Month: {insurance_expiring}
-
-Complaints:
-  Total: {total_complaints}
-  Resolved: {resolved}
-  Unresolved: {unresolved}
-"""
+@hr_required
+def job_status_view(request, job_id):
+    job = BackgroundJob.objects.filter(id=job_id).first()
+    if not job:
+        return JsonResponse({'message': 'Job not found.'}, status=404)
+    return JsonResponse({'job': job_progress(job)})
 
-    
-    folder = os.path.join(settings.MEDIA_ROOT, "company_reports")
-    os.makedirs(folder, exist_ok=True)
 
-    file_name = f"company_report_{month}_{year}.txt"
-    file_path = os.path.join(folder, file_name)
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@hr_required
+def cancel_job_view(request, job_id):
+    job = BackgroundJob.objects.filter(id=job_id).first()
+    if not job:
+        return JsonResponse({'message': 'Job not found.'}, status=404)
+    if not cancel_job(job):
+        return JsonResponse({'message': f"Job is already {job.status}."}, status=409)
+    return JsonResponse({'message': 'Cancellation requested.', 'job': job_progress(job)})
 
-    with open(file_path, "w", encoding="utf-8") as f:
-        f.write(content)
 
-    
-    MonthlyCompanyReport.objects.create(
-        month=month,
-        year=year,
-        report_file=file_path,
-        
-    )
-
-    return JsonResponse({
-        "status": "created",
-        "file_path": file_path,
-        "generated_on": datetime.now().replace(second=0, microsecond=0)
-    })
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@hr_required
+def export_view(request, dataset):
+    # ?format is taken by DRF's content negotiation, hence ?output=
+    try:
+        content_type, lines = stream_export(dataset, request.GET, request.GET.get('output', 'ndjson'))
+    except ExportError as e:
+        return JsonResponse({'message': str(e)}, status=400)
+    extension = 'csv' if content_type == 'text/csv' else 'ndjson'
+    response = StreamingHttpResponse(lines, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{dataset}.{extension}"'
+    return response
 
 
 @hr_required
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def leave_list_view(request):
-    leaves = LeaveType.objects.all()
-    leave_data = [
-        {
-            'id': leave.id,
-            'leave_type_name': leave.leave_type_name,
-            'description': leave.policy_description,
-            'max_days_allowed': leave.max_days_per_year,
-        }
-        for leave in leaves
-    ]
-    return JsonResponse({'leave_types': leave_data})
-
+    return serializers.LEAVE_TYPES.page(request, 'leave_types')
 
 @hr_required
 @api_view(['POST'])
@@ -1182,68 +810,76 @@ def delete_leave(request, leave_type_name):
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def insured_employees_view(request):
-    insurances = EmployeeInsurance.objects.select_related('employee', 'insurance_plan').filter(employee__employment_status="active")
+    """
+    Insurance plans with their own active enrollees, paginated per plan.
 
-    result = []
+    One query for the page of plans and one ordered scan of their enrollees,
+    grouped in a single pass.
+    """
+    enrollees = EmployeeInsurance.objects.filter(employee__employment_status="active")
+    plans = InsurancePlan.objects.filter(Exists(enrollees.filter(insurance_plan=OuterRef('pk'))))
+    try:
+        page, next_cursor = paginate(request, plans, {
+            "insurance_id": "id",
+            "insurance_name": "plan_name",
+        })
+    except PaginationError as e:
+        return JsonResponse({'message': str(e)}, status=400)
 
-    for insurance in insurances:
-        employees_list = [
-            {
-                "employee_id": ei.employee.id,
-                "employee_name": ei.employee.full_name,
-                "insurance_id": ei.insurance_plan.id,
-                "insurance_name": ei.insurance_plan.plan_name,
-                "status": ei.status,
-                "start_date": ei.start_date,
-                "end_date": ei.end_date,
-                "monthly_deduction": ei.monthly_deduction,
-            }
-            for ei in insurances
-        ]
+    # Enrollees are attached by plan id, so ?fields= without insurance_id skips them.
+    by_plan = {}
+    for plan in page:
+        if "insurance_id" in plan:
+            plan["employees"] = by_plan[plan["insurance_id"]] = []
 
-        result.append({
-            "insurance_name": insurance.plan_name,
-            "employees": employees_list
+    rows = enrollees.filter(insurance_plan_id__in=list(by_plan)).order_by('insurance_plan_id', 'id').values_list(
+        'insurance_plan_id', 'employee_id', 'employee__full_name', 'status', 'start_date', 'end_date', 'monthly_deduction'
+    )
+    for plan_id, employee_id, name, enrollment_status, start_date, end_date, deduction in rows:
+        by_plan[plan_id].append({
+            "employee_id": employee_id,
+            "employee_name": name,
+            "status": enrollment_status,
+            "start_date": start_date,
+            "end_date": end_date,
+            "monthly_deduction": deduction,
         })
-    return JsonResponse({"insurances": result}, safe=False)
+    return JsonResponse({"insurances": page, "next_cursor": next_cursor})
+
 
 @hr_required
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def view_attendance_view(request):
-    attendances = Attendance.objects.select_related('employee').all()
+    return serializers.ATTENDANCE.page(request, 'attendances')
 
-    result = [
-        {
-            "employee_id": att.employee.id,
-            "employee_name": att.employee.full_name,
-            "date": att.attendance_date,
-            "check_in_time": att.check_in_time,
-            "check_out_time": att.check_out_time,
-            "status": att.status,
-        }
-        for att in attendances
-    ]
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@hr_required
+def bulk_attendance_view(request):
+    """
+    Ingest a batch of punches sent as NDJSON, or CSV with Content-Type text/csv.
 
-    return JsonResponse({"attendances": result}, safe=False)
+    The body is read line by line from the request stream, so large feeds are
+    not held in memory (and not limited by DATA_UPLOAD_MAX_MEMORY_SIZE).
+    """
+    parse = parse_csv if 'csv' in (request.content_type or '') else parse_ndjson
+    result = ingest_attendance(parse(request.stream or []))
+    return JsonResponse(result)
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@hr_required
+def punch_events_view(request):
+    """Append raw punches (NDJSON or CSV); daily attendance is derived by the rollup task."""
+    parse = parse_csv if 'csv' in (request.content_type or '') else parse_ndjson
+    return JsonResponse(ingest_punches(parse(request.stream or [])))
 
 @hr_required
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def insurance_view(request):
-    insurances = InsurancePlan.objects.all()
-    data = [
-        {
-            'id': insurance.id,
-            'plan_name': insurance.plan_name,
-            'coverage': str(insurance.coverage_amount),  # include any other fields you want
-            'premium': str(insurance.premium_amount),  # convert Decimal to string for JSON
-            'policy terms' : insurance.policy_terms
-        }
-        for insurance in insurances
-    ]
-    return JsonResponse({'insurances': data})
-
+    return serializers.INSURANCE_PLANS.page(request, 'insurances')
 
 @hr_required
 @api_view(['POST'])
@@ -1346,24 +982,8 @@ def update_insurance(request, insurance_id):
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def employee_leave(request):
-    leave_applications = LeaveApplication.objects.select_related('employee', 'leave_type').filter(employee__employment_status="active")
-    result = [
-        {
-            'id': la.id,
-            'employee_id': la.employee.id,
-            'full_name': la.employee.full_name,           
-            'leave_id': la.leave_type.id,
-            'leave_type_name': la.leave_type.leave_type_name,
-            'start_date': la.start_date,
-            'end_date': la.end_date,
-            'total_days': la.total_days,
-            'status': la.status,
-            'applied_date': la.applied_date,
-        }
-        for la in leave_applications
-    ]
-
-    return JsonResponse({'leave_applications': result}, safe=False)
+    leave_applications = LeaveApplication.objects.filter(employee__employment_status="active")
+    return serializers.LEAVE_APPLICATIONS.page(request, 'leave_applications', leave_applications)
 
 @hr_required
 @api_view(['PUT', 'GET'])
@@ -1527,10 +1147,10 @@ def edit_leaves_view(request, employee_id):
             return JsonResponse({"message": "Invalid status"}, status=400)
         if new_status == "approved":
             approved_days = LeaveApplication.objects.filter(
+                in_year('start_date', date.today().year),
                 employee=employee,
                 leave_type=leave_record.leave_type,
                 status="approved",
-                start_date__year=date.today().year
             ).aggregate(total_days=Sum('total_days'))['total_days'] or 0
             if approved_days + leave_record.total_days > leave_record.leave_type.max_days_per_year:
                 leave_record.status = "rejected"
@@ -1648,14 +1268,8 @@ def apply_leaves(request, employee_id):
     if s_date < today:
         return JsonResponse({"message": "Cannot apply for leave in the past"}, status=400)
 
-    overlapping = LeaveApplication.objects.filter(
-        employee=employee,
-        start_date__lte=e_date,
-        end_date__gte=s_date,
-        status__in=["pending", "approved"]
-    ).exists()
-
-    if overlapping:
+    requested = leave_index([employee.id], s_date, e_date, statuses=["pending", "approved"])
+    if requested.overlaps(employee.id, s_date, e_date):
         return JsonResponse({"message": "This leave overlaps with an existing request"}, status=409)
     
     le = LeaveType.objects.filter(leave_type_name__iexact=leave_type)
@@ -1686,24 +1300,48 @@ def apply_leaves(request, employee_id):
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
-def all_complaints_view(request):
-    complaints = Complaint.objects.all().select_related("employee")
-
-    result = []
-
-    for c in complaints:
-        result.append({
-            "id": c.id,
-            "employee_id": c.employee.id,
-            "employee_name": c.employee.full_name,
-            "title": c.subject,
-            "description": c.description,
-            "status": c.status,
-            "created_at": c.filed_date
-        })
+@hr_required
+def leave_coverage_view(request):
+    """Approved-leave coverage of several employees over a date range, from one leave query."""
+    try:
+        employee_ids = sorted({int(i) for i in request.GET.get('employee_ids', '').split(',') if i.strip()})
+    except ValueError:
+        return JsonResponse({"message": "employee_ids must be a comma-separated list of ids"}, status=400)
+    if not employee_ids:
+        return JsonResponse({"message": "employee_ids is required"}, status=400)
+    if len(employee_ids) > COVERAGE_MAX_EMPLOYEES:
+        return JsonResponse({"message": f"At most {COVERAGE_MAX_EMPLOYEES} employees per request"}, status=400)
+    try:
+        date_from = datetime.strptime(request.GET.get('from', ''), "%Y-%m-%d").date()
+        date_to = datetime.strptime(request.GET.get('to', ''), "%Y-%m-%d").date()
+    except ValueError:
+        return JsonResponse({"message": "from and to are required. Use YYYY-MM-DD"}, status=400)
+    if date_from > date_to:
+        return JsonResponse({"message": "from cannot be after to"}, status=400)
+
+    paid = {'true': True, 'false': False}.get(request.GET.get('paid', '').lower())
+    index = leave_index(employee_ids, date_from, date_to, paid=paid)
+    return JsonResponse({
+        "from": str(date_from),
+        "to": str(date_to),
+        "employees": [
+            {
+                "employee_id": employee_id,
+                "covered_days": index.covered_days(employee_id, date_from, date_to),
+                "ranges": [
+                    {"start": str(start), "end": str(end)}
+                    for start, end in index.covered(employee_id, date_from, date_to)
+                ],
+            }
+            for employee_id in employee_ids
+        ],
+    })
 
-    return JsonResponse ({"complaints": result}, status=200)
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def all_complaints_view(request):
+    return serializers.COMPLAINTS.page(request, 'complaints')
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -0,0 +1,4 @@
+def init_django_worker():
+    """ProcessPoolExecutor initializer: set up Django in each worker process before it runs a task."""
+    import django
+    django.setup()
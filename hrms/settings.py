@@ -44,6 +44,7 @@ REST_FRAMEWORK = {
     ),
 }
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',  # first, so it sees every query of the request
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # CORS middleware should be before CommonMiddleware
@@ -75,10 +76,18 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'hrms.wsgi.application'
 
+# Database connection reuse. By default each thread keeps its connection for
+# DB_CONN_MAX_AGE seconds (0 closes it after every request), checked with a
+# ping before the first query of a request when DB_CONN_HEALTH_CHECKS is on.
+# DB_POOL_SIZE > 0 switches to core.dbpool instead: at most that many
+# connections per worker process, returned to the pool after every request and
+# shared by all threads, which is what ASGI and threaded workers need.
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '0'))
+
 # Database configuration using environment variables
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
+        'ENGINE': 'core.dbpool.mysql' if DB_POOL_SIZE else 'django.db.backends.mysql',
         'NAME': os.getenv('DB_NAME', 'hrms_db'),
         'USER': os.getenv('DB_USER', 'root'),
         'PASSWORD': os.getenv('DB_PASSWORD', 'admin'),
@@ -88,6 +97,14 @@ DATABASES = {
             'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
             'charset': 'utf8mb4',
         },
+        'CONN_MAX_AGE': 0 if DB_POOL_SIZE else int(os.getenv('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+        'POOL': {
+            'SIZE': DB_POOL_SIZE,
+            'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', '30')),
+            # Below MySQL's wait_timeout, so the server never drops a pooled connection first.
+            'MAX_IDLE': float(os.getenv('DB_POOL_MAX_IDLE', '300')),
+        },
     }
 }
 
@@ -170,6 +187,76 @@ CSRF_TRUSTED_ORIGINS = [
 
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
 
+# Login: an email (or IP) with this many failures inside LOGIN_FAILURE_WINDOW seconds is refused
+# without hashing; at most LOGIN_HASH_WORKERS passwords are hashed at once, LOGIN_HASH_QUEUE more wait
+LOGIN_MAX_FAILURES = int(os.getenv('LOGIN_MAX_FAILURES', '5'))
+LOGIN_MAX_FAILURES_PER_IP = int(os.getenv('LOGIN_MAX_FAILURES_PER_IP', '50'))
+LOGIN_FAILURE_WINDOW = int(os.getenv('LOGIN_FAILURE_WINDOW', '300'))
+LOGIN_HASH_WORKERS = int(os.getenv('LOGIN_HASH_WORKERS', '4'))
+LOGIN_HASH_QUEUE = int(os.getenv('LOGIN_HASH_QUEUE', '64'))
+
+# Cache: 'locmem' (per process, default), 'file' (CACHE_LOCATION directory, shared by the
+# processes of one host) or 'redis' (CACHE_LOCATION url, needs the redis package)
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[os.getenv('CACHE_BACKEND', 'locmem')],
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+# Sessions: 'db' (django_session table, default), 'cached_db' (write-through cache in front
+# of the table), 'cache' (cache only), 'file' or 'signed_cookies' (no server-side storage)
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'file': 'django.contrib.sessions.backends.file',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = SESSION_ENGINES[os.getenv('SESSION_BACKEND', 'db')]
+
+# hr_required checks employees against a per-process cache; changes made in another
+# worker process (e.g. a termination) take effect within AUTHZ_CACHE_TTL seconds
+AUTHZ_CACHE_TTL = int(os.getenv('AUTHZ_CACHE_TTL', '60'))
+AUTHZ_CACHE_SIZE = int(os.getenv('AUTHZ_CACHE_SIZE', '4096'))
+
+# Periodic maintenance (python manage.py run_maintenance); intervals in seconds
+MAINTENANCE_INTERVALS = {
+    'make_active_inactive': int(os.getenv('MAINTENANCE_INSURANCE_INTERVAL', '3600')),
+    'pay_payrolls': int(os.getenv('MAINTENANCE_PAYROLL_INTERVAL', '3600')),
+    'rollup_attendance': int(os.getenv('MAINTENANCE_ROLLUP_INTERVAL', '60')),
+    'recompute_payrolls': int(os.getenv('MAINTENANCE_RECOMPUTE_INTERVAL', '300')),
+}
+MAINTENANCE_LOCK_TTL = int(os.getenv('MAINTENANCE_LOCK_TTL', '600'))
+
+# Report jobs (python manage.py run_jobs): a running job with no heartbeat for this many
+# seconds is failed so it can be queued again; keep it above the time one chunk takes
+REPORT_JOB_LEASE = int(os.getenv('REPORT_JOB_LEASE', '300'))
+
+# Punch rollup: first punch after this time is 'late', days shorter than this many hours are 'absent'
+ATTENDANCE_LATE_AFTER = os.getenv('ATTENDANCE_LATE_AFTER', '09:15')
+ATTENDANCE_MIN_HOURS = float(os.getenv('ATTENDANCE_MIN_HOURS', '4'))
+# Seconds of already-rolled-up punches re-read each run (ids of concurrent inserts commit out of order)
+ATTENDANCE_ROLLUP_GRACE = int(os.getenv('ATTENDANCE_ROLLUP_GRACE', '300'))
+
+# Payroll calculation: 'scalar' (Decimal, per employee) or 'vector' (NumPy, needs numpy installed)
+PAYROLL_ENGINE = os.getenv('PAYROLL_ENGINE', 'scalar')
+# One payroll run per month at a time: a run still going after PAYROLL_RUN_TTL seconds counts as
+# abandoned; a concurrent trigger waits up to PAYROLL_RUN_WAIT seconds for the running one's rows
+PAYROLL_RUN_TTL = int(os.getenv('PAYROLL_RUN_TTL', '600'))
+PAYROLL_RUN_WAIT = float(os.getenv('PAYROLL_RUN_WAIT', '30'))
+
+# Request metrics, served in Prometheus format at /api/metrics/ to holders of this
+# bearer token (unset = HR sessions only)
+METRICS_TOKEN = os.getenv('METRICS_TOKEN') or None
+# Log SQL of queries slower than this many milliseconds (unset = off)
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS')) if os.getenv('SLOW_QUERY_THRESHOLD_MS') else None
+
 # Security settings for production
 if not DEBUG:
     CSRF_COOKIE_SAMESITE = "None"